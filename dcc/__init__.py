@@ -162,6 +162,29 @@ SETTINGS_UI['i3D_exportTexCoords']              = {'type':TYPE_BOOL,  'defaultVa
 SETTINGS_UI['i3D_exportSkinWeigths']            = {'type':TYPE_BOOL,  'defaultValue':True   }
 SETTINGS_UI['i3D_exportMergeGroups']            = {'type':TYPE_BOOL,  'defaultValue':True   }
 SETTINGS_UI['i3D_exportVerbose']                = {'type':TYPE_BOOL,  'defaultValue':True   }
+SETTINGS_UI['i3D_exportBulkExtraction']         = {'type':TYPE_BOOL,  'defaultValue':True   }
+SETTINGS_UI['i3D_exportWeldTolerance']          = {'type':TYPE_FLOAT, 'defaultValue':0.0    }
+SETTINGS_UI['i3D_exportWeldNormalAngle']        = {'type':TYPE_FLOAT, 'defaultValue':0.0    }
+SETTINGS_UI['i3D_exportWeldUvTolerance']        = {'type':TYPE_FLOAT, 'defaultValue':0.0    }
+SETTINGS_UI['i3D_exportWeldColorTolerance']     = {'type':TYPE_FLOAT, 'defaultValue':0.0    }
+SETTINGS_UI['i3D_exportRemoveDegenerateTriangles'] = {'type':TYPE_BOOL,  'defaultValue':False  }
+SETTINGS_UI['i3D_exportStrictTriangleCleanup']  = {'type':TYPE_BOOL,  'defaultValue':False  }
+SETTINGS_UI['i3D_exportMaxRemovedTriangles']    = {'type':TYPE_INT,   'defaultValue':0      }
+SETTINGS_UI['i3D_exportPositionDigits']         = {'type':TYPE_INT,   'defaultValue':6      }
+SETTINGS_UI['i3D_exportPositionDigitsRelative'] = {'type':TYPE_BOOL,  'defaultValue':False  }
+SETTINGS_UI['i3D_exportNormalDigits']           = {'type':TYPE_INT,   'defaultValue':6      }
+SETTINGS_UI['i3D_exportUvDigits']               = {'type':TYPE_INT,   'defaultValue':6      }
+SETTINGS_UI['i3D_exportColorDigits']            = {'type':TYPE_INT,   'defaultValue':6      }
+SETTINGS_UI['i3D_exportSnapBlendWeights']       = {'type':TYPE_BOOL,  'defaultValue':False  }
+SETTINGS_UI['i3D_exportWorkerCount']            = {'type':TYPE_INT,   'defaultValue':1      }
+SETTINGS_UI['i3D_exportShapeCache']             = {'type':TYPE_BOOL,  'defaultValue':True   }
+SETTINGS_UI['i3D_exportShapeCacheDisk']         = {'type':TYPE_BOOL,  'defaultValue':False  }
+SETTINGS_UI['i3D_exportShapeCacheSize']         = {'type':TYPE_INT,   'defaultValue':512    }
+SETTINGS_UI['i3D_exportMeshPoolSize']           = {'type':TYPE_INT,   'defaultValue':1024   }
+SETTINGS_UI['i3D_exportInstanceIdenticalShapes'] = {'type':TYPE_BOOL, 'defaultValue':False  }
+SETTINGS_UI['i3D_exportVertexCacheSize']        = {'type':TYPE_INT,   'defaultValue':0      }
+SETTINGS_UI['i3D_exportChunkTriangles']         = {'type':TYPE_INT,   'defaultValue':0      }
+SETTINGS_UI['i3D_exportMemoryBudget']           = {'type':TYPE_INT,   'defaultValue':2048   }
 SETTINGS_UI['i3D_exportRelativePaths']          = {'type':TYPE_BOOL,  'defaultValue':True   }
 SETTINGS_UI['i3D_exportGameRelativePath']          = {'type':TYPE_BOOL,  'defaultValue':False   }
 SETTINGS_UI['i3D_exportUseSoftwareFileName']    = {'type':TYPE_BOOL,  'defaultValue':True   }
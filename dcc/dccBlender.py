@@ -25,7 +25,7 @@ from time import monotonic
 import os
 import re
 import math, mathutils
-from ..util import logUtil, i3d_densityUtil, selectionUtil, i3d_shaderUtil
+from ..util import logUtil, i3d_densityUtil, i3d_weldUtil, i3d_shapeUtil, i3d_boundingVolumeUtil, i3d_vertexCacheUtil, i3d_triangleCleanupUtil, i3d_textEncodeUtil, selectionUtil, i3d_shaderUtil
 from ..util import i3d_directoryFinderUtil as dirf
 import copy
 import numpy as np
@@ -372,30 +372,21 @@ def getMergeGroupShapeData(shapeNameStr, shapeData, sceneNodeData):
                     mergeData[i] = memberResult
 
         if (not overrideBV(shapeNameStr, shapeData, sceneNodeData)):
-            #BV-values loop
-            bVmergeData = {}
-            for i in range(len(sceneNodeData["children"])):
-                child = sceneNodeData["children"][i]
-                bvMemberResult = getMergeMemberShapeData(child, float(0),shapeNameStr, True,True,True)      # g is a multiple of 1/32767 one g value per mesh, detect empty for a g increase
-                if bvMemberResult:
-                    bVmergeData[i] = bvMemberResult
-            vSum = mathutils.Vector((0,0,0))
-            bvCenter = mathutils.Vector((0,0,0)) #TODO: check init value
-            bvRadius = 0
-            vCount = 0
-            # print([vert["p"] for vert in [vertItem for vertItemsLists in [i["Vertices"]["data"] for k,i in bVmergeData.items()] for vertItem in vertItemsLists]])
-            vertPos = [vert["p"] for vert in [vertItem for vertItemsLists in [i["Vertices"]["data"] for k,i in bVmergeData.items()] for vertItem in vertItemsLists]]
-            for v in vertPos:
-                pos = v.strip().split(" ")
-                vSum += mathutils.Vector((float(pos[0]),float(pos[1]),float(pos[2])))        #x,y,z vector
-                vCount += 1
-                bvCenter = vSum / vCount
-            for v in vertPos:
-                pos = v.strip().split(" ")
-                vect = bvCenter - mathutils.Vector((float(pos[0]),float(pos[1]),float(pos[2])))
-                bvRadius = max(vect.length, bvRadius )
-
-            shapeData["bvCenter"] = "{:g} {:g} {:g}".format(bvCenter.x,bvCenter.y,bvCenter.z)
+            #BV-values from the extracted member positions, fully transformed into root space
+            bakeTransforms = "BAKE_TRANSFORMS" == UIGetAttrString('i3D_exportAxisOrientations')
+            vertPos = []
+            for i, memberResult in mergeData.items():
+                matrixTransform = getMemberTransform(sceneNodeData["children"][i], shapeNameStr, True, True, True)
+                bvPositions = transformArray(memberResult["LocalPositions"], matrixTransform)
+                if (bakeTransforms): # x z -y
+                    bvPositions = bakeAxisArray(bvPositions).astype(np.float32)
+                # positions as written to the file
+                vertPos.extend(i3d_weldUtil.getFormattedValues(bvPositions).tolist())
+            if vertPos:
+                bvCenter, bvRadius = i3d_boundingVolumeUtil.getBoundingSphere(vertPos, UIGetAttrString('i3D_exportBoundingVolumeMode'))
+            else:
+                bvCenter, bvRadius = (0.0, 0.0, 0.0), 0
+            shapeData["bvCenter"] = "{:g} {:g} {:g}".format(*bvCenter)
             shapeData["bvRadius"] = "{:g}".format(bvRadius)
 
         shapeData['name'] = "MergedChildren{:d}".format(sceneNodeData["id"])       # rename the shape to MergedChildrenX
@@ -430,105 +421,100 @@ def getMergeGroupShapeData(shapeNameStr, shapeData, sceneNodeData):
 
     if 'i3D_vertexCompressionRange' in sceneNodeData:
         shapeData['vertexCompressionRange'] = sceneNodeData['i3D_vertexCompressionRange']
+    shapeData.pop("LocalPositions", None)
 
     #merge results
     #integrate all items of mergeData into the shapeData structure
-    finalVertexBuffer = []
-    finalIndexBuffer = []
-    finalSubsets = []
-    finalMaterials = []
-    finalTriangles = []
-    vertexBufferDict = {}
-    indexBufferDict = {}
-    for k, item in mergeData.items():
-        vertexBuffer = []
-        indexBuffer = []
-        for vertex in item["Vertices"]['data']:
-            vertexBuffer.append(vertex)
-            # if a child has color set -> enable color for whole merged group
-            if "c" in vertex:
-                shapeData["Vertices"]["color"] = "true"
-        for triangle in item["Triangles"]['data']:
-            for trianlgeEntry in triangle.values():
-                for index in trianlgeEntry.strip().split(" "):
-                    indexBuffer.append(int(index))
-        vertexBufferDict[k] = vertexBuffer
-        indexBufferDict[k] = indexBuffer
-    # for vB in vertexBufferDict.values():
-        # print(vB)
-    # for iB in indexBufferDict.values():
-        # print(iB)
+    members = list(mergeData.values())
     materialList = []
     materialSlotNames = []
-    for k, item in mergeData.items():
+    materialIds = {}
+    pieceMaterials = []     # one piece per member subset, merged by material in member order
+    pieceMembers = []
+    pieceSubsets = []
+    for memberIndex, item in enumerate(members):
+        memberMaterials = set()
         for matId, material in enumerate(item["Materials"]):
-            if not material in materialList:
+            if material in memberMaterials:
+                continue    # only the first subset of a material is merged
+            memberMaterials.add(material)
+            if material not in materialIds:
+                materialIds[material] = len(materialList)
                 materialList.append(material)
                 materialSlotNames.append(item["MaterialSlotNames"][matId])
-
-    baseVertexIndex = 0
-    baseIndexIndex = 0
-    for matId, material in enumerate(materialList):
-        subsetDict = {}
-        #find subsets to material
-        for k, item in mergeData.items():
-            if material in item["Materials"]:
-                subsetDict[k] = item["Subsets"]["data"][item["Materials"].index(material)]
-        # print(subsetDict)
-        #put all data of subset together
-        mergeSubset = {"firstVertex" : str(baseVertexIndex),"numVertices": "0", "firstIndex":str(baseIndexIndex), "numIndices": "0"}
-        if materialSlotNames[matId] is not None and materialSlotNames[matId] != "":
-            mergeSubset["materialSlotName"] = materialSlotNames[matId]
-        for k, subsets in subsetDict.items():
-            numVertices = int(subsets["numVertices"])
-            numIndices = int(subsets["numIndices"])
-            vertexList = vertexBufferDict[k][int(subsets["firstVertex"]):int(subsets["firstVertex"])+numVertices]
-            indexList = indexBufferDict[k][int(subsets["firstIndex"]):int(subsets["firstIndex"])+numIndices]
-            minIndexList = min(indexList)
-            indexList = [i-minIndexList+baseVertexIndex for i in indexList]   #normalize count to start by zero and apply offset
-            # print("baseIndexIndex: {}, baseVertexIndex: {}, ".format(baseIndexIndex,baseVertexIndex))
-            # print("index first: {}, num: {} \nindexList: {}".format(subsets["firstIndex"],int(subsets["firstIndex"])+numIndices,indexList))
-            # print("vertex first: {}, num: {} \nvertexList: {}".format(subsets["firstVertex"],int(subsets["firstVertex"])+numVertices,vertexList))
-            finalIndexBuffer+=indexList
-            finalVertexBuffer+=vertexList
-            mergeSubset["numVertices"] = "{}".format(int(mergeSubset["numVertices"]) + numVertices)
-            mergeSubset["numIndices"] = "{}".format(int(mergeSubset["numIndices"]) + numIndices)
-            baseVertexIndex += numVertices
-            baseIndexIndex += numIndices
-
-        finalSubsets.append(mergeSubset)
-        finalMaterials.append(material)
-
-    # print(finalMaterials)
-    # for i in finalSubsets:
-        # print("i:{}".format(i))
-    # print("{} entries".format(len(finalIndexBuffer)))
-    # print(finalIndexBuffer)
-    # print("{} vertices".format(len(finalVertexBuffer)))
-    # for i in finalVertexBuffer:
-        # print("vertex: {}".format(i))
-    #overwrite shapeData with final values
+            pieceMaterials.append(materialIds[material])
+            pieceMembers.append(memberIndex)
+            pieceSubsets.append(matId)
+
+    # if a child has color set -> enable color for whole merged group
+    if any(item["Buffers"].colors is not None for item in members):
+        shapeData["Vertices"]["color"] = "true"
+    colorSet = "color" in shapeData["Vertices"]
+    normalSet = shapeData["Buffers"].normals is not None
+    uvCount = len(shapeData["Buffers"].uvs)
+
+    mergedBuffers = i3d_shapeUtil.ShapeBuffers()
+    if pieceMaterials:
+        memberBuffers = [item["Buffers"] for item in members]
+        pieceOrder = np.argsort(np.array(pieceMaterials, dtype=np.int64), kind='stable')
+        pieceMaterials = np.array(pieceMaterials, dtype=np.int64)[pieceOrder]
+        pieceMembers = np.array(pieceMembers, dtype=np.int64)[pieceOrder]
+        pieceRanges = np.array([memberBuffers[memberIndex].subsets[subsetIndex]
+                                for memberIndex, subsetIndex in zip(pieceMembers.tolist(), np.array(pieceSubsets)[pieceOrder].tolist())],
+                               dtype=np.int64).reshape(-1, 4)
+        vertexOffsets = np.cumsum([0] + [buffers.vertexCount for buffers in memberBuffers])
+        indexOffsets = np.cumsum([0] + [len(buffers.indices) for buffers in memberBuffers])
+        numVertices = pieceRanges[:, 1]
+        numIndices = pieceRanges[:, 3]
+        baseVertexIndex = getRangeStarts(numVertices)
+
+        # pieces are row ranges of the member arrays concatenated once
+        vertexRows = getRangeRows(pieceRanges[:, 0] + vertexOffsets[pieceMembers], numVertices)
+        indexRows = getRangeRows(pieceRanges[:, 2] + indexOffsets[pieceMembers], numIndices)
+        indices = np.concatenate([buffers.indices for buffers in memberBuffers]).astype(np.int64)[indexRows]
+        indices += np.repeat(baseVertexIndex - pieceRanges[:, 0], numIndices)      #normalize count to start by zero and apply offset
+        mergedBuffers.indices = indices.astype(np.uint32)
+        mergedBuffers.positions = np.concatenate([buffers.positions for buffers in memberBuffers])[vertexRows]
+        if normalSet:
+            mergedBuffers.normals = np.concatenate([buffers.normals for buffers in memberBuffers])[vertexRows]
+        if colorSet:
+            mergedBuffers.colors = np.concatenate([buffers.colors if buffers.colors is not None else
+                                                   np.ones((buffers.vertexCount, 4), dtype=np.float32)
+                                                   for buffers in memberBuffers])[vertexRows]
+        mergedBuffers.uvs = [np.concatenate([buffers.uvs[uvIndex] if uvIndex < len(buffers.uvs) else
+                                             np.zeros((buffers.vertexCount, 2), dtype=np.float32)
+                                             for buffers in memberBuffers])[vertexRows]
+                             for uvIndex in range(uvCount)]
+        if all(buffers.generic is not None for buffers in memberBuffers):
+            mergedBuffers.generic = np.concatenate([buffers.generic for buffers in memberBuffers])[vertexRows]
+        if all(buffers.blendIndices is not None for buffers in memberBuffers):
+            mergedBuffers.blendIndices = np.concatenate([buffers.blendIndices for buffers in memberBuffers])[vertexRows]
+
+        #put all subsets of a material together
+        firstPieces = np.flatnonzero(np.r_[True, pieceMaterials[1:] != pieceMaterials[:-1]])
+        mergedBuffers.subsets = np.stack((baseVertexIndex[firstPieces], np.add.reduceat(numVertices, firstPieces),
+                                          getRangeStarts(numIndices)[firstPieces], np.add.reduceat(numIndices, firstPieces)), axis=1)
+    mergedBuffers.materialSlotNames = materialSlotNames
 
     if ("i3D_mergeChildren" in sceneNodeData):  #mergeChildren material behavior like maya exporter
-        if len(finalMaterials) == 0:
+        if len(materialList) == 0:
             shapeData["Materials"] = ["default"]
         else:
-            shapeData["Materials"] = [finalMaterials[0]]
+            shapeData["Materials"] = [materialList[0]]
     else:
-        shapeData["Materials"] = finalMaterials
-    shapeData["Subsets"]['data'] = finalSubsets
-    shapeData["Subsets"]["count"] = str(len(finalSubsets))
-
-    for i in range(0,len(finalIndexBuffer),3):
-        finalTriangles.append({"vi" : "{} {} {}".format(finalIndexBuffer[i],finalIndexBuffer[i+1],finalIndexBuffer[i+2])})
-    # print("finalTriangles: {}".format(finalTriangles))
-    shapeData["Triangles"]['data'] = finalTriangles
-    shapeData["Triangles"]['count'] = str(len(finalTriangles))
-    shapeData["Vertices"]['data'] = finalVertexBuffer
-    shapeData["Vertices"]['count'] = str(len(finalVertexBuffer))
+        shapeData["Materials"] = materialList
+
+    if UIGetAttrBool("i3D_exportRemoveDegenerateTriangles") and mergedBuffers.triangleCount > 0:
+        i3d_triangleCleanupUtil.cleanShapeBuffers(mergedBuffers)
+    m_cacheSize = UIGetAttrInt("i3D_exportVertexCacheSize")
+    if m_cacheSize > 0:
+        i3d_vertexCacheUtil.optimizeShapeBuffers(mergedBuffers, m_cacheSize, UIGetAttrBool("i3D_exportVerbose"))
+
     #uvDensity
-    for subset in finalSubsets:
-        subset.update(i3d_densityUtil.computeUvDensity(shapeData["Triangles"]["data"],shapeData["Vertices"],int(subset["firstIndex"]),int(subset["numIndices"])))
+    mergedBuffers.uvDensities = i3d_densityUtil.computeSubsetUvDensities(mergedBuffers)
+    i3d_shapeUtil.encodeShapeBuffers(mergedBuffers, getTextPrecision())
+    shapeData["Buffers"] = mergedBuffers
+    shapeData["MeshVertexCount"] = sum(item["MeshVertexCount"] for item in members)
 
     if ("i3D_mergeChildren" in sceneNodeData):  #mergeChildren
         shapeData["Vertices"]["generic"] = "true"
@@ -558,9 +544,7 @@ def getMergeMemberShapeData(shapeNameStr, specialValue, rootStr, applyTrans, app
     meshOwners = getMeshOwners(bpy.data.objects[shapeNameStr].data.name)
     ownerObj = bpy.data.objects[meshOwners[0]]
 
-    nodeVisible = isNodeVisible(ownerObj.name)
-    if not nodeVisible:
-        ownerObj.hide_set(False)
+    nodeShown = showNodeForExtraction(ownerObj)
 
     for modifier in ownerObj.modifiers:    #cannot have skinning and merge shapes
         if modifier.type == 'ARMATURE':
@@ -576,56 +560,15 @@ def getMergeMemberShapeData(shapeNameStr, specialValue, rootStr, applyTrans, app
 
     # -------------------------------------------------------------
     #--- root -> member transformation
-    if rootStr == 'ORIGIN':
-        matrixTransform = mathutils.Matrix.Identity(4)
-    else:
-        l2 = bpy.data.objects[shapeNameStr].matrix_world
-        l1 = bpy.data.objects[rootStr].matrix_world
-        matrixTransform = l1.inverted() @ l2
-        translation, rotationQuat, scale = matrixTransform.decompose()
-        if applyTrans:
-            translationMat = mathutils.Matrix.Translation(translation)
-        else:
-            translationMat = mathutils.Matrix.Translation((0.0, 0.0, 0.0))      #identity
-        if applyRot:
-            rotationMat = rotationQuat.to_matrix().to_4x4()
-        else:
-            rotationMat = mathutils.Matrix.Rotation(math.radians(0.0), 4, 'X')  #identity
-        if applyScale:
-            scaleMat = mathutils.Matrix.Diagonal(scale).to_4x4()
-        else:
-            scaleMat = mathutils.Matrix.Scale(1, 4)                             #identity
-        matrixTransform = translationMat @ rotationMat @ scaleMat
-
-    # -------------------------------------------------------------
-    materialsList, materialSlotNames = getShapeMaterials(m_meshGen.name)
-    m_materials = {}
-    for mat in materialsList:
-        m_materials[mat] = []
-    if (len(materialsList) > 1):
-        for m_triangle in m_meshGen.loop_triangles:
-            m_mat = m_meshGen.materials[m_triangle.material_index]
-            if None == m_mat:
-                m_mat = "default"
-            else:
-                m_mat = m_mat.name
-            m_materials[m_mat].append(m_triangle.index)
-    else:
-        for m_triangle in m_meshGen.loop_triangles:
-            m_materials[materialsList[0]].append(m_triangle.index)
+    matrixTransform = getMemberTransform(shapeNameStr, rootStr, applyTrans, applyRot, applyScale)
 
     # -------------------------------------------------------------
     m_vertices  = {}
-    m_triangles = {}
-    m_subsets   = {}
-    m_vertices["data"]  = []
-    m_triangles["data"] = []
-    m_subsets["data"]   = []
     # -------------------------------------------------------------
     if UIGetAttrBool("i3D_exportNormals"):
         m_vertices["normal"] = "true"
     if UIGetAttrBool("i3D_exportColors"):
-        m_vtxColorLayerName = getRenderColorName(m_meshGen.name)
+        m_vtxColorLayerName = getRenderColorName(m_meshGen)
         if (m_vtxColorLayerName):
             m_vertices["color"] = "true"
     if UIGetAttrBool("i3D_exportTexCoords"):
@@ -634,108 +577,101 @@ def getMergeMemberShapeData(shapeNameStr, specialValue, rootStr, applyTrans, app
             m_str = "uv{:d}".format(m_i)
             m_vertices[m_str] = "true"
 
+    # -------------------------------------------------------------
+    m_uvCount = min(len(m_meshGen.uv_layers), 4) if UIGetAttrBool("i3D_exportTexCoords") else 0
+    m_arrays = getMeshArrays(m_meshGen, m_uvCount, m_vtxColorLayerName if "color" in m_vertices else None,
+                             UIGetAttrBool("i3D_exportBulkExtraction"))
+
+    materialsList, materialSlotNames, m_triangleOrder, m_subsetTriangles = getMaterialSubsets(m_meshGen, m_arrays["materialIndices"])
+
     # -------------------------------------------------------------
     bakeTransforms = "BAKE_TRANSFORMS" == UIGetAttrString('i3D_exportAxisOrientations')
     normalInVert = "normal" in m_vertices
     colorInVert = "color" in m_vertices
-    uv0InVert = "uv0" in m_vertices
-    uv1InVert = "uv1" in m_vertices
-    uv2InVert = "uv2" in m_vertices
-    uv3InVert = "uv3" in m_vertices
-    blendweightsInVert = "blendweights" in m_vertices
 
-    m_indexBuffer    = {}
-    m_currentIndex   = 0
-    m_firstIndex     = 0
-    m_numVerticesSet = set()
-    m_trainglesCount = 0
-    m_subsetsCount   = 0
-    m_counter        = 0
-    for matId, m_mat in enumerate(materialsList):
-        m_matItem = m_materials[m_mat]
-        m_trainglesCount += len( m_matItem )
-        m_subsetsCount  += 1
-        m_numIndices    = 0
-        m_numVerticesSet.clear()
-        for m_primIndex in m_matItem:
-            m_triangle = m_meshGen.loop_triangles[ m_primIndex ]
-            m_strVI = ''
-            for m_loopIndex in m_triangle.loops:
-                m_loop        = m_meshGen.loops[m_loopIndex]
-                m_vertexIndex = m_loop.vertex_index
-                m_vertItem = {}
-                # convert to root local space
-                posMat =  mathutils.Matrix.Translation(m_meshGen.vertices[ m_vertexIndex ].co.xyz)
-                posMat =  matrixTransform @ posMat
-                m_pos = posMat.to_translation()
-                if (bakeTransforms): # x z -y
-                    m_pos = ( m_pos[0], m_pos[2], -m_pos[1] )
-                m_vertItem["p"] = "{:g} {:g} {:g}".format(m_pos[0],m_pos[1],m_pos[2])
-                if (normalInVert):
-                    normalMat = mathutils.Matrix.Translation(m_loop.normal)
-
-                    rotMat = matrixTransform.to_euler().to_matrix().to_4x4()
-                    normalMat = rotMat @ normalMat
-                    m_value = normalMat.to_translation()[:]
-                    if (bakeTransforms): # x z -y
-                        m_value = ( m_value[0], m_value[2], -m_value[1] )
-                    m_vertItem["n"] = "{:g} {:g} {:g}".format(m_value[0],m_value[1],m_value[2])
-                if (colorInVert):
-                    colorSRGB = m_meshGen.color_attributes[m_vtxColorLayerName].data[m_loop.index].color_srgb
-                    m_vertItem["c"] = "{:g} {:g} {:g} {:g}".format(colorSRGB[0], colorSRGB[1], colorSRGB[2], colorSRGB[3])
-                if (uv0InVert):
-                    m_value = m_meshGen.uv_layers[0].data[m_loopIndex].uv
-                    m_vertItem["t0"] = "{:g} {:g}".format(m_value[0],m_value[1])
-                if (uv1InVert):
-                    m_value = m_meshGen.uv_layers[1].data[m_loopIndex].uv
-                    m_vertItem["t1"] = "{:g} {:g}".format(m_value[0],m_value[1])
-                if (uv2InVert):
-                    m_value = m_meshGen.uv_layers[2].data[m_loopIndex].uv
-                    m_vertItem["t2"] = "{:g} {:g}".format(m_value[0],m_value[1])
-                if (uv3InVert):
-                    m_value = m_meshGen.uv_layers[3].data[m_loopIndex].uv
-                    m_vertItem["t3"] = "{:g} {:g}".format(m_value[0],m_value[1])
-
-                if type(specialValue) == float:
-                    m_vertItem["g"] = "{:g}".format(specialValue)
-                elif type(specialValue) == int:
-                    m_vertItem["bi"] = "{:g}".format(specialValue)
-                m_indexData = IndexBufferItem(m_vertItem,m_mat)
-                if ( m_indexData not in m_indexBuffer ):
-                    m_indexBuffer[ m_indexData ] = m_counter
-                    m_counter += 1
-                    m_vertices["data"].append(m_vertItem)
-                m_currentIndexVertex = m_indexBuffer[ m_indexData ]
-                m_strVI  += " {:d}".format(m_currentIndexVertex)
-                if ( 0 == m_numIndices ):
-                    m_firstIndex  = m_currentIndex
-                m_numVerticesSet.add( m_currentIndexVertex )
-                m_currentIndex += 1
-                m_numIndices   += 1
-            m_triItem = {}
-            m_triItem["vi"] = m_strVI.strip()
-            m_triangles["data"].append(m_triItem)
-        m_subsetItem = {}
-        m_subsetItem["firstVertex"] = "{:g}".format(min(m_numVerticesSet))
-        m_subsetItem["numVertices"] = "{:g}".format(len(m_numVerticesSet))
-        m_subsetItem["firstIndex"]  = "{:g}".format(m_firstIndex)
-        m_subsetItem["numIndices"]  = "{:g}".format(m_numIndices)
-        if materialSlotNames[matId] != None:
-            m_subsetItem["materialSlotName"] = materialSlotNames[matId]
-        m_subsets["data"].append(m_subsetItem)
-    m_vertices["count"]  = "{:g}".format(len(m_indexBuffer))
-    m_triangles["count"] = "{:g}".format(m_trainglesCount)
-    m_subsets["count"]   = "{:g}".format(m_subsetsCount)
+    # convert to root local space
+    m_positionArray = transformArray(m_arrays["positions"], matrixTransform).astype(np.float64)
+    m_normalArray = None
+    if (normalInVert):
+        normalMat = matrixTransform.to_3x3().inverted_safe().transposed()
+        m_normalArray = transformArray(m_arrays["normals"], normalMat).astype(np.float64)
+        m_lengths = np.linalg.norm(m_normalArray, axis=1, keepdims=True)
+        np.divide(m_normalArray, m_lengths, out=m_normalArray, where=m_lengths > 0.0)
+        m_normalArray = m_normalArray.astype(np.float32).astype(np.float64)
+    if (bakeTransforms): # x z -y
+        m_positionArray = bakeAxisArray(m_positionArray)
+        if (normalInVert):
+            m_normalArray = bakeAxisArray(m_normalArray)
+    m_tolerances = getWeldTolerances()
+    m_attributes = [(m_positionArray, True, m_tolerances["position"])]
+    if (normalInVert):
+        m_attributes.append((m_normalArray, False, m_tolerances["normal"]))
+    if (colorInVert):
+        m_attributes.append((m_arrays["colors"], False, m_tolerances["color"]))
+    for m_uv in m_arrays["uvs"]:
+        m_attributes.append((m_uv, False, m_tolerances["uv"]))
+
+    m_cornerLoops, m_cornerVertices, m_firstCorners, m_indices, m_subsetTriangles = i3d_weldUtil.weldShapeCorners(
+        materialsList, m_triangleOrder, m_subsetTriangles, m_arrays["triangleLoops"], m_arrays["loopVertices"], m_attributes)
+
+    m_vertexLoops = m_cornerLoops[m_firstCorners]
+    m_buffers = i3d_shapeUtil.ShapeBuffers()
+    m_vertexVertices = m_cornerVertices[m_firstCorners]
+    m_buffers.positions = m_positionArray[m_vertexVertices].astype(np.float32)
+    if (normalInVert):
+        m_buffers.normals = m_normalArray[m_vertexLoops].astype(np.float32)
+    if (colorInVert):
+        m_buffers.colors = m_arrays["colors"][m_vertexLoops]
+    m_buffers.uvs = [m_uv[m_vertexLoops] for m_uv in m_arrays["uvs"]]
+    if type(specialValue) == float:
+        m_buffers.generic = np.full(len(m_firstCorners), specialValue, dtype=np.float32)
+    elif type(specialValue) == int:
+        m_buffers.blendIndices = np.full((len(m_firstCorners), 1), specialValue, dtype=np.int32)
+    m_buffers.indices = m_indices.astype(np.uint32)
+    m_buffers.subsets = i3d_weldUtil.getSubsetRanges(m_indices, m_subsetTriangles)
+    m_buffers.materialSlotNames = list(materialSlotNames)
     shapeData["Materials"] = materialsList
     shapeData["MaterialSlotNames"] = materialSlotNames
     shapeData["Vertices"]  = m_vertices
-    shapeData["Triangles"] = m_triangles
-    shapeData["Subsets"]   = m_subsets
-    if not nodeVisible:
-        ownerObj.hide_set(True)
+    shapeData["Buffers"]   = m_buffers
+    shapeData["MeshVertexCount"] = len(m_positionArray)
+    shapeData["LocalPositions"] = m_arrays["positions"][m_vertexVertices]     # untransformed, for the merged bounding volume
+    if nodeShown:
+        hideNodeAfterExtraction(ownerObj)
 
     return shapeData
 
+def getMemberTransform(shapeNameStr, rootStr, applyTrans, applyRot, applyScale):
+    """
+    Returns the matrix moving a merge member into root space, only with the applied parts of the transformation
+
+    :param shapeNameStr: name of the member object
+    :param rootStr: name of the root object, 'ORIGIN' keeps the member geometry untransformed
+    :returns: mathutils.Matrix 4x4
+    """
+
+    if rootStr == 'ORIGIN':
+        matrixTransform = mathutils.Matrix.Identity(4)
+    else:
+        l2 = bpy.data.objects[shapeNameStr].matrix_world
+        l1 = bpy.data.objects[rootStr].matrix_world
+        matrixTransform = l1.inverted() @ l2
+        translation, rotationQuat, scale = matrixTransform.decompose()
+        if applyTrans:
+            translationMat = mathutils.Matrix.Translation(translation)
+        else:
+            translationMat = mathutils.Matrix.Translation((0.0, 0.0, 0.0))      #identity
+        if applyRot:
+            rotationMat = rotationQuat.to_matrix().to_4x4()
+        else:
+            rotationMat = mathutils.Matrix.Rotation(math.radians(0.0), 4, 'X')  #identity
+        if applyScale:
+            scaleMat = mathutils.Matrix.Diagonal(scale).to_4x4()
+        else:
+            scaleMat = mathutils.Matrix.Scale(1, 4)                             #identity
+        matrixTransform = translationMat @ rotationMat @ scaleMat
+    return matrixTransform
+
 def overrideBV(m_shapeStr,m_nodeData, m_sceneNodeData):
     if "boundingVolume" in m_sceneNodeData:
         target_obj = bpy.data.objects[m_sceneNodeData['fullPathName']]
@@ -747,6 +683,17 @@ def overrideBV(m_shapeStr,m_nodeData, m_sceneNodeData):
         # Calculate the offset of the BV center in the local space of the target object
         bv_center_offset_local = target_obj.matrix_world.inverted() @ bv_world_center
         bv_radius = max(bv_obj.dimensions) / 2
+        if i3d_boundingVolumeUtil.BV_MINIMAL == UIGetAttrString('i3D_exportBoundingVolumeMode'):
+            # minimal sphere of the BV mesh (or its bound box corners) in the local space of the target object
+            if 'MESH' == bv_obj.type:
+                bv_points = np.empty(len(bv_obj.data.vertices) * 3, dtype=np.float32)
+                bv_obj.data.vertices.foreach_get("co", bv_points)
+            else:
+                bv_points = np.array([b[:] for b in bv_obj.bound_box], dtype=np.float32)
+            bv_points = i3d_boundingVolumeUtil.transformPoints(bv_points, target_obj.matrix_world.inverted() @ bv_obj.matrix_world)
+            if len(bv_points):
+                bv_center, bv_radius = i3d_boundingVolumeUtil.getMinimalSphere(bv_points)
+                bv_center_offset_local = mathutils.Vector(bv_center)
         bv_center_coord = f"{bv_center_offset_local.x:g} {bv_center_offset_local.z:g} {-bv_center_offset_local.y:g}"
         m_nodeData["bvCenter"] = bv_center_coord
         m_nodeData["bvRadius"] = f"{bv_radius:g}"
@@ -774,9 +721,7 @@ def getShapeData(m_shapeStr,m_nodeData, m_sceneNodeData):
     meshOwners = getMeshOwners(m_shapeStr)
     m_obj = bpy.data.objects[meshOwners[0]]
 
-    nodeVisible = isNodeVisible(m_obj.name)
-    if not nodeVisible:
-        m_obj.hide_set(False)
+    nodeShown = showNodeForExtraction(m_obj)
     # --- generate exporting mesh
     #original or without modifier and animation applied
     m_meshGen = getMeshFromDepsGraph(m_obj, UIGetAttrString('i3D_exportApplyModifiers'))
@@ -787,41 +732,18 @@ def getShapeData(m_shapeStr,m_nodeData, m_sceneNodeData):
     if "i3D_vertexCompressionRange" in m_sceneNodeData:
         m_nodeData['vertexCompressionRange'] = m_sceneNodeData['i3D_vertexCompressionRange']
     # -------------------------------------------------------------
-    m_materialsList, m_materialSlotNames = getShapeMaterials(m_meshGen.name)
-    m_materials = {}
-    for m_mat in m_materialsList:
-        m_materials[m_mat] = []
-    # -------------------------------------------------------------
     # --- calculate triangles and normals with applied modifiers
     m_meshGen.calc_loop_triangles()
     if version_ctypes_interface < (4, 1):
         m_meshGen.calc_normals_split()
 
-    # -------------------------------------------------------------
-    if (len(m_materialsList) > 1):
-        for m_triangle in m_meshGen.loop_triangles:
-            m_mat = m_meshGen.materials[m_triangle.material_index]
-            if None == m_mat:
-                m_mat = "default"
-            else:
-                m_mat = m_mat.name
-            m_materials[m_mat].append(m_triangle.index)
-    else:
-        for m_triangle in m_meshGen.loop_triangles:
-            m_materials[m_materialsList[0]].append(m_triangle.index)
-
     # -------------------------------------------------------------
     m_vertices  = {}
-    m_triangles = {}
-    m_subsets   = {}
-    m_vertices["data"]  = []
-    m_triangles["data"] = []
-    m_subsets["data"]   = []
     # -------------------------------------------------------------
     if UIGetAttrBool("i3D_exportNormals"):
         m_vertices["normal"] = "true"
     if UIGetAttrBool("i3D_exportColors"):
-        m_vtxColorLayerName = getRenderColorName(m_meshGen.name)
+        m_vtxColorLayerName = getRenderColorName(m_meshGen)
         if (m_vtxColorLayerName):
             m_vertices["color"] = "true"
     if UIGetAttrBool("i3D_exportTexCoords"):
@@ -852,123 +774,66 @@ def getShapeData(m_shapeStr,m_nodeData, m_sceneNodeData):
             m_nodeData.pop("skinBindNodeIds", None)
 
     # -------------------------------------------------------------
-    m_indexBuffer    = {}
-    m_currentIndex   = 0
-    m_firstIndex     = 0
-    m_numVerticesSet = set()
-    m_trainglesCount = 0
-    m_subsetsCount   = 0
-    m_counter        = 0
+    m_uvCount = min(len(m_meshGen.uv_layers), 4) if UIGetAttrBool("i3D_exportTexCoords") else 0
+    m_arrays = getMeshArrays(m_meshGen, m_uvCount, m_vtxColorLayerName if "color" in m_vertices else None,
+                             UIGetAttrBool("i3D_exportBulkExtraction"))
+
+    # -------------------------------------------------------------
+    m_materialsList, m_materialSlotNames, m_triangleOrder, m_subsetTriangles = getMaterialSubsets(m_meshGen, m_arrays["materialIndices"])
 
+    # -------------------------------------------------------------
     bakeTransforms = "BAKE_TRANSFORMS" == UIGetAttrString('i3D_exportAxisOrientations')
     normalInVert = "normal" in m_vertices
     colorInVert = "color" in m_vertices
-    uv0InVert = "uv0" in m_vertices
-    uv1InVert = "uv1" in m_vertices
-    uv2InVert = "uv2" in m_vertices
-    uv3InVert = "uv3" in m_vertices
     blendweightsInVert = "blendweights" in m_vertices
 
-    for matId, m_mat in enumerate(m_materialsList):
-        m_matItem = m_materials[m_mat]
-        m_trainglesCount += len( m_matItem )
-        m_subsetsCount  += 1
-        m_numIndices    = 0
-        m_numVerticesSet.clear()
-        for m_primIndex in m_matItem:
-            m_triangle = m_meshGen.loop_triangles[m_primIndex]
-
-            m_strVI = ''
-            for m_loopIndex in m_triangle.loops:
-                m_loop        = m_meshGen.loops[m_loopIndex]
-                m_vertexIndex = m_loop.vertex_index
-                m_vertItem = {}
-                m_pos      = m_meshGen.vertices[ m_vertexIndex ].co.xyz
-                if (bakeTransforms): # x z -y
-                    m_pos = ( m_pos[0], m_pos[2], -m_pos[1] )
-                m_vertItem["p"] = "{:g} {:g} {:g}".format(m_pos[0],m_pos[1],m_pos[2])
-                if (normalInVert):
-                    m_value = m_loop.normal
-                    if (bakeTransforms): # x z -y
-                        m_value = ( m_value[0], m_value[2], -m_value[1] )
-                    m_vertItem["n"] = "{:g} {:g} {:g}".format(m_value[0],m_value[1],m_value[2])
-                if (colorInVert):
-                    colorSRGB = m_meshGen.color_attributes[m_vtxColorLayerName].data[m_loop.index].color_srgb
-                    m_vertItem["c"] = "{:g} {:g} {:g} {:g}".format(colorSRGB[0], colorSRGB[1], colorSRGB[2], colorSRGB[3])
-                if (uv0InVert):
-                    m_value = m_meshGen.uv_layers[0].data[m_loopIndex].uv
-                    m_vertItem["t0"] = "{:g} {:g}".format(m_value[0],m_value[1])
-                if (uv1InVert):
-                    m_value = m_meshGen.uv_layers[1].data[m_loopIndex].uv
-                    m_vertItem["t1"] = "{:g} {:g}".format(m_value[0],m_value[1])
-                if (uv2InVert):
-                    m_value = m_meshGen.uv_layers[2].data[m_loopIndex].uv
-                    m_vertItem["t2"] = "{:g} {:g}".format(m_value[0],m_value[1])
-                if (uv3InVert):
-                    m_value = m_meshGen.uv_layers[3].data[m_loopIndex].uv
-                    m_vertItem["t3"] = "{:g} {:g}".format(m_value[0],m_value[1])
-                if (blendweightsInVert):
-                    m_vertItem["bw"] = ""
-                    m_vertItem["bi"] = ""
-                    m_boneData = {}
-                    for groups in m_meshGen.vertices[ m_vertexIndex ].groups:
-                        m_boneData[groups.group] = groups.weight
-                    for key in m_boneData:
-                        m_vertItem["bw"] = m_vertItem["bw"] + "{:g} ".format(m_boneData[key])
-                        m_vertItem["bi"] = m_vertItem["bi"] + "{:g} ".format(key)
-                    for i in range(0,4-len(m_boneData)):
-                        m_vertItem["bw"] = m_vertItem["bw"] + "{:g} ".format(0)
-                        m_vertItem["bi"] = m_vertItem["bi"] + "{:g} ".format(0)
-                    m_vertItem["bw"] = m_vertItem["bw"].strip()
-                    m_vertItem["bi"] = m_vertItem["bi"].strip()
-
-                m_indexData = IndexBufferItem(m_vertItem,m_mat)
-                if ( m_indexData not in m_indexBuffer ):
-                    m_indexBuffer[ m_indexData ] = m_counter
-                    m_counter += 1
-                    m_vertices["data"].append(m_vertItem)
-                m_currentIndexVertex = m_indexBuffer[ m_indexData ]
-                m_strVI  += " {:d}".format(m_currentIndexVertex)
-                if ( 0 == m_numIndices ):
-                    m_firstIndex  = m_currentIndex
-                m_numVerticesSet.add( m_currentIndexVertex )
-                m_currentIndex += 1
-                m_numIndices   += 1
-            m_triItem = {}
-            m_triItem["vi"] = m_strVI.strip()
-            m_triangles["data"].append(m_triItem)
-        m_subsetItem = {}
-        m_subsetItem["firstVertex"] = "{:g}".format(min(m_numVerticesSet))
-        m_subsetItem["numVertices"] = "{:g}".format(len(m_numVerticesSet))
-        m_subsetItem["firstIndex"]  = "{:g}".format(m_firstIndex)
-        m_subsetItem["numIndices"]  = "{:g}".format(m_numIndices)
-        if m_materialSlotNames[matId] != None:
-            m_subsetItem["materialSlotName"] = m_materialSlotNames[matId]
-        m_subsetItem.update(i3d_densityUtil.computeUvDensity(m_triangles["data"],m_vertices,m_firstIndex,m_numIndices))
-        m_subsets["data"].append(m_subsetItem)
-
-    m_vertices["count"]  = "{:g}".format(len(m_indexBuffer))
-    m_triangles["count"] = "{:g}".format(m_trainglesCount)
-    m_subsets["count"]   = "{:g}".format(m_subsetsCount)
+    m_positionArray = m_arrays["positions"]
+    m_normalArray   = m_arrays["normals"]
+    if (bakeTransforms): # x z -y
+        m_positionArray = bakeAxisArray(m_positionArray)
+        m_normalArray   = bakeAxisArray(m_normalArray)
+    m_skinWeights, m_skinIndices = None, None
+    if (blendweightsInVert):
+        m_skinWeights, m_skinIndices = getSkinWeightArrays(m_meshGen, boneMap)
+
+    # welding, subsets and uv density are done by i3d_shapeProcessUtil.processShapeData, without bpy access
+    m_nodeData["Raw"] = {"materials"         : m_materialsList,
+                         "materialSlotNames" : m_materialSlotNames,
+                         "triangleOrder"     : m_triangleOrder,
+                         "subsetTriangles"   : m_subsetTriangles,
+                         "triangleLoops"     : m_arrays["triangleLoops"],
+                         "loopVertices"      : m_arrays["loopVertices"],
+                         "positions"         : m_positionArray,
+                         "normals"           : m_normalArray if normalInVert else None,
+                         "colors"            : m_arrays["colors"] if colorInVert else None,
+                         "uvs"               : m_arrays["uvs"],
+                         "skinWeights"       : m_skinWeights,
+                         "skinIndices"       : m_skinIndices,
+                         "weldTolerances"    : getWeldTolerances(),
+                         "cleanTriangles"    : UIGetAttrBool("i3D_exportRemoveDegenerateTriangles"),
+                         "textPrecision"     : getTextPrecision(),
+                         "vertexCacheSize"   : UIGetAttrInt("i3D_exportVertexCacheSize"),
+                         "chunkTriangles"    : UIGetAttrInt("i3D_exportChunkTriangles"),
+                         "memoryBudget"      : UIGetAttrInt("i3D_exportMemoryBudget") * 1024 * 1024}
+
     m_nodeData["Materials"] = m_materialsList
     m_nodeData["Vertices"]  = m_vertices
-    m_nodeData["Triangles"] = m_triangles
-    m_nodeData["Subsets"]   = m_subsets
-    if not nodeVisible:
-        m_obj.hide_set(True)
+    m_nodeData["MeshVertexCount"] = len(m_positionArray)
+    m_nodeData["CountVertexCacheMisses"] = UIGetAttrBool("i3D_exportVerbose")     # not in "Raw", the shape cache key stays the same
+    if nodeShown:
+        hideNodeAfterExtraction(m_obj)
 
     return m_nodeData
 
-def getRenderColorName(shapeStr):
+def getRenderColorName(m_mesh):
     """
     Returns name of the Color Attributes set to be rendered
 
-    :param shapeStr: string name from bpy.data.meshes
+    :param m_mesh: the mesh, evaluated meshes are not in bpy.data.meshes
 
     """
     m_name = None
     try:
-        m_mesh = bpy.data.meshes[shapeStr]
         m_colorLayerNames = m_mesh.color_attributes.keys()
         if (len(m_colorLayerNames)>0):
             m_index = m_mesh.color_attributes.render_color_index
@@ -978,30 +843,397 @@ def getRenderColorName(shapeStr):
         UIShowWarning("Blender version is lower than 3.2, vertex colors is not exported!")
     return m_name
 
+class EvaluatedMeshPool( object ):
+    """
+    Temporary meshes of one export, every mesh it creates is freed again by release()
+
+    Meshes come from Object.to_mesh() (freed with to_mesh_clear()), objects to_mesh() cannot convert fall back to
+    bpy.data.meshes.new_from_object() (removed from bpy.data.meshes). Above maxBytes the least recently used
+    meshes are freed early, they are evaluated again if needed.
+    """
+
+    def __init__(self, maxBytes = 1024 * 1024 * 1024):
+        self.maxBytes = maxBytes
+        self._entries = {}          # object name -> (mesh, owner object for to_mesh_clear() or None, size)
+        self._bytes = 0
+        self._meshCount = len(bpy.data.meshes)
+        self.created = 0
+        self.fallbacks = 0
+        self.reused = 0
+        self.evicted = 0
+        self.peakBytes = 0
+        self.failed = 0
+        self.leaked = 0
+
+    def get(self, obj, mod = False):
+        """ Returns the mesh of obj, with animation and modifiers applied if mod, None if obj is not in the depsgraph """
+
+        if obj.name in self._entries:
+            self._entries[obj.name] = self._entries.pop(obj.name)      # most recently used last
+            self.reused += 1
+            return self._entries[obj.name][0]
+
+        depsgraph = bpy.context.evaluated_depsgraph_get()       #2.8 changes
+        m_originalObj = getDepsgraphObject(depsgraph, obj.name)
+        if m_originalObj is None:
+            return None
+        if(mod):
+            object_eval = m_originalObj.evaluated_get(depsgraph)
+        else:
+            object_eval = m_originalObj           #original, without modifier and animation applied
+        try:
+            m_meshGen = object_eval.to_mesh(preserve_all_data_layers=True, depsgraph=depsgraph)
+            m_owner = object_eval
+        except RuntimeError:
+            m_meshGen = bpy.data.meshes.new_from_object(object_eval,preserve_all_data_layers=True,depsgraph=depsgraph)
+            m_owner = None
+            self.fallbacks += 1
+        self.created += 1
+
+        m_size = getMeshSize(m_meshGen)
+        self._entries[obj.name] = (m_meshGen, m_owner, m_size)
+        self._bytes += m_size
+        self.peakBytes = max(self.peakBytes, self._bytes)
+        while self._bytes > self.maxBytes and len(self._entries) > 1:
+            self._free(next(iter(self._entries)))
+            self.evicted += 1
+        return m_meshGen
+
+    def invalidate(self):
+        """ Frees the to_mesh() meshes, the next depsgraph evaluation (e.g. after hide_set) may free them anyway """
+
+        for m_name in [m_name for m_name, m_entry in self._entries.items() if m_entry[1] is not None]:
+            self._free(m_name)
+
+    def release(self):
+        """ Frees all meshes and returns the statistics text, meshes left in bpy.data.meshes are reported as leaked """
+
+        for m_name in list(self._entries):
+            self._free(m_name)
+        self.leaked = max(len(bpy.data.meshes) - self._meshCount, 0)
+        m_text = "mesh pool: {:d} meshes evaluated ({:d} new_from_object), {:d} reused, {:d} evicted, peak {:.1f} MB".format(
+            self.created, self.fallbacks, self.reused, self.evicted, self.peakBytes / (1024.0 * 1024.0))
+        if self.failed > 0 or self.leaked > 0:
+            m_text += ", {:d} not freed, {:d} meshes more than before the export".format(self.failed, self.leaked)
+        return m_text
+
+    def _free(self, m_name):
+        m_meshGen, m_owner, m_size = self._entries.pop(m_name)
+        self._bytes -= m_size
+        try:
+            if m_owner is not None:
+                m_owner.to_mesh_clear()
+            else:
+                bpy.data.meshes.remove(m_meshGen)
+        except (RuntimeError, ReferenceError):
+            self.failed += 1
+
+def getMeshSize(m_mesh):
+    """ Returns the approximate memory size of a mesh in bytes (positions per vertex, normals, uvs, colors per loop) """
+
+    return 48 * len(m_mesh.vertices) + 64 * len(m_mesh.loops) + 32 * len(m_mesh.polygons)
+
+def getDepsgraphObject(depsgraph, objStr):
+    """ Returns the original object of the depsgraph instance named objStr, None if there is none """
+
+    if i3d_globals.g_exportIndex is not None:
+        return i3d_globals.g_exportIndex.getInstanceObject(depsgraph, objStr)
+    for object_instance in depsgraph.object_instances:
+        if (object_instance.object.name == objStr):            #operate on right object
+            return object_instance.object.original
+    return None
+
+class ExportIndex( object ):
+    """
+    Lookups of one export, built once instead of scanning all objects for every shape
+
+    mesh name -> names of the objects using the mesh, object name -> original object of its depsgraph instance.
+    Instances are only valid until the depsgraph is evaluated again, so originals are kept and the instance
+    index is built again if an object is missing after a visibility change.
+    The viewport visibility of all objects is taken once, before the export shows hidden objects for the extraction.
+    """
+
+    def __init__(self):
+        self._meshOwners = None
+        self._instances = None
+        self._instancesStale = False
+        self._visibility = None
+        self._shownObjects = []
+
+    def getMeshOwners(self, meshStr):
+        """ Returns a list of bpy.data.objects.name who have bpy.data.objects.data.name == meshStr """
+
+        if self._meshOwners is None:
+            self._meshOwners = {}
+            for m_obj in bpy.data.objects:
+                if 'MESH' == m_obj.type:
+                    self._meshOwners.setdefault(m_obj.data.name, []).append(m_obj.name)
+        return list(self._meshOwners.get(meshStr, []))
+
+    def getInstanceObject(self, depsgraph, objStr):
+        """ Returns the original object of the first depsgraph instance named objStr, None if there is none """
+
+        if self._instances is None or (self._instancesStale and objStr not in self._instances):
+            self._instances = {}
+            for object_instance in depsgraph.object_instances:
+                self._instances.setdefault(object_instance.object.name, object_instance.object.original)
+            self._instancesStale = False
+        return self._instances.get(objStr)
+
+    def invalidate(self):
+        """ Marks the instance index as outdated, e.g. after hide_set made more objects visible """
+
+        self._instancesStale = True
+
+    def isVisible(self, objStr):
+        """ Returns the viewport visibility of the object at the first call, before any object was shown """
+
+        if self._visibility is None:
+            self._visibility = {m_obj.name: m_obj.visible_in_viewport_get(bpy.context.space_data) for m_obj in bpy.data.objects}
+        if objStr not in self._visibility:
+            self._visibility[objStr] = bpy.data.objects[objStr].visible_in_viewport_get(bpy.context.space_data)
+        return self._visibility[objStr]
+
+    def isShown(self, objStr):
+        """ Returns True if showHiddenObjects made the object visible """
+
+        return objStr in self._shownObjects
+
+    def showHiddenObjects(self, objStrs):
+        """
+        Shows the hidden mesh objects and the first owners of their meshes (which are extracted instead) together,
+        so the depsgraph is evaluated once for all of them. Returns True if any object was shown.
+        """
+
+        m_shown = set(self._shownObjects)
+        m_shownCount = len(m_shown)
+        for objStr in objStrs:
+            m_obj = bpy.data.objects.get(objStr)
+            if m_obj is None or 'MESH' != m_obj.type:
+                continue
+            for m_name in [objStr] + self.getMeshOwners(m_obj.data.name)[:1]:
+                if m_name not in m_shown and not self.isVisible(m_name):
+                    bpy.data.objects[m_name].hide_set(False)
+                    self._shownObjects.append(m_name)
+                    m_shown.add(m_name)
+        return len(m_shown) > m_shownCount
+
+    def restoreHiddenObjects(self):
+        """ Hides the objects shown by showHiddenObjects again, returns True if any object was hidden """
+
+        for m_name in self._shownObjects:
+            bpy.data.objects[m_name].hide_set(True)
+        m_restored = len(self._shownObjects) > 0
+        self._shownObjects = []
+        return m_restored
+
+def invalidateDepsgraphData():
+    """ Frees the to_mesh() meshes of the pool and outdates the instance index, call it after changes which evaluate the depsgraph again """
+
+    if i3d_globals.g_meshPool is not None:
+        i3d_globals.g_meshPool.invalidate()
+    if i3d_globals.g_exportIndex is not None:
+        i3d_globals.g_exportIndex.invalidate()
+
+def showHiddenObjects(objStrs):
+    """ Shows the hidden mesh objects of the export at once for the extraction, restoreHiddenObjects hides them again """
+
+    if i3d_globals.g_exportIndex is not None and i3d_globals.g_exportIndex.showHiddenObjects(objStrs):
+        invalidateDepsgraphData()
+
+def restoreHiddenObjects():
+    """ Hides the objects shown by showHiddenObjects again """
+
+    if i3d_globals.g_exportIndex is not None and i3d_globals.g_exportIndex.restoreHiddenObjects():
+        invalidateDepsgraphData()
+
+def showNodeForExtraction(m_obj):
+    """ Shows a hidden object which was not shown by showHiddenObjects, returns True if hideNodeAfterExtraction has to hide it again """
+
+    if i3d_globals.g_exportIndex is not None and i3d_globals.g_exportIndex.isShown(m_obj.name):
+        return False
+    if isNodeVisible(m_obj.name):
+        return False
+    m_obj.hide_set(False)
+    invalidateDepsgraphData()     # the visibility change evaluates the depsgraph again
+    return True
+
+def hideNodeAfterExtraction(m_obj):
+    """ Hides an object shown by showNodeForExtraction again """
+
+    m_obj.hide_set(True)
+    invalidateDepsgraphData()
+
 def getMeshFromDepsGraph(obj, mod = False):
     """
-    Returns the Mesh from the depsgraph.
+    Returns the Mesh from the depsgraph, it is valid until the export releases i3d_globals.g_meshPool
 
     If mod is false it returns the original object, otherwise the mesh with animation and modifiers applied
     """
 
-    m_meshGen = None
-    depsgraph = bpy.context.evaluated_depsgraph_get()       #2.8 changes
-    if obj.name not in i3d_globals.g_meshCache:
-        for object_instance in depsgraph.object_instances:
-            # print("object_instance.object.name: " +object_instance.object.name +" obj.name: " + obj.name)
-            if (object_instance.object.name == obj.name):            #operate on right object
-                if(mod):
-                    object_eval = object_instance.object.evaluated_get(depsgraph)
-                else:
-                    object_eval = object_instance.object.original           #original, without modifier and animation applied
-                m_meshGen = bpy.data.meshes.new_from_object(object_eval,preserve_all_data_layers=True,depsgraph=depsgraph)
-                i3d_globals.g_meshCache[obj.name] = m_meshGen
-                return m_meshGen
-        return None
-    else:
-        m_meshGen = i3d_globals.g_meshCache[obj.name]
-    return m_meshGen
+    if i3d_globals.g_meshPool is None:
+        i3d_globals.g_meshPool = EvaluatedMeshPool()
+    return i3d_globals.g_meshPool.get(obj, mod)
+
+def getMeshArrays(m_meshGen, m_uvCount = 0, m_colorLayerName = None, m_bulk = True):
+    """
+    Returns the mesh attributes needed for the shape export as contiguous numpy arrays
+
+    The mesh needs valid loop_triangles (and split normals for Blender < 4.1).
+    With m_bulk the arrays are filled with foreach_get in a few calls, otherwise (or if foreach_get fails)
+    every loop is read one by one. Both ways give the same values.
+
+    :param m_meshGen: the evaluated mesh
+    :param m_uvCount: number of uv layers to read
+    :param m_colorLayerName: name of the color attribute to read, None to skip colors
+    :param m_bulk: use foreach_get
+    :returns: dictionary with positions (V,3), loopVertices (L), normals (L,3), triangleLoops (T,3),
+              materialIndices (T), uvs list of (L,2) and colors (C,4) or None
+    """
+
+    if m_bulk:
+        try:
+            return getMeshArraysBulk(m_meshGen, m_uvCount, m_colorLayerName)
+        except (AttributeError, TypeError, RuntimeError, ValueError) as exception:
+            UIShowWarning("Bulk extraction failed for {}, reading loops one by one: {}".format(m_meshGen.name, exception))
+    return getMeshArraysPerLoop(m_meshGen, m_uvCount, m_colorLayerName)
+
+def getMeshArraysBulk(m_meshGen, m_uvCount, m_colorLayerName):
+    """ getMeshArrays using foreach_get """
+
+    m_numVertices  = len(m_meshGen.vertices)
+    m_numLoops     = len(m_meshGen.loops)
+    m_numTriangles = len(m_meshGen.loop_triangles)
+    m_arrays = {}
+    m_arrays["positions"] = np.empty(m_numVertices * 3, dtype=np.float32)
+    m_meshGen.vertices.foreach_get("co", m_arrays["positions"])
+    m_arrays["loopVertices"] = np.empty(m_numLoops, dtype=np.int32)
+    m_meshGen.loops.foreach_get("vertex_index", m_arrays["loopVertices"])
+    m_arrays["normals"] = np.empty(m_numLoops * 3, dtype=np.float32)
+    m_meshGen.loops.foreach_get("normal", m_arrays["normals"])
+    m_arrays["triangleLoops"] = np.empty(m_numTriangles * 3, dtype=np.int32)
+    m_meshGen.loop_triangles.foreach_get("loops", m_arrays["triangleLoops"])
+    m_arrays["materialIndices"] = np.empty(m_numTriangles, dtype=np.int32)
+    m_meshGen.loop_triangles.foreach_get("material_index", m_arrays["materialIndices"])
+    m_arrays["uvs"] = []
+    for m_i in range(m_uvCount):
+        m_uv = np.empty(m_numLoops * 2, dtype=np.float32)
+        m_meshGen.uv_layers[m_i].data.foreach_get("uv", m_uv)
+        m_arrays["uvs"].append(m_uv.reshape(-1, 2))
+    m_arrays["colors"] = None
+    if m_colorLayerName:
+        m_colorData = m_meshGen.color_attributes[m_colorLayerName].data
+        m_colors = np.empty(len(m_colorData) * 4, dtype=np.float32)
+        m_colorData.foreach_get("color_srgb", m_colors)
+        m_arrays["colors"] = m_colors.reshape(-1, 4)
+    m_arrays["positions"] = m_arrays["positions"].reshape(-1, 3)
+    m_arrays["normals"] = m_arrays["normals"].reshape(-1, 3)
+    m_arrays["triangleLoops"] = m_arrays["triangleLoops"].reshape(-1, 3)
+    return m_arrays
+
+def getMeshArraysPerLoop(m_meshGen, m_uvCount, m_colorLayerName):
+    """ getMeshArrays reading every element with a single RNA access """
+
+    m_arrays = {}
+    m_arrays["positions"] = np.array([m_v.co[:] for m_v in m_meshGen.vertices], dtype=np.float32).reshape(-1, 3)
+    m_arrays["loopVertices"] = np.array([m_loop.vertex_index for m_loop in m_meshGen.loops], dtype=np.int32)
+    m_arrays["normals"] = np.array([m_loop.normal[:] for m_loop in m_meshGen.loops], dtype=np.float32).reshape(-1, 3)
+    m_arrays["triangleLoops"] = np.array([m_tri.loops[:] for m_tri in m_meshGen.loop_triangles], dtype=np.int32).reshape(-1, 3)
+    m_arrays["materialIndices"] = np.array([m_tri.material_index for m_tri in m_meshGen.loop_triangles], dtype=np.int32)
+    m_arrays["uvs"] = []
+    for m_i in range(m_uvCount):
+        m_uvData = m_meshGen.uv_layers[m_i].data
+        m_arrays["uvs"].append(np.array([m_item.uv[:] for m_item in m_uvData], dtype=np.float32).reshape(-1, 2))
+    m_arrays["colors"] = None
+    if m_colorLayerName:
+        m_colorData = m_meshGen.color_attributes[m_colorLayerName].data
+        m_arrays["colors"] = np.array([m_item.color_srgb[:] for m_item in m_colorData], dtype=np.float32).reshape(-1, 4)
+    return m_arrays
+
+def bakeAxisArray(m_array):
+    """ Returns a float64 copy of the (N,3) array with the axes baked: x z -y """
+
+    m_baked = np.array(m_array, dtype=np.float64).reshape(-1, 3)[:, (0, 2, 1)]
+    np.negative(m_baked[:, 2], out=m_baked[:, 2])
+    return m_baked
+
+def transformArray(m_array, m_matrix):
+    """
+    Returns the (N,3) rows transformed by a 3x3 or 4x4 matrix as float32
+
+    Products are rounded to float32 and summed in double like mathutils does, so every row
+    gets exactly the value of m_matrix @ mathutils.Matrix.Translation(row).
+    """
+
+    m_matrix = np.array(m_matrix, dtype=np.float32)
+    m_array = np.asarray(m_array, dtype=np.float32).reshape(-1, 3)
+    m_result = np.zeros((len(m_array), 3), dtype=np.float64)
+    for m_k in range(3):
+        m_result += m_array[:, m_k:m_k + 1] * m_matrix[:3, m_k]
+    if len(m_matrix) == 4:
+        m_result += m_matrix[:3, 3]
+    return m_result.astype(np.float32)
+
+def getSkinWeightArrays(m_meshGen, m_boneMap, m_maxInfluences = 4):
+    """
+    Returns the packed skin weights and bone indices of every vertex
+
+    The vertex group memberships are read once, groups without a bone are dropped and the m_maxInfluences
+    heaviest bones of every vertex are kept (ties keep the group order), in group order and renormalized to a sum of 1.
+    Bone indices are the positions of the groups in m_boneMap, the same order as skinBindNodeIds.
+
+    :param m_boneMap: dictionary vertex group index -> bone node id
+    :returns: (weights, indices) (V,m_maxInfluences) float32 and int32 arrays padded with zeros
+    """
+
+    m_vertexCount = len(m_meshGen.vertices)
+    m_weights = np.zeros((m_vertexCount, m_maxInfluences), dtype=np.float32)
+    m_indices = np.zeros((m_vertexCount, m_maxInfluences), dtype=np.int32)
+    if not m_boneMap:
+        return m_weights, m_indices
+    # the rna api has no bulk read of the memberships (MeshVertex.groups is a collection per vertex), one pass over the vertices
+    m_vertexGroups = [m_vertex.groups for m_vertex in m_meshGen.vertices]
+    m_groupCounts = np.fromiter(map(len, m_vertexGroups), dtype=np.int64, count=m_vertexCount)
+    m_memberships = np.fromiter((m_value for m_groups in m_vertexGroups for m_element in m_groups for m_value in (m_element.group, m_element.weight)),
+                                dtype=np.float64, count=2 * int(m_groupCounts.sum())).reshape(-1, 2)
+    if not len(m_memberships):
+        return m_weights, m_indices
+
+    m_groups = m_memberships[:, 0].astype(np.int64)
+    m_boneSlots = np.full(max(max(m_boneMap), int(m_groups.max())) + 1, -1, dtype=np.int64)
+    m_boneSlots[np.array(list(m_boneMap), dtype=np.int64)] = np.arange(len(m_boneMap))
+    m_vertexIds = np.repeat(np.arange(m_vertexCount), m_groupCounts)
+    m_bones = m_boneSlots[m_groups]
+    m_keep = m_bones >= 0
+    m_vertexIds, m_bones, m_boneWeights = m_vertexIds[m_keep], m_bones[m_keep], m_memberships[m_keep, 1]
+    m_order = np.arange(len(m_bones))
+
+    # rank the influences of every vertex by weight, then restore the group order of the kept ones
+    m_byWeight = np.lexsort((m_order, -m_boneWeights, m_vertexIds))
+    m_starts = np.searchsorted(m_vertexIds[m_byWeight], m_vertexIds[m_byWeight], side='left')
+    m_selected = np.sort(m_byWeight[(np.arange(len(m_byWeight)) - m_starts) < m_maxInfluences])
+    m_vertexIds, m_bones, m_boneWeights = m_vertexIds[m_selected], m_bones[m_selected], m_boneWeights[m_selected]
+    m_columns = np.arange(len(m_vertexIds)) - np.searchsorted(m_vertexIds, m_vertexIds, side='left')
+
+    m_packedWeights = np.zeros((m_vertexCount, m_maxInfluences), dtype=np.float64)
+    m_packedWeights[m_vertexIds, m_columns] = m_boneWeights
+    m_sums = m_packedWeights.sum(axis=1, keepdims=True)
+    np.divide(m_packedWeights, m_sums, out=m_packedWeights, where=m_sums > 0.0)
+    m_weights[:] = m_packedWeights
+    m_indices[m_vertexIds, m_columns] = m_bones
+    return m_weights, m_indices
+
+def getRangeStarts(m_counts):
+    """ Returns the start of every range if ranges of the given lengths are put one after the other """
+
+    m_counts = np.asarray(m_counts, dtype=np.int64)
+    return np.cumsum(m_counts) - m_counts
+
+def getRangeRows(m_starts, m_counts):
+    """ Returns the rows of all ranges (start, count) one after the other as one int64 array """
+
+    m_counts = np.asarray(m_counts, dtype=np.int64)
+    return np.repeat(np.asarray(m_starts, dtype=np.int64) - getRangeStarts(m_counts), m_counts) + np.arange(m_counts.sum())
 
 def getMeshUsage(isCpuMesh):
     if(isCpuMesh):
@@ -1012,6 +1244,8 @@ def getMeshUsage(isCpuMesh):
 def getMeshOwners(m_shapeStr):
     """ Returns a list of bpy.data.objects.name who have bpy.data.objects.data.name == m_shapeStr. """
 
+    if i3d_globals.g_exportIndex is not None:
+        return i3d_globals.g_exportIndex.getMeshOwners(m_shapeStr)
     m_meshOwners = []
     for m_obj in bpy.data.objects:
         if 'MESH' == m_obj.type:
@@ -1024,23 +1258,15 @@ def getBvCenterRadius(objStr):
     """ returns bvCenter and bvRadius of the mesh of a given object objStr is the name of an object with a mesh attached """
 
     m_mesh      = bpy.data.meshes[bpy.data.objects[objStr].data.name]
-    m_vSum      = mathutils.Vector( (0,0,0) )
-    m_bvRadius  = mathutils.Vector( (0,0,0) )
-    m_vCount    = 0
     bVObjMat = bpy.data.objects[objStr].matrix_world
     if ( "BAKE_TRANSFORMS"  == UIGetAttrString('i3D_exportAxisOrientations')): #meshTransformation
         bVObjMat = bakeTransformMatrix(bVObjMat)
 
-    for m_v in m_mesh.vertices:
-        vertexWorld = bVObjMat @ m_v.co
-        m_vSum += vertexWorld
-        m_vCount    += 1
-    m_bvCenter = m_vSum / m_vCount
-    for m_v in m_mesh.vertices:
-        vertexWorld = bVObjMat @ m_v.co
-        m_vect      = m_bvCenter - vertexWorld
-        m_bvRadius  = max( m_vect.length, m_bvRadius )
-    return m_bvCenter, m_bvRadius
+    m_positions = np.empty(len(m_mesh.vertices) * 3, dtype=np.float32)
+    m_mesh.vertices.foreach_get("co", m_positions)
+    m_positions = i3d_boundingVolumeUtil.transformPoints(m_positions, bVObjMat)
+    m_bvCenter, m_bvRadius = i3d_boundingVolumeUtil.getBoundingSphere(m_positions, UIGetAttrString('i3D_exportBoundingVolumeMode'))
+    return mathutils.Vector(m_bvCenter), m_bvRadius
 
 def getNurbsCurveData(m_shapeStr,m_nodeData):
     m_curve = bpy.data.curves[m_shapeStr]
@@ -1067,38 +1293,88 @@ def getNurbsCurveData(m_shapeStr,m_nodeData):
 def getShapeMaterials(shapeStr):
     """ Returns a list of all material names related to the mesh object """
 
-    materialIndexes = []
-    m_materials = []
-    m_materialSlotNames = []
     try:
         mesh = bpy.data.meshes[shapeStr]
-        for triangle in mesh.loop_triangles:
-            if ( triangle.material_index  not in materialIndexes ):
-                materialIndexes.append( triangle.material_index )
-        for matIndex in  materialIndexes:
-            if mesh.materials:
-                m_mat = mesh.materials[matIndex]
-                if m_mat:
-                    m_materials.append(m_mat.name)
-                    if "materialSlotName" in m_mat:
-                        m_materialSlotNames.append(m_mat["materialSlotName"])
-                    else:
-                        m_materialSlotNames.append(None)
-                else:
-                    if "default" not in m_materials:
-                        m_materials.append("default")
-                        m_materialSlotNames.append(None)
-            else:
-                if "default" not in m_materials:
-                    m_materials.append("default")
-                    m_materialSlotNames.append(None)
+        m_materialIndices = np.empty(len(mesh.loop_triangles), dtype=np.int32)
+        mesh.loop_triangles.foreach_get("material_index", m_materialIndices)
+        m_materials, m_materialSlotNames, m_triangleOrder, m_subsetTriangles = getMaterialSubsets(mesh, m_materialIndices)
     except:
         # print(shapeStr + " is no mesh")
-        if "default" not in m_materials:
-            m_materials.append("default")
-            m_materialSlotNames.append(None)
+        m_materials = ["default"]
+        m_materialSlotNames = [None]
     return m_materials, m_materialSlotNames
 
+def getWeldTolerances():
+    """ Returns the weld tolerance of every vertex attribute from the export settings, 0 compares the exported text """
+
+    return {"position" : UIGetAttrFloat("i3D_exportWeldTolerance"),
+            "normal"   : i3d_weldUtil.getAngleTolerance(UIGetAttrFloat("i3D_exportWeldNormalAngle")),
+            "uv"       : UIGetAttrFloat("i3D_exportWeldUvTolerance"),
+            "color"    : UIGetAttrFloat("i3D_exportWeldColorTolerance")}
+
+def getTextPrecision():
+    """ Returns the significant digits of every vertex attribute from the export settings, see i3d_shapeUtil.getPrecisionValues """
+
+    return {"position"          : UIGetAttrInt("i3D_exportPositionDigits"),
+            "relativePositions" : UIGetAttrBool("i3D_exportPositionDigitsRelative"),
+            "normal"            : UIGetAttrInt("i3D_exportNormalDigits"),
+            "uv"                : UIGetAttrInt("i3D_exportUvDigits"),
+            "color"             : UIGetAttrInt("i3D_exportColorDigits"),
+            "snapWeights"       : UIGetAttrBool("i3D_exportSnapBlendWeights")}
+
+def getMaterialSubsets(mesh, m_materialIndices):
+    """
+    Returns the materials of the mesh and its triangles bucketed by material in one stable sort
+
+    Materials are ordered by the first triangle using them, slots without a material share one "default" material.
+    A material used by several slots is listed once per slot and every of its subsets gets all of its triangles.
+    With a single material all triangles belong to it.
+
+    :param mesh: mesh with the material slots
+    :param m_materialIndices: (T) material_index of the loop triangles
+    :returns: (materials, materialSlotNames, triangleOrder, subsetTriangles) triangleOrder holds the triangle indices
+              subset after subset, subsetTriangles the number of triangles of every subset
+    """
+
+    m_materialIndices = np.asarray(m_materialIndices, dtype=np.int64).ravel()
+    m_slots, m_firstUse, m_slotOfTriangle = np.unique(m_materialIndices, return_index=True, return_inverse=True)
+    m_materials = []
+    m_materialSlotNames = []
+    m_slotMaterials = [None] * len(m_slots)
+    for m_slotIndex in np.argsort(m_firstUse, kind='stable').tolist():
+        m_matIndex = int(m_slots[m_slotIndex])
+        m_mat = mesh.materials[m_matIndex] if m_matIndex < len(mesh.materials) else None
+        if m_mat:
+            m_slotMaterials[m_slotIndex] = m_mat.name
+            m_materials.append(m_mat.name)
+            if "materialSlotName" in m_mat:
+                m_materialSlotNames.append(m_mat["materialSlotName"])
+            else:
+                m_materialSlotNames.append(None)
+        else:
+            m_slotMaterials[m_slotIndex] = "default"
+            if "default" not in m_materials:
+                m_materials.append("default")
+                m_materialSlotNames.append(None)
+
+    # bucket id of a triangle is the first list entry of its material
+    if len(m_materials) > 1:
+        m_slotBuckets = np.array([m_materials.index(m_name) for m_name in m_slotMaterials], dtype=np.int64)
+        m_buckets = m_slotBuckets[np.ravel(m_slotOfTriangle)]
+    else:
+        m_buckets = np.zeros(len(m_materialIndices), dtype=np.int64)
+    m_sorted = np.argsort(m_buckets, kind='stable')
+    m_bucketSizes = np.bincount(m_buckets, minlength=len(m_materials))
+    m_bucketStarts = np.concatenate(([0], np.cumsum(m_bucketSizes)[:-1])).astype(np.int64)
+    m_entryBuckets = [m_materials.index(m_name) for m_name in m_materials]
+    m_subsetTriangles = [int(m_bucketSizes[m_bucket]) for m_bucket in m_entryBuckets]
+    if m_entryBuckets == list(range(len(m_materials))):
+        m_triangleOrder = m_sorted
+    else:
+        m_triangleOrder = np.concatenate([m_sorted[m_bucketStarts[m_bucket]:m_bucketStarts[m_bucket] + m_bucketSizes[m_bucket]]
+                                          for m_bucket in m_entryBuckets])
+    return m_materials, m_materialSlotNames, m_triangleOrder, m_subsetTriangles
+
 def getMaterialFiles(materialStr):
     """ Returns a dictionary with a filepath assigned to a material """
 
@@ -1556,44 +1832,59 @@ def getDataMatrixFormKeyframes(timestamp, groupStr, actionStr): #T = Location@Ro
 def formatKeyframePointData(timestamp,data):
     """ Return dictionary with formatted strings of the data """
 
+    return formatKeyframePointsData([(timestamp,data)])[0]
+
+def formatKeyframePointsData(keyframePoints):
+    """ Return a dictionary with formatted strings for every (timestamp, data) of a keyframe, the vectors are formatted together """
+
     # interpolationMap = { "BEZIER": "bezier", "LINEAR": "linear"} #correct mapping GE-Blender
-    formatData = {}
-    formatData['time'] = timestamp * getFps()
-    if "matrixData" in data:
-        matrix = data["matrixData"]
-        translation   = matrix.to_translation()[:]
-        rotation      = matrix.to_euler( "XYZ" )
-        rotation      = ( math.degrees( rotation.x ),
-                            math.degrees( rotation.y ),
-                            math.degrees( rotation.z ) )
-        scale = matrix.to_scale()[:]
-        if "interpolationData" in data:     #is always exported "linear"
-            interpolation = data["interpolationData"]
-            if("location" in interpolation):
-                formatData['translation']  = "%g %g %g" %( translation )
-                formatData['iptin'] = "linear"
-                formatData['iptout'] = "linear"
-                # formatData['iptin'] = interpolation["location"]
-                # formatData['iptout'] = interpolation["location"]
-            if("rotation_quaternion" in interpolation):
-                formatData['rotation'] = "%g %g %g" %( rotation  )
-                formatData['iprin'] = "linear"
-                formatData['iprout'] = "linear"
-                # formatData['iprin'] = interpolation["rotation_quaternion"]
-                # formatData['iprout'] = interpolation["rotation_quaternion"]
-            elif("rotation_euler" in interpolation):
-                formatData['rotation'] = "%g %g %g" %( rotation  )
-                formatData['iprin'] = "linear"
-                formatData['iprout'] = "linear"
-                # formatData['iprin'] = interpolation["rotation_euler"]
-                # formatData['iprout'] = interpolation["rotation_euler"]
-            if "scale" in interpolation:
-                formatData['scale'] = "%g %g %g" %( scale)
-                formatData['ipsin'] = "linear"
-                formatData['ipsout'] = "linear"
-    return formatData
+    formatDatas = []
+    vectors = []    # (formatData, key, vector) formatted at the end
+    for timestamp, data in keyframePoints:
+        formatData = {}
+        formatData['time'] = timestamp * getFps()
+        formatDatas.append(formatData)
+        if "matrixData" in data:
+            matrix = data["matrixData"]
+            translation   = matrix.to_translation()[:]
+            rotation      = matrix.to_euler( "XYZ" )
+            rotation      = ( math.degrees( rotation.x ),
+                                math.degrees( rotation.y ),
+                                math.degrees( rotation.z ) )
+            scale = matrix.to_scale()[:]
+            if "interpolationData" in data:     #is always exported "linear"
+                interpolation = data["interpolationData"]
+                if("location" in interpolation):
+                    vectors.append((formatData, 'translation', translation))
+                    formatData['iptin'] = "linear"
+                    formatData['iptout'] = "linear"
+                    # formatData['iptin'] = interpolation["location"]
+                    # formatData['iptout'] = interpolation["location"]
+                if("rotation_quaternion" in interpolation):
+                    vectors.append((formatData, 'rotation', rotation))
+                    formatData['iprin'] = "linear"
+                    formatData['iprout'] = "linear"
+                    # formatData['iprin'] = interpolation["rotation_quaternion"]
+                    # formatData['iprout'] = interpolation["rotation_quaternion"]
+                elif("rotation_euler" in interpolation):
+                    vectors.append((formatData, 'rotation', rotation))
+                    formatData['iprin'] = "linear"
+                    formatData['iprout'] = "linear"
+                    # formatData['iprin'] = interpolation["rotation_euler"]
+                    # formatData['iprout'] = interpolation["rotation_euler"]
+                if "scale" in interpolation:
+                    vectors.append((formatData, 'scale', scale))
+                    formatData['ipsin'] = "linear"
+                    formatData['ipsout'] = "linear"
+    if len(vectors):
+        texts = i3d_textEncodeUtil.encodeRows(np.array([vector for formatData, key, vector in vectors], dtype=np.float64))
+        for (formatData, key, vector), text in zip(vectors, texts.tolist()):
+            formatData[key] = text.decode("ascii")
+    return formatDatas
 
 def isNodeVisible(m_nodeStr):
+    if i3d_globals.g_exportIndex is not None:
+        return i3d_globals.g_exportIndex.isVisible(m_nodeStr)
     m_node = bpy.data.objects[m_nodeStr]
     return m_node.visible_in_viewport_get(bpy.context.space_data)
 
@@ -2302,17 +2593,3 @@ def createBezierCurveFromAnimation(objName):
     bpy.context.scene.collection.objects.link(obj)
 
     return obj
-#------------------------------------------------------------------------
-#------------------------------------------------------------------------
-#------------------------------------------------------------------------
-class IndexBufferItem( object ):
-    def __init__(self,m_vertItem,m_mat):
-        self._str  = "{}".format(m_mat)
-        for m_key,m_item in m_vertItem.items():
-            self._str += " {}".format(m_item)
-
-    def __hash__(self):
-        return hash(self._str)
-
-    def __eq__(self, other):
-        return self._str == other._str
\ No newline at end of file
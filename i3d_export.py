@@ -35,7 +35,7 @@ except:
 import re
 from .dcc import *
 from .dcc import ddsExporter
-from .util import logUtil,i3d_binaryUtil
+from .util import logUtil,i3d_binaryUtil,i3d_shapeUtil,i3d_shapeProcessUtil,i3d_shapeCacheUtil,i3d_xmlWriterUtil
 
 # to profile with internal tools
 import cProfile, pstats, io
@@ -79,12 +79,15 @@ def I3DUpdateXML():
         pr = cProfile.Profile()
         pr.enable()
         i3d_globals.I3DLogPerformanceInit()
-    i3d_globals.g_meshCache = {}
+    beginExportContext()
 
     dcc.UIAddMessage('Updating config xml file...')
     start_time = time.time()
     updateObj = I3DIOexport()
-    err = updateObj.updateXML()
+    try:
+        err = updateObj.updateXML()
+    finally:
+        endExportContext()
     end_time = time.time()
     if err == 1:
         dcc.UIShowError('FAILED XML Update time is {0:.2f} seconds'.format(end_time - start_time))
@@ -107,12 +110,15 @@ def I3DExport(exportSelection):
         pr = cProfile.Profile()
         pr.enable()
         i3d_globals.I3DLogPerformanceInit()
-    i3d_globals.g_meshCache = {}
+    beginExportContext()
 
     dcc.UIAddMessage('Start export...')
     m_start_time = time.time()
     m_expObj = I3DIOexport()
-    err = m_expObj.export(exportSelection)
+    try:
+        err = m_expObj.export(exportSelection)
+    finally:
+        endExportContext()
     m_end_time = time.time()
     if err == 1:
         dcc.UIShowError('FAILED Export time is {0:.2f} seconds'.format(m_end_time - m_start_time))
@@ -129,6 +135,26 @@ def I3DExport(exportSelection):
         dcc.UIShowError(s.getvalue())
 
 
+def beginExportContext():
+    """ Sets up the state of one export: the pool of temporary meshes and the object indexes """
+
+    i3d_globals.g_meshPool = dcc.EvaluatedMeshPool(UIGetAttrInt('i3D_exportMeshPoolSize') * 1024 * 1024)
+    i3d_globals.g_exportIndex = dcc.ExportIndex()
+
+def endExportContext():
+    """ Frees the temporary meshes of the export, logs the pool statistics and drops the indexes """
+
+    m_pool = i3d_globals.g_meshPool
+    i3d_globals.g_meshPool = None
+    i3d_globals.g_exportIndex = None
+    if m_pool is None:
+        return
+    m_text = m_pool.release()
+    if m_pool.failed > 0 or m_pool.leaked > 0:
+        dcc.UIShowWarning(m_text)
+    else:
+        dcc.UIAddMessage(m_text)
+
 def I3DExportDDS():
     dcc.UIAddMessage('Start export DDS...')
     startTime = time.time()
@@ -226,6 +252,7 @@ class I3DShapeNode(object):
         self._treeID    = dcc.getShapeNode(sceneNodeData) #returns bpy.data.object name
         self._data      = {}
         self._sceneNodeData = sceneNodeData
+        self._instanceOf = None     # I3DShapeNode with identical data which is written instead of this one
 
     def _generateData(self):
         """ generate Shape specific data """
@@ -522,8 +549,242 @@ class I3DSceneGraph(object):
                     m_shapeItem = I3DShapeNode(self._shapeID, rootData)
                     self._shapes[m_shapeItem._treeID] = m_shapeItem
 
-        for m_key, m_shape in self._shapes.items():
-            m_shape._generateData()     # access data
+        # hidden meshes are shown together for one depsgraph evaluation, not one by one
+        dcc.showHiddenObjects(list(self._nodes.keys()))
+        try:
+            for m_key, m_shape in self._shapes.items():
+                m_shape._generateData()     # access data
+        finally:
+            dcc.restoreHiddenObjects()
+
+        # everything after the extraction is pure computation, in worker processes if set; results in shape id order
+        m_shapes = sorted(self._shapes.values(), key = lambda m_shape: m_shape._shapeID)
+        m_instances = {}
+        if UIGetAttrBool('i3D_exportInstanceIdenticalShapes'):
+            m_instances = self._findIdenticalShapes(m_shapes)
+            m_shapes = [m_shape for m_shape in m_shapes if m_shape not in m_instances]
+        m_shapeData = [m_shape._data for m_shape in m_shapes]
+        m_cache = self._getShapeCache()
+        m_keys = {}
+        if m_cache is not None:
+            for m_index, m_data in enumerate(m_shapeData):
+                if "Raw" in m_data:
+                    m_key = i3d_shapeCacheUtil.getShapeKey(m_data["Raw"])
+                    m_buffers = m_cache.get(m_key)
+                    if m_buffers is None:
+                        m_keys[m_index] = m_key
+                    else:
+                        del m_data["Raw"]
+                        m_data["Buffers"] = m_buffers
+        try:
+            m_shapeData = i3d_shapeProcessUtil.processShapes(m_shapeData, UIGetAttrInt('i3D_exportWorkerCount'))
+        except Exception as exception:
+            dcc.UIShowWarning("Parallel shape processing failed ({0}), processing serially".format(exception))
+            m_shapeData = i3d_shapeProcessUtil.processShapes(m_shapeData, 1)
+        for m_shape, m_data in zip(m_shapes, m_shapeData):
+            m_shape._data = m_data
+        if m_cache is not None:
+            for m_index, m_key in m_keys.items():
+                m_cache.put(m_key, m_shapeData[m_index]["Buffers"])
+            m_cache.pruneFolder()
+            dcc.UIAddMessage(m_cache.getStatistics())
+        for m_shape, m_original in m_instances.items():
+            m_shape._instanceOf = m_original
+            m_shape._shapeID = m_original._shapeID
+            m_shape._data = m_original._data
+        self._reportShapeInstancing()
+        self._reportSplitVertices()
+        self._checkRemovedTriangles()
+        self._reportVertexCache()
+        self._checkVertexCompressionRanges()
+
+    def _findIdenticalShapes(self, shapes):
+        """
+        Returns {shape: original} for the mesh shapes whose extracted data equals the one of an earlier shape
+
+        The whole shape data except the name is compared by hash: geometry, materials, node dependent values
+        like meshUsage or skinBindNodeIds. The shapes are not processed further, their nodes reference the original.
+        """
+
+        m_originals = {}
+        m_instances = {}
+        for m_shape in shapes:
+            if "Raw" not in m_shape._data:
+                continue
+            m_key = i3d_shapeCacheUtil.getShapeKey({m_name: m_value for m_name, m_value in m_shape._data.items() if m_name != "name"})
+            if m_key in m_originals:
+                m_instances[m_shape] = m_originals[m_key]
+            else:
+                m_originals[m_key] = m_shape
+        return m_instances
+
+    def _checkVertexCompressionRanges(self):
+        """
+        Compares the vertexCompressionRange of every mesh shape with the smallest range holding its final positions
+
+        "WARN" reports manual ranges which are larger than needed or too small, "ENFORCE" writes the computed range
+        instead (none if the positions exceed the largest range), "MANUAL" keeps the node attributes unchecked.
+        """
+
+        m_mode = UIGetAttrString('i3D_exportVertexCompressionMode')
+        if "MANUAL" == m_mode:
+            return
+        m_checked, m_wasteful, m_tooSmall, m_changed = 0, 0, 0, 0
+        for m_shape in sorted(self._shapes.values(), key = lambda m_shape: m_shape._shapeID):
+            if m_shape._instanceOf is not None or "Buffers" not in m_shape._data:
+                continue
+            m_data = m_shape._data
+            m_checked += 1
+            m_range = i3d_shapeUtil.getVertexCompressionRange(m_data["Buffers"].positions)
+            m_manual = m_data.get("vertexCompressionRange")
+            if "ENFORCE" == m_mode:
+                if m_range != m_manual:
+                    m_changed += 1
+                    dcc.UIAddMessage("{0}: vertexCompressionRange {1} -> {2}".format(m_data["name"], m_manual or "Auto", m_range or "Auto"))
+                    if m_range is None:
+                        m_data.pop("vertexCompressionRange", None)
+                    else:
+                        m_data["vertexCompressionRange"] = m_range
+            elif m_manual is not None and m_range != m_manual:
+                if m_range is None or float(m_manual) < float(m_range):
+                    m_tooSmall += 1
+                    dcc.UIShowWarning("{0}: vertexCompressionRange {1} is too small, positions need {2}".format(m_data["name"], m_manual, m_range or "more than 256"))
+                else:
+                    m_wasteful += 1
+                    dcc.UIAddMessage("{0}: vertexCompressionRange {1} is larger than needed, {2} holds all positions".format(m_data["name"], m_manual, m_range))
+        if "ENFORCE" == m_mode:
+            dcc.UIAddMessage("vertex compression range: {:d} shapes checked, {:d} changed".format(m_checked, m_changed))
+        else:
+            dcc.UIAddMessage("vertex compression range: {:d} shapes checked, {:d} larger than needed, {:d} too small".format(m_checked, m_wasteful, m_tooSmall))
+
+    def _checkRemovedTriangles(self):
+        """
+        Logs the degenerate and duplicate triangles removed from every mesh shape
+
+        In strict mode shapes with more removed triangles than i3D_exportMaxRemovedTriangles fail the export,
+        the meshes should be fixed in Blender then.
+        """
+
+        m_strict = UIGetAttrBool('i3D_exportStrictTriangleCleanup')
+        m_maxRemoved = UIGetAttrInt('i3D_exportMaxRemovedTriangles')
+        m_degenerate, m_duplicates, m_shapeCount = 0, 0, 0
+        m_failed = []
+        for m_shape in sorted(self._shapes.values(), key = lambda m_shape: m_shape._shapeID):
+            if m_shape._instanceOf is not None or "Buffers" not in m_shape._data:
+                continue
+            m_data = m_shape._data
+            m_removed = m_data["Buffers"].removedTriangles.tolist()
+            if sum(m_removed) == 0:
+                continue
+            m_shapeCount += 1
+            m_degenerate += m_removed[0]
+            m_duplicates += m_removed[1]
+            if m_strict and sum(m_removed) > m_maxRemoved:
+                m_failed.append(m_data["name"])
+                dcc.UIShowError("{0}: {1:d} degenerate and {2:d} duplicate triangles, more than {3:d}".format(m_data["name"], m_removed[0], m_removed[1], m_maxRemoved))
+            else:
+                dcc.UIAddMessage("{0}: {1:d} degenerate and {2:d} duplicate triangles removed".format(m_data["name"], m_removed[0], m_removed[1]))
+        if m_shapeCount > 0:
+            dcc.UIAddMessage("triangle cleanup: {:d} degenerate and {:d} duplicate triangles removed from {:d} shapes".format(m_degenerate, m_duplicates, m_shapeCount))
+        if m_failed:
+            raise ValueError("Strict triangle cleanup: {0} exceed {1:d} removed triangles".format(", ".join(m_failed), m_maxRemoved))
+
+    def _reportSplitVertices(self):
+        """
+        Logs the split vertex ratio (exported vertices / mesh vertices) of every mesh shape, highest first
+
+        Vertices are split by seams of normals, colors, texture coordinates and materials, a high ratio means
+        vertices transformed several times by the gpu. The weld tolerances merge nearly equal values.
+        """
+
+        m_shapes = [m_shape for m_shape in self._shapes.values()
+                    if m_shape._instanceOf is None and "Buffers" in m_shape._data and m_shape._data.get("MeshVertexCount", 0) > 0]
+        if not m_shapes:
+            return
+        m_shapes.sort(key = lambda m_shape: (-m_shape._data["Buffers"].vertexCount / m_shape._data["MeshVertexCount"], m_shape._shapeID))
+        for m_shape in m_shapes:
+            m_data = m_shape._data
+            dcc.UIAddMessage("{0}: {1:d} vertices from {2:d} mesh vertices, split ratio {3:.3f}".format(
+                m_data["name"], m_data["Buffers"].vertexCount, m_data["MeshVertexCount"], m_data["Buffers"].vertexCount / m_data["MeshVertexCount"]))
+        m_vertices = sum(m_shape._data["Buffers"].vertexCount for m_shape in m_shapes)
+        m_meshVertices = sum(m_shape._data["MeshVertexCount"] for m_shape in m_shapes)
+        dcc.UIAddMessage("split vertices: {:d} vertices from {:d} mesh vertices in {:d} shapes, split ratio {:.3f}".format(
+            m_vertices, m_meshVertices, len(m_shapes), m_vertices / m_meshVertices))
+
+    def _reportVertexCache(self):
+        """
+        Logs ACMR (vertex transformations per triangle) and ATVR (per vertex) of the shapes reordered for the vertex cache
+
+        The misses are only counted with Verbose, shapes from the shape cache stored by an export without it are left out.
+        """
+
+        if UIGetAttrInt('i3D_exportVertexCacheSize') <= 0 or not UIGetAttrBool('i3D_exportVerbose'):
+            return
+        m_triangles, m_vertices, m_before, m_after, m_uncounted = 0, 0, 0, 0, 0
+        for m_shape in self._shapes.values():
+            if m_shape._instanceOf is None and "Buffers" in m_shape._data:
+                m_buffers = m_shape._data["Buffers"]
+                if m_buffers.vertexCacheMisses[0] < 0:
+                    m_uncounted += 1
+                    continue
+                m_triangles += m_buffers.triangleCount
+                m_vertices += m_buffers.vertexCount
+                m_before += int(m_buffers.vertexCacheMisses[0])
+                m_after += int(m_buffers.vertexCacheMisses[1])
+        m_uncountedStr = ", {:d} shapes from the shape cache without counts left out".format(m_uncounted) if m_uncounted > 0 else ""
+        if m_triangles > 0:
+            dcc.UIAddMessage("vertex cache: ACMR {:.3f} -> {:.3f}, ATVR {:.3f} -> {:.3f} for {:d} triangles{}".format(
+                m_before / m_triangles, m_after / m_triangles, m_before / m_vertices, m_after / m_vertices, m_triangles, m_uncountedStr))
+        elif m_uncounted > 0:
+            dcc.UIAddMessage("vertex cache: {:d} shapes from the shape cache have no counts (stored by an export without Verbose)".format(m_uncounted))
+
+    def reportSavedTextBytes(self):
+        """ Logs the bytes of vertex text the text precision saved in every section, compared to six significant digits """
+
+        m_saved = [0] * len(i3d_shapeUtil.TEXT_SECTIONS)
+        for m_shape in self._shapes.values():
+            if m_shape._instanceOf is None and "Buffers" in m_shape._data:
+                m_saved = [m_total + m_bytes for m_total, m_bytes in zip(m_saved, m_shape._data["Buffers"].savedTextBytes.tolist())]
+        if any(m_saved):
+            m_sections = ", ".join("{0} {1:d}".format(m_section, m_bytes) for m_section, m_bytes in zip(i3d_shapeUtil.TEXT_SECTIONS, m_saved))
+            dcc.UIAddMessage("text precision: {0:d} bytes saved ({1})".format(sum(m_saved), m_sections))
+
+    def _reportShapeInstancing(self):
+        """ Logs how many mesh nodes share shapes (linked mesh data or identical data) and the shape data not written twice """
+
+        m_nodeCounts = {}
+        for m_node in self._nodes.values():
+            if "TYPE_MESH" == m_node._data.get("type"):
+                m_shapeStr = dcc.getShapeNode(m_node._data)
+                if m_shapeStr in self._shapes:
+                    m_shape = self._shapes[m_shapeStr]
+                    if m_shape._instanceOf is not None:
+                        m_shape = m_shape._instanceOf
+                    m_nodeCounts[m_shape] = m_nodeCounts.get(m_shape, 0) + 1
+        m_sharedShapes = [m_shape for m_shape, m_count in m_nodeCounts.items() if m_count > 1 and "Buffers" in m_shape._data]
+        if not m_sharedShapes:
+            return
+        m_identical = sum(1 for m_shape in self._shapes.values() if m_shape._instanceOf is not None)
+        m_savedBytes = sum((m_nodeCounts[m_shape] - 1) * i3d_shapeUtil.getEncodedSize(m_shape._data["Buffers"]) for m_shape in m_sharedShapes)
+        dcc.UIAddMessage("shape instancing: {:d} shapes used by {:d} mesh nodes, {:d} identical shapes merged, about {:.1f} kB of shape data deduplicated".format(
+            len(m_sharedShapes), sum(m_nodeCounts[m_shape] for m_shape in m_sharedShapes), m_identical, m_savedBytes / 1024.0))
+
+    def _getShapeCache(self):
+        """ Returns the shape cache kept across exports, None if disabled """
+
+        if not UIGetAttrBool('i3D_exportShapeCache'):
+            i3d_globals.g_shapeCache = None
+            return None
+        if i3d_globals.g_shapeCache is None:
+            i3d_globals.g_shapeCache = i3d_shapeCacheUtil.ShapeCache()
+        m_cache = i3d_globals.g_shapeCache
+        m_cache.maxBytes = UIGetAttrInt('i3D_exportShapeCacheSize') * 1024 * 1024
+        m_cache.warn = dcc.UIShowWarning
+        m_cache.folder = None
+        if UIGetAttrBool('i3D_exportShapeCacheDisk') and bpy.data.filepath:
+            m_blendFolder, m_blendFile = os.path.split(bpy.data.filepath)
+            m_cache.folder = os.path.join(m_blendFolder, os.path.splitext(m_blendFile)[0] + "_i3dShapeCache")
+        return m_cache
 
     def mapSkinning(self):
         """ Maps bones to armature with their nodeIds and then maps the same set to all objects which have armature applied """
@@ -945,7 +1206,7 @@ class I3DSceneGraph(object):
         materialIDs = ' '.join(map(str, matIdList))
 
         if "i3D_mergeChildren" in data and data["i3D_mergeChildren"] == 1:          #merge children material list
-            materialIDs = ' '.join(map(str, [matIdList[0]] * int(self._shapes[shapeStr]._data["Subsets"]["count"])))
+            materialIDs = ' '.join(map(str, [matIdList[0]] * self._shapes[shapeStr]._data["Buffers"].subsetCount))
         # -------------------------------------------------------------
         isRigidBody = False
         isStatic    = False
@@ -1135,15 +1396,23 @@ class I3DSceneGraph(object):
             if "shadingRate" in data:
                 self._xmlWriteString( xmlCurrent, "shadingRate", data["shadingRate"] )
 
-    def xmlWriteShapes(self,xmlParent):
-        """ Write all shapes to .i3d file """
+    def xmlWriteShapes(self,writer):
+        """
+        Write all shapes to .i3d file
+
+        :param writer: i3d_xmlWriterUtil stream writer with the open Shapes element
+        """
 
         for key, shape in self._shapes.items():
             #dcc.UIAddMessage("{1} {0} {2}".format( key, shape._shapeID, shape._treeID ))
+            if shape._instanceOf is not None:     # its nodes reference the identical shape
+                continue
             if "TYPE_MESH" == shape._shapeType:
-                self._xmlWriteShape_Mesh( xmlParent, shape )
+                self._xmlWriteShape_Mesh( writer, shape )
             if "TYPE_NURBS_CURVE" == shape._shapeType:
-                self._xmlWriteShape_Curve( xmlParent, shape )
+                xmlCurrent = xml_ET.Element( "Shapes" )
+                self._xmlWriteShape_Curve( xmlCurrent, shape )
+                writer.writeTree( xmlCurrent[0] )
 
     def xmlWriteAnimation(self, xmlParent):
         """ Write all animation data to the .i3d file """
@@ -1160,9 +1429,9 @@ class I3DSceneGraph(object):
                     keyframe = clip._I3DKeyframes[key]
                     xmlKeyframe = xml_ET.SubElement( xmlClip, "Keyframes" )
                     self._xmlWriteInt(xmlKeyframe,"nodeId",keyframe._nodeID)
-                    for keyframePointDataKey, keyframePointData in keyframe._I3DKeyframePoints.items():
+                    keyframePointDatas = dcc.formatKeyframePointsData(list(keyframe._I3DKeyframePoints.items()))
+                    for data in keyframePointDatas:
                         xmlKeyframePoint = xml_ET.SubElement( xmlKeyframe, "Keyframe" )
-                        data = dcc.formatKeyframePointData(keyframePointDataKey,keyframePointData)
                         if('time' in data): self._xmlWriteFloat(xmlKeyframePoint,"time",data['time'])
                         if('translation' in data): self._xmlWriteString(xmlKeyframePoint,"translation",data['translation'])
                         if('iptin' in data): self._xmlWriteString(xmlKeyframePoint,"iptin",data['iptin'])
@@ -1202,10 +1471,10 @@ class I3DSceneGraph(object):
             xmlItem = xml_ET.SubElement( xmlCurrent,  "cv" )
             self._xmlWriteString( xmlItem, "c", point )
 
-    def _xmlWriteShape_Mesh(self, xmlParent, shape):
-        """ Write all Shape Mesh data to the .i3d file """
+    def _xmlWriteShape_Mesh(self, writer, shape):
+        """ Write all Shape Mesh data to the .i3d file, the vertices and triangles go from the buffers to the writer """
 
-        xmlCurrent  = xml_ET.SubElement( xmlParent, "IndexedTriangleSet" )
+        xmlCurrent  = xml_ET.Element( "IndexedTriangleSet" )
         data = shape._data
         self._xmlWriteString( xmlCurrent, "name", data["name"]  )
         self._xmlWriteInt( xmlCurrent, "shapeId", shape._shapeID )
@@ -1220,11 +1489,11 @@ class I3DSceneGraph(object):
         if "isOptimized" in data:
             self._xmlWriteString( xmlCurrent, "isOptimized", data["isOptimized"]  )
         vertices = data["Vertices"]
-        triangles = data["Triangles"]
-        subsets = data["Subsets"]
+        buffers = data["Buffers"]
+        writer.startElement( xmlCurrent )
         # -------------------------------------------------------------
-        xmlVertices  = xml_ET.SubElement( xmlCurrent, "Vertices" )
-        self._xmlWriteString( xmlVertices, "count", vertices["count"]  )
+        xmlVertices  = xml_ET.Element( "Vertices" )
+        self._xmlWriteInt( xmlVertices, "count", buffers.vertexCount  )
         if ( "normal" in vertices and UIGetAttrBool("i3D_exportNormals")):
             self._xmlWriteString( xmlVertices, "normal",  vertices["normal"] )
             self._xmlWriteString( xmlVertices, "tangent", "true" )    #wrong place
@@ -1245,66 +1514,44 @@ class I3DSceneGraph(object):
         if ("generic" in vertices):
             self._xmlWriteString( xmlVertices, "generic", vertices["generic"])
 
-        normalSet = "normal" in vertices and  UIGetAttrBool("i3D_exportNormals")
-        colorSet = "color"  in vertices and UIGetAttrBool("i3D_exportColors")
-        uv0Set = "uv0" in vertices and UIGetAttrBool("i3D_exportTexCoords")
-        uv1Set = "uv1" in vertices and UIGetAttrBool("i3D_exportTexCoords")
-        uv2Set = "uv2" in vertices and UIGetAttrBool("i3D_exportTexCoords")
-        uv3Set = "uv3" in vertices and UIGetAttrBool("i3D_exportTexCoords")
-        blendWSet = "blendweights" in vertices and UIGetAttrBool("i3D_exportSkinWeigths")
-        singleBlendWSet = "singleblendweights" in vertices and UIGetAttrBool("i3D_exportMergeGroups")
-        genericSet = "generic" in vertices
-        for m_vert in vertices["data"]:
-            xmlV  = xml_ET.SubElement( xmlVertices, "v" )
-            self._xmlWriteString( xmlV, "p", m_vert["p"]  )
-            if (normalSet):
-                self._xmlWriteString( xmlV, "n",  m_vert["n"] )
-            if (colorSet):
-                # for merge children or merge group the key "c" might not be set
-                if "c" in m_vert:
-                    self._xmlWriteString( xmlV, "c",  m_vert["c"] )
-                else:
-                    self._xmlWriteString( xmlV, "c",  "1 1 1 1" )
-            if (uv0Set):
-                self._xmlWriteString( xmlV, "t0", m_vert["t0"] )
-            if (uv1Set):
-                self._xmlWriteString( xmlV, "t1", m_vert["t1"] )
-            if (uv2Set):
-                self._xmlWriteString( xmlV, "t2", m_vert["t2"] )
-            if (uv3Set):
-                self._xmlWriteString( xmlV, "t3", m_vert["t3"] )
-            if (blendWSet):
-                self._xmlWriteString( xmlV, "bw", m_vert['bw'] )
-                self._xmlWriteString( xmlV, "bi", m_vert['bi'] )
-            if (singleBlendWSet):
-                self._xmlWriteString( xmlV, "bi", m_vert['bi'] )
-            if (genericSet):
-                self._xmlWriteString( xmlV, "g", m_vert["g"])
+        # one list of text rows per exported attribute, encoded ahead by the shape processing or formatted here
+        vertexAttributes = [("p", i3d_shapeUtil.getEncodedRows(buffers, "positions"))]
+        if ( "normal" in vertices and UIGetAttrBool("i3D_exportNormals")):
+            vertexAttributes.append(("n", i3d_shapeUtil.getEncodedRows(buffers, "normals")))
+        if ( "color"  in vertices and UIGetAttrBool("i3D_exportColors")):
+            vertexAttributes.append(("c", i3d_shapeUtil.getEncodedRows(buffers, "colors")))
+        for uvIndex, uv in enumerate(buffers.uvs):
+            if ( "uv{:d}".format(uvIndex) in vertices and UIGetAttrBool("i3D_exportTexCoords")):
+                vertexAttributes.append(("t{:d}".format(uvIndex), i3d_shapeUtil.getEncodedRows(buffers, "uv{:d}".format(uvIndex))))
+        if ( "blendweights" in vertices and UIGetAttrBool("i3D_exportSkinWeigths")):
+            vertexAttributes.append(("bw", i3d_shapeUtil.getEncodedRows(buffers, "blendWeights")))
+            vertexAttributes.append(("bi", i3d_shapeUtil.getEncodedRows(buffers, "blendIndices")))
+        if ( "singleblendweights" in vertices and UIGetAttrBool("i3D_exportMergeGroups")):
+            vertexAttributes.append(("bi", i3d_shapeUtil.getEncodedRows(buffers, "blendIndices")))
+        if ("generic" in vertices):
+            vertexAttributes.append(("g", i3d_shapeUtil.getEncodedRows(buffers, "generic")))
+        writer.writeRows( xmlVertices, "v", vertexAttributes, buffers.vertexCount )
         # -------------------------------------------------------------
-        xmlTriangles = xml_ET.SubElement( xmlCurrent, "Triangles" )
-        self._xmlWriteString( xmlTriangles, "count", triangles["count"]  )
-        for m_tri in triangles["data"]:
-            xmlT = xml_ET.SubElement( xmlTriangles, "t" )
-            self._xmlWriteString( xmlT, "vi", m_tri["vi"]  )
+        xmlTriangles = xml_ET.Element( "Triangles" )
+        self._xmlWriteInt( xmlTriangles, "count", buffers.triangleCount  )
+        writer.writeRows( xmlTriangles, "t", [("vi", i3d_shapeUtil.getEncodedRows(buffers, "triangles"))], buffers.triangleCount )
         # -------------------------------------------------------------
-        xmlSubsets = xml_ET.SubElement( xmlCurrent, "Subsets" )
-        self._xmlWriteString( xmlSubsets, "count", subsets["count"]  )
-        for m_subs in subsets["data"]:
+        xmlSubsets = xml_ET.Element( "Subsets" )
+        self._xmlWriteInt( xmlSubsets, "count", buffers.subsetCount  )
+        for subsetIndex, (firstVertex, numVertices, firstIndex, numIndices) in enumerate(buffers.subsets.tolist()):
             xmlS = xml_ET.SubElement( xmlSubsets, "Subset" )
-            self._xmlWriteString( xmlS, "firstVertex", m_subs["firstVertex"]  )
-            self._xmlWriteString( xmlS, "numVertices", m_subs["numVertices"]  )
-            self._xmlWriteString( xmlS, "firstIndex",  m_subs["firstIndex"]  )
-            self._xmlWriteString( xmlS, "numIndices",  m_subs["numIndices"]  )
-            if ( "uv0"    in vertices and UIGetAttrBool("i3D_exportTexCoords") and "uvDensity0" in m_subs):
-                self._xmlWriteFloat( xmlS, "uvDensity0",  m_subs["uvDensity0"]  )
-            if ( "uv1"    in vertices and UIGetAttrBool("i3D_exportTexCoords") and "uvDensity1" in m_subs):
-                self._xmlWriteFloat( xmlS, "uvDensity1",  m_subs["uvDensity1"]  )
-            if ( "uv2"    in vertices and UIGetAttrBool("i3D_exportTexCoords") and "uvDensity2" in m_subs):
-                self._xmlWriteFloat( xmlS, "uvDensity2",  m_subs["uvDensity2"]  )
-            if ( "uv3"    in vertices and UIGetAttrBool("i3D_exportTexCoords") and "uvDensity3" in m_subs):
-                self._xmlWriteFloat( xmlS, "uvDensity3",  m_subs["uvDensity3"]  )
-            if ("materialSlotName" in m_subs and m_subs["materialSlotName"] != ""):
-                self._xmlWriteString(xmlS, "materialSlotName", m_subs["materialSlotName"])
+            self._xmlWriteInt( xmlS, "firstVertex", firstVertex  )
+            self._xmlWriteInt( xmlS, "numVertices", numVertices  )
+            self._xmlWriteInt( xmlS, "firstIndex",  firstIndex  )
+            self._xmlWriteInt( xmlS, "numIndices",  numIndices  )
+            for uvIndex in range(buffers.uvDensities.shape[1]):
+                if ( "uv{:d}".format(uvIndex) in vertices and UIGetAttrBool("i3D_exportTexCoords")):
+                    self._xmlWriteFloat( xmlS, "uvDensity{:d}".format(uvIndex),  buffers.uvDensities[subsetIndex, uvIndex]  )
+            materialSlotName = buffers.materialSlotNames[subsetIndex]
+            if (materialSlotName is not None and materialSlotName != ""):
+                self._xmlWriteString(xmlS, "materialSlotName", materialSlotName)
+        writer.writeTree( xmlSubsets )
+        writer.endElement()
 
     def _xmlWriteAttr(self, xmlCurrent, attrStr, data, valStr ):
         """ Write specific attributes to the given xml layer """
@@ -1521,7 +1768,7 @@ class I3DIOexport( object ):
     def _xmlWriteShapes(self):
         """ Top level function to write shapes to the i3d file """
 
-        self._sceneGraph.xmlWriteShapes(self._xml_shapes)
+        self._sceneGraph.xmlWriteShapes(self._xml_writer)
 
     def _xmlWriteDynamics(self):
         """ no implementation """
@@ -1544,7 +1791,12 @@ class I3DIOexport( object ):
         self._sceneGraph.xmlWriteScene(self._xml_scene)
 
     def _xmlBuild( self ):
-        """ Top level XML builder function """
+        """
+        Top level XML builder function
+
+        The document is written section by section while it is built, see i3d_xmlWriterUtil. Shapes are written
+        row by row from their buffers, the other sections are built as small element trees, written and released.
+        """
 
         # i3D
         name = "untitled"
@@ -1561,47 +1813,12 @@ class I3DIOexport( object ):
             self._xml_i3d = xml_ET.Element('i3D', attrib={'name': name, **root_attributes,
                                             attr_qname: 'http://i3d.giants.ch/schema/i3d-1.6.xsd'}, nsmap=nsmap)
         else:
+            nsmap = None
             self._xml_i3d = xml_ET.Element( "i3D" )
             self._xml_i3d.set( "name", name )
             self._xml_i3d.set( "version", "1.6" )
             self._xml_i3d.set( "xsi:noNamespaceSchemaLocation", "http://i3d.giants.ch/schema/i3d-1.6.xsd" ) #https://gdn.giants-software.com/documentation_i3d.php
             self._xml_i3d.set( "xmlns:xsi", "http://www.w3.org/2001/XMLSchema-instance" )
-        # Asset
-        self._xml_asset = xml_ET.SubElement( self._xml_i3d,   "Asset" )
-        self._xml_software = xml_ET.SubElement( self._xml_asset, "Export" )
-        self._xml_software.set( "program", DCC_PLATFORM )
-        self._xml_software.set( "version", "{0}".format( dcc.appVersion() ) )
-        # Files
-        if len(self._sceneGraph._files) > 0:
-            self._xml_files = xml_ET.SubElement( self._xml_i3d, "Files" )
-            self._xmlWriteFiles()
-        # Materials
-        self._sceneGraph.updateMaterials()
-        if len(self._sceneGraph._materials) > 0:
-            self._xml_materials = xml_ET.SubElement( self._xml_i3d, "Materials" )
-            self._xmlWriteMaterials()
-        # Shapes
-        if len(self._sceneGraph._shapes) > 0:
-            self._xml_shapes = xml_ET.SubElement( self._xml_i3d, "Shapes" )
-            self._xmlWriteShapes()
-        # Dynamics
-        # if ( UIGetAttrBool("i3D_exportParticleSystems") ):
-            # self._xml_dynamics   = xml_ET.SubElement( self._xml_i3d, "Dynamics" )
-            # self._xmlWriteDynamics()
-        # Scene
-        if len(self._sceneGraph._nodes) > 0:
-            self._xml_scene = xml_ET.SubElement( self._xml_i3d, "Scene" )
-            self._xmlWriteScene()
-        # Animation
-        if ( UIGetAttrBool("i3D_exportAnimation") and len(self._sceneGraph._animationSet) > 0):
-            self._xml_animation = xml_ET.SubElement( self._xml_i3d, "Animation" )
-            self._xmlWriteAnimation()
-        # UserAttributes
-        if ( UIGetAttrBool("i3D_exportUserAttributes")and len([treeID for treeID in self._sceneGraph.traverse(m_node="DEPTH") if len( dcc.getNodeUserAttributes(treeID)) > 0]) > 0):
-            self._xml_userAttributes = xml_ET.SubElement( self._xml_i3d, "UserAttributes" )
-            self._xmlWriteUserAttributes()
-        self._indent( self._xml_i3d ) #prettyprint
-        self._xml_tree = xml_ET.ElementTree( self._xml_i3d )
         # Export Path
         if ( UIGetAttrBool('i3D_exportUseSoftwareFileName') ):
             if ( dcc.isFileSaved() ):
@@ -1614,17 +1831,65 @@ class I3DIOexport( object ):
             filepath = dcc.getAbsPath( UIGetAttrString("i3D_exportFileLocation") )
             filepath = "{0}.i3d".format(os.path.splitext(filepath)[0])
         try:
-            fwrite = open(filepath,'w')
-            fwrite.close()
+            self._xml_writer = i3d_xmlWriterUtil.openStreamWriter(filepath, "iso-8859-1", xml_ET if g_usingLXML else None)
         except IOError:
             dcc.UIShowError('Invalid filepath: {0}'.format(filepath))
             return 1
         try:
-            self._xml_tree.write( filepath, xml_declaration = True, encoding = "iso-8859-1", method = "xml" )
+            self._xml_writer.writeDeclaration("iso-8859-1")
+            self._xml_writer.startElement(self._xml_i3d, nsmap)
+            # Asset
+            self._xml_asset = xml_ET.Element( "Asset" )
+            self._xml_software = xml_ET.SubElement( self._xml_asset, "Export" )
+            self._xml_software.set( "program", DCC_PLATFORM )
+            self._xml_software.set( "version", "{0}".format( dcc.appVersion() ) )
+            self._xml_writer.writeTree(self._xml_asset)
+            # Files
+            if len(self._sceneGraph._files) > 0:
+                self._xml_files = xml_ET.Element( "Files" )
+                self._xmlWriteFiles()
+                self._xml_writer.writeTree(self._xml_files)
+            # Materials
+            self._sceneGraph.updateMaterials()
+            if len(self._sceneGraph._materials) > 0:
+                self._xml_materials = xml_ET.Element( "Materials" )
+                self._xmlWriteMaterials()
+                self._xml_writer.writeTree(self._xml_materials)
+            # Shapes, streamed shape by shape
+            if len(self._sceneGraph._shapes) > 0:
+                self._xml_writer.startElement(xml_ET.Element( "Shapes" ))
+                self._xmlWriteShapes()
+                self._xml_writer.endElement()
+                self._sceneGraph.reportSavedTextBytes()
+            # Dynamics
+            # if ( UIGetAttrBool("i3D_exportParticleSystems") ):
+                # self._xml_dynamics   = xml_ET.SubElement( self._xml_i3d, "Dynamics" )
+                # self._xmlWriteDynamics()
+            # Scene
+            if len(self._sceneGraph._nodes) > 0:
+                self._xml_scene = xml_ET.Element( "Scene" )
+                self._xmlWriteScene()
+                self._xml_writer.writeTree(self._xml_scene)
+            # Animation
+            if ( UIGetAttrBool("i3D_exportAnimation") and len(self._sceneGraph._animationSet) > 0):
+                self._xml_animation = xml_ET.Element( "Animation" )
+                self._xmlWriteAnimation()
+                self._xml_writer.writeTree(self._xml_animation)
+            # UserAttributes
+            if ( UIGetAttrBool("i3D_exportUserAttributes")and len([treeID for treeID in self._sceneGraph.traverse(m_node="DEPTH") if len( dcc.getNodeUserAttributes(treeID)) > 0]) > 0):
+                self._xml_userAttributes = xml_ET.Element( "UserAttributes" )
+                self._xmlWriteUserAttributes()
+                self._xml_writer.writeTree(self._xml_userAttributes)
+            self._xml_writer.endElement()
+            self._xml_writer.finish()
             dcc.UIAddMessage('Exported to {0}'.format(filepath))
         except Exception as m_exception:
+            self._xml_writer.discard()     # the previous file stays intact
             dcc.UIShowError(m_exception)
             return 1
+        finally:
+            self._xml_writer = None
+            self._xml_asset = self._xml_files = self._xml_materials = self._xml_scene = self._xml_animation = self._xml_userAttributes = None
 
         if UIGetAttrBool("i3D_binaryFiles"):
             dcc.UIAddMessage('BUILD BINARY')
@@ -1729,21 +1994,3 @@ class I3DIOexport( object ):
 
         if dcc.getXMLConfigBool(nodeStr, bone_str):
             mappingList.append('        <i3dMapping id="' + xmlIdentifier + '" node="' + indexPath + '" />\n')
-
-    @staticmethod
-    def _indent( elem, level = 0 ):
-        """ source http://effbot.org/zone/element-lib.htm#prettyprint """
-
-        i = "\n" + level*"  "
-        if len( elem ):
-            if not elem.text or not elem.text.strip():
-                elem.text = i + "  "
-            if not elem.tail or not elem.tail.strip():
-                elem.tail = i
-            for elem in elem:
-                I3DIOexport._indent( elem, level + 1 )
-            if not elem.tail or not elem.tail.strip():
-                elem.tail = i
-        else:
-            if level and (not elem.tail or not elem.tail.strip()):
-                elem.tail = i
\ No newline at end of file
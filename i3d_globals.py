@@ -4,7 +4,9 @@
 import time
 from .util import logUtil
 
-g_meshCache = {}
+g_meshPool = None       # dccBlender.EvaluatedMeshPool of the running export
+g_exportIndex = None    # dccBlender.ExportIndex of the running export
+g_shapeCache = None     # i3d_shapeCacheUtil.ShapeCache, kept across exports
 
 #-------------------------------------------------------------------------------
 #   Debugging Profiling
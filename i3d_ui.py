@@ -1269,6 +1269,10 @@ class I3D_PT_PanelExport( bpy.types.Panel ):
                 col = split.column()
                 col.prop( context.scene.I3D_UIexportSettings, "i3D_exportVerbose"       )
                 col.prop( context.scene.I3D_UIexportSettings, "i3D_exportApplyModifiers"  )
+                col.prop( context.scene.I3D_UIexportSettings, "i3D_exportBulkExtraction"  )
+                col.prop( context.scene.I3D_UIexportSettings, "i3D_exportShapeCache"  )
+                col.prop( context.scene.I3D_UIexportSettings, "i3D_exportShapeCacheDisk"  )
+                col.prop( context.scene.I3D_UIexportSettings, "i3D_exportInstanceIdenticalShapes"  )
                 split = split.split(factor = 0.16)
                 col = split.column()
                 split = split.split(factor = 0.8)
@@ -1278,6 +1282,41 @@ class I3D_PT_PanelExport( bpy.types.Panel ):
                 split = box.split()
                 split.prop( context.scene.I3D_UIexportSettings, "i3D_exportAxisOrientations"  )
                 split = box.split()
+                split.prop( context.scene.I3D_UIexportSettings, "i3D_exportBoundingVolumeMode"  )
+                split = box.split()
+                split.prop( context.scene.I3D_UIexportSettings, "i3D_exportVertexCompressionMode"  )
+                split = box.split()
+                split.prop( context.scene.I3D_UIexportSettings, "i3D_exportWeldTolerance"  )
+                split.prop( context.scene.I3D_UIexportSettings, "i3D_exportWeldNormalAngle"  )
+                split = box.split()
+                split.prop( context.scene.I3D_UIexportSettings, "i3D_exportWeldUvTolerance"  )
+                split.prop( context.scene.I3D_UIexportSettings, "i3D_exportWeldColorTolerance"  )
+                split = box.split()
+                split.prop( context.scene.I3D_UIexportSettings, "i3D_exportRemoveDegenerateTriangles"  )
+                split = box.split()
+                split.prop( context.scene.I3D_UIexportSettings, "i3D_exportStrictTriangleCleanup"  )
+                split.prop( context.scene.I3D_UIexportSettings, "i3D_exportMaxRemovedTriangles"  )
+                split = box.split()
+                split.prop( context.scene.I3D_UIexportSettings, "i3D_exportPositionDigits"  )
+                split.prop( context.scene.I3D_UIexportSettings, "i3D_exportPositionDigitsRelative"  )
+                split = box.split()
+                split.prop( context.scene.I3D_UIexportSettings, "i3D_exportNormalDigits"  )
+                split.prop( context.scene.I3D_UIexportSettings, "i3D_exportUvDigits"  )
+                split = box.split()
+                split.prop( context.scene.I3D_UIexportSettings, "i3D_exportColorDigits"  )
+                split.prop( context.scene.I3D_UIexportSettings, "i3D_exportSnapBlendWeights"  )
+                split = box.split()
+                split.prop( context.scene.I3D_UIexportSettings, "i3D_exportWorkerCount"  )
+                split = box.split()
+                split.prop( context.scene.I3D_UIexportSettings, "i3D_exportVertexCacheSize"  )
+                split = box.split()
+                split.prop( context.scene.I3D_UIexportSettings, "i3D_exportChunkTriangles"  )
+                split.prop( context.scene.I3D_UIexportSettings, "i3D_exportMemoryBudget"  )
+                split = box.split()
+                split.prop( context.scene.I3D_UIexportSettings, "i3D_exportShapeCacheSize"  )
+                split = box.split()
+                split.prop( context.scene.I3D_UIexportSettings, "i3D_exportMeshPoolSize"  )
+                split = box.split()
 
             # -----------------------------------------
             # "Game Location" box
@@ -3268,6 +3307,29 @@ class I3D_UIexportSettings( bpy.types.PropertyGroup ):
     i3D_exportVerbose             : bpy.props.BoolProperty   ( name         = "Verbose",
                                                                description  = "Print info to System Console",
                                                                default      = dcc.SETTINGS_UI['i3D_exportVerbose']['defaultValue'] )
+    i3D_exportBulkExtraction      : bpy.props.BoolProperty   ( name = "Bulk Extraction",description="Read mesh data in bulk with foreach_get if checked, otherwise loop by loop", default = dcc.SETTINGS_UI['i3D_exportBulkExtraction']['defaultValue']  )
+    i3D_exportWeldTolerance       : bpy.props.FloatProperty  ( name = "Weld Position Tolerance",description="Vertex positions are snapped to a grid of this cell size and welded if they fall into the same cell, 0 welds vertices with identical exported positions", default = dcc.SETTINGS_UI['i3D_exportWeldTolerance']['defaultValue'], min = 0.0, precision = 6  )
+    i3D_exportWeldNormalAngle     : bpy.props.FloatProperty  ( name = "Weld Normal Angle",description="Normals are snapped to a grid with the chord of this angle in degrees as cell size and welded if they fall into the same cell, 0 welds identical exported normals", default = dcc.SETTINGS_UI['i3D_exportWeldNormalAngle']['defaultValue'], min = 0.0, max = 180.0, precision = 3  )
+    i3D_exportWeldUvTolerance     : bpy.props.FloatProperty  ( name = "Weld UV Tolerance",description="Texture coordinates are snapped to a grid of this cell size and welded if they fall into the same cell, 0 welds identical exported texture coordinates", default = dcc.SETTINGS_UI['i3D_exportWeldUvTolerance']['defaultValue'], min = 0.0, precision = 6  )
+    i3D_exportWeldColorTolerance  : bpy.props.FloatProperty  ( name = "Weld Color Tolerance",description="Vertex colors are snapped to a grid of this cell size and welded if they fall into the same cell, 0 welds identical exported colors", default = dcc.SETTINGS_UI['i3D_exportWeldColorTolerance']['defaultValue'], min = 0.0, precision = 6  )
+    i3D_exportRemoveDegenerateTriangles : bpy.props.BoolProperty ( name = "Remove Degenerate Triangles",description="Removes triangles without area and repeated triangles of a subset after welding, this changes the vertices, subsets and uv densities of the shapes", default = dcc.SETTINGS_UI['i3D_exportRemoveDegenerateTriangles']['defaultValue'] )
+    i3D_exportStrictTriangleCleanup : bpy.props.BoolProperty ( name = "Strict Triangle Cleanup",description="Fails the export if a shape has more removed triangles than the maximum", default = dcc.SETTINGS_UI['i3D_exportStrictTriangleCleanup']['defaultValue'] )
+    i3D_exportMaxRemovedTriangles : bpy.props.IntProperty    ( name = "Max Removed Triangles",description="Removed degenerate and duplicate triangles allowed per shape in strict mode", default = dcc.SETTINGS_UI['i3D_exportMaxRemovedTriangles']['defaultValue'], min = 0 )
+    i3D_exportPositionDigits      : bpy.props.IntProperty    ( name = "Position Digits",description="Significant digits of the written vertex positions", default = dcc.SETTINGS_UI['i3D_exportPositionDigits']['defaultValue'], min = 2, max = 6  )
+    i3D_exportPositionDigitsRelative : bpy.props.BoolProperty ( name = "Relative To Compression Range",description="Counts the position digits relative to the vertexCompressionRange of the shape instead of each value", default = dcc.SETTINGS_UI['i3D_exportPositionDigitsRelative']['defaultValue'] )
+    i3D_exportNormalDigits        : bpy.props.IntProperty    ( name = "Normal Digits",description="Significant digits of the written normals", default = dcc.SETTINGS_UI['i3D_exportNormalDigits']['defaultValue'], min = 2, max = 6  )
+    i3D_exportUvDigits            : bpy.props.IntProperty    ( name = "UV Digits",description="Significant digits of the written texture coordinates", default = dcc.SETTINGS_UI['i3D_exportUvDigits']['defaultValue'], min = 2, max = 6  )
+    i3D_exportColorDigits         : bpy.props.IntProperty    ( name = "Color Digits",description="Significant digits of the written vertex colors", default = dcc.SETTINGS_UI['i3D_exportColorDigits']['defaultValue'], min = 2, max = 6  )
+    i3D_exportSnapBlendWeights    : bpy.props.BoolProperty   ( name = "Snap Skin Weights",description="Rounds skin weights to multiples of 1/255 and writes them with 3 digits", default = dcc.SETTINGS_UI['i3D_exportSnapBlendWeights']['defaultValue'] )
+    i3D_exportWorkerCount         : bpy.props.IntProperty    ( name = "Worker Processes",description="Processes the extracted shapes in parallel, 1 processes serially, 0 uses all cpu cores", default = dcc.SETTINGS_UI['i3D_exportWorkerCount']['defaultValue'], min = 0, max = 64  )
+    i3D_exportShapeCache          : bpy.props.BoolProperty   ( name = "Shape Cache",description="Reuses processed shapes with unchanged geometry and settings from previous exports", default = dcc.SETTINGS_UI['i3D_exportShapeCache']['defaultValue']  )
+    i3D_exportShapeCacheDisk      : bpy.props.BoolProperty   ( name = "Shape Cache On Disk",description="Stores the shape cache in a folder next to the .blend file, so it is kept across sessions", default = dcc.SETTINGS_UI['i3D_exportShapeCacheDisk']['defaultValue']  )
+    i3D_exportShapeCacheSize      : bpy.props.IntProperty    ( name = "Shape Cache Size (MB)",description="Memory and disk space used by the shape cache, least recently used shapes are dropped first", default = dcc.SETTINGS_UI['i3D_exportShapeCacheSize']['defaultValue'], min = 1  )
+    i3D_exportMeshPoolSize        : bpy.props.IntProperty    ( name = "Mesh Pool Size (MB)",description="Memory used by the evaluated meshes during the export, least recently used meshes are freed first", default = dcc.SETTINGS_UI['i3D_exportMeshPoolSize']['defaultValue'], min = 1  )
+    i3D_exportInstanceIdenticalShapes : bpy.props.BoolProperty ( name = "Instance Identical Meshes",description="Meshes with identical exported data are written once and shared by their nodes, linked duplicates always share their shape", default = dcc.SETTINGS_UI['i3D_exportInstanceIdenticalShapes']['defaultValue']  )
+    i3D_exportVertexCacheSize     : bpy.props.IntProperty    ( name = "Vertex Cache Size",description="Reorders triangles and vertices for a gpu vertex cache of this many entries, 0 keeps the order of Blender. With Verbose the cache misses before and after are reported, which takes two more passes over the triangles", default = dcc.SETTINGS_UI['i3D_exportVertexCacheSize']['defaultValue'], min = 0, max = 64  )
+    i3D_exportChunkTriangles      : bpy.props.IntProperty    ( name = "Chunk Size (Triangles)",description="Welds larger meshes in blocks of this many triangles to bound the memory use, 0 welds every mesh at once", default = dcc.SETTINGS_UI['i3D_exportChunkTriangles']['defaultValue'], min = 0  )
+    i3D_exportMemoryBudget        : bpy.props.IntProperty    ( name = "Memory Budget (MB)",description="Memory for the per corner arrays of chunked meshes, larger arrays are kept in temporary files", default = dcc.SETTINGS_UI['i3D_exportMemoryBudget']['defaultValue'], min = 1  )
     i3D_exportRelativePaths       : bpy.props.BoolProperty   ( name = "Export Relative Paths",description="Export File Paths relative to the *.i3d File",      default = dcc.SETTINGS_UI['i3D_exportRelativePaths']['defaultValue'])
     i3D_exportGameRelativePath       : bpy.props.BoolProperty   ( name = "Export Game Relative Path",description="Export File Paths relative to the Game Installation Path",       default = dcc.SETTINGS_UI['i3D_exportGameRelativePath']['defaultValue'], update=setExportRelativePath  )
     i3D_gameLocationDisplay         : bpy.props.StringProperty ( name = "Location",description="Game Installation Path used for Game Relative Path export option",  default="")
@@ -3277,6 +3339,17 @@ class I3D_UIexportSettings( bpy.types.PropertyGroup ):
                                     ( "KEEP_TRANSFORMS" , "Keep Transforms" , "Export without any changes" )   ],
                                     name    = "Axis Orientations",
                                     default = "BAKE_TRANSFORMS" )
+    i3D_exportBoundingVolumeMode  : bpy.props.EnumProperty   (
+                                    items = [   ( "CENTROID" , "Centroid" , "Sphere around the average vertex position" ),
+                                    ( "MINIMAL" , "Minimal Sphere" , "Smallest sphere enclosing all vertices, tighter for culling" )   ],
+                                    name    = "Bounding Volume",
+                                    default = "CENTROID" )
+    i3D_exportVertexCompressionMode : bpy.props.EnumProperty (
+                                    items = [   ( "MANUAL" , "Manual" , "Write the Vertex Compression Range of the objects unchecked" ),
+                                    ( "WARN" , "Warn" , "Write the Vertex Compression Range of the objects, report ranges larger than needed or too small" ),
+                                    ( "ENFORCE" , "Enforce" , "Write the smallest range holding all vertex positions of each shape" )   ],
+                                    name    = "Vertex Compression",
+                                    default = "WARN" )
     i3D_exportUseSoftwareFileName : bpy.props.BoolProperty   ( name = "Use Blender Filename",description="Export Location and Name are the same as the current *.blend File", default = dcc.SETTINGS_UI['i3D_exportUseSoftwareFileName']['defaultValue']  )
     i3D_updateXMLOnExport : bpy.props.BoolProperty   ( name = "Update XML on Export", description="Update the selected XML config Files when Exported",default = dcc.SETTINGS_UI['i3D_updateXMLOnExport']['defaultValue']  )
     i3D_exportFileLocation        : bpy.props.StringProperty ( name = "File Location", description="Target File, if extention does not match, it is replaced by .i3d")
@@ -0,0 +1,141 @@
+"""i3d_boundingVolumeUtil.py computes the bounding spheres (bvCenter, bvRadius) of shapes"""
+
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+print(__file__)
+
+import itertools
+import numpy as np
+
+BV_CENTROID = "CENTROID"
+BV_MINIMAL = "MINIMAL"
+
+_relativeEpsilon = 1e-7
+_maxIterations = 1000
+
+def transformPoints(points, matrix):
+    """
+    Returns the points transformed by a 4x4 matrix in one matrix product
+
+    :param points: (N,3) array
+    :param matrix: 4x4 matrix, anything numpy can convert (mathutils.Matrix, nested lists)
+    :returns: (N,3) float64 array
+    """
+
+    matrix = np.array(matrix, dtype=np.float64)
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    return points @ matrix[:3, :3].T + matrix[:3, 3]
+
+def getBoundingSphere(points, mode = BV_CENTROID):
+    """
+    Returns the bounding sphere of the points
+
+    :param points: (N,3) array, at least one point
+    :param mode: BV_CENTROID centered on the average point like the exporter always did,
+                 BV_MINIMAL the minimal enclosing sphere
+    :returns: (center, radius) center is a (3) float64 array
+    """
+
+    if BV_MINIMAL == mode:
+        return getMinimalSphere(points)
+    return getCentroidSphere(points)
+
+def getCentroidSphere(points):
+    """
+    Returns the sphere around the average of the points, enclosing all of them
+
+    Sum and distances are rounded like the mathutils.Vector loop it replaces (float32 vectors, lengths summed in double),
+    so the result is the same.
+    """
+
+    points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+    pointSum = np.add.accumulate(points, axis=0, dtype=np.float32)[-1]
+    center = pointSum * (np.float32(1.0) / np.float32(len(points)))
+    squares = ((points - center) ** 2).astype(np.float64)
+    radius = np.sqrt(squares[:, 0] + squares[:, 1] + squares[:, 2]).max()
+    return center.astype(np.float64), float(radius)
+
+def getMinimalSphere(points):
+    """
+    Returns the minimal sphere enclosing the points
+
+    Pivoting: the sphere of a support set of at most 4 points is grown by the farthest point outside of it
+    until every point is inside, each step is one vectorized distance pass over all points.
+    """
+
+    points = np.unique(np.asarray(points, dtype=np.float64).reshape(-1, 3), axis=0)
+    support = points[:1]
+    center, radius = points[0], 0.0
+    scale = max(float(np.abs(points).max()), 1.0)
+    for _ in range(_maxIterations):
+        distances = np.sqrt(((points - center) ** 2).sum(axis=1))
+        farthest = int(np.argmax(distances))
+        if distances[farthest] <= radius + _relativeEpsilon * scale:
+            break
+        sphere = getSupportSphere(np.vstack((support, points[farthest])))
+        if sphere is None:
+            break
+        support, center, radius = sphere
+    # enclose the last rounding errors as well
+    return center, float(np.sqrt(((points - center) ** 2).sum(axis=1)).max())
+
+def getSupportSphere(points):
+    """ Returns (support, center, radius) the smallest sphere through a subset of the points (at most 5) enclosing all of them """
+
+    best = None
+    for count in range(1, min(len(points), 4) + 1):
+        for subset in itertools.combinations(range(len(points)), count):
+            sphere = getCircumsphere(points[list(subset)])
+            if sphere is None:
+                continue
+            center, radius = sphere
+            if best is not None and radius >= best[2]:
+                continue
+            if np.sqrt(((points - center) ** 2).sum(axis=1)).max() <= radius * (1.0 + _relativeEpsilon) + _relativeEpsilon:
+                best = (points[list(subset)], center, radius)
+    return best
+
+def getCircumsphere(points):
+    """ Returns (center, radius) of the smallest sphere through all 1 to 4 points, None if they are degenerate """
+
+    origin = points[0]
+    if len(points) == 1:
+        return origin, 0.0
+    edges = points[1:] - origin
+    # center = origin + edges^T * x with (2 * edges * edges^T) x = |edges|^2, the center lies in the span of the edges
+    gram = 2.0 * (edges @ edges.T)
+    lengths = (edges ** 2).sum(axis=1)
+    if abs(np.linalg.det(gram)) <= 1e-12 * max(float(lengths.max()), 1e-300) ** len(edges):
+        return None
+    offset = edges.T @ np.linalg.solve(gram, lengths)
+    return origin + offset, float(np.sqrt((offset ** 2).sum()))
+
+if __name__ == "__main__":
+    """ Test function with dummy data """
+
+    print(__file__)
+    rng = np.random.default_rng(1)
+    testPoints = rng.normal(0.0, 1.0, (2000, 3))
+    testPoints[:, 0] *= 3.0
+    for testMode in (BV_CENTROID, BV_MINIMAL):
+        testCenter, testRadius = getBoundingSphere(testPoints, testMode)
+        print("{}: center {} radius {:g}".format(testMode, testCenter, testRadius))
+    cubePoints = np.array(list(itertools.product((-1.0, 1.0), repeat=3)))
+    print("cube: {}".format(getMinimalSphere(cubePoints)))
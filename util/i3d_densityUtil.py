@@ -22,7 +22,11 @@
 print(__file__)
 
 import math
-import mathutils
+import numpy as np
+try:
+    from . import i3d_weldUtil
+except ImportError:     # run as script
+    import i3d_weldUtil
 
 _max_tex_coord_sets = 4
 _flt_max = 3.402823466e+38 
@@ -167,53 +171,156 @@ def computeTriangleUvDensity(positions, uvs):
     uvDensity = uvDensity / 3.0
     return uvDensity
 
-def computeUvDensity( trianglesDict, verticesProperty, firstIndex, numIndices):
+def computeTriangleUvDensities(trianglePositions, triangleUvs):
+    """
+    computeTriangleUvDensity for all triangles at once
+
+    Differences are rounded to float32 and squared lengths summed in double like the mathutils.Vector math it replaces.
+
+    :param trianglePositions: (T,3,3) positions of the triangle vertices
+    :param triangleUvs: (T,3,2) uvs of the triangle vertices
+    :returns: (T) float64 array
+    """
+
+    positions = np.asarray(trianglePositions, dtype=np.float32).reshape(-1, 3, 3)
+    uvs = np.asarray(triangleUvs, dtype=np.float32).reshape(-1, 3, 2)
+    nextVertex = [1, 2, 0]
+    positionSquares = ((positions - positions[:, nextVertex]) ** 2).astype(np.float64)
+    uvSquares = ((uvs - uvs[:, nextVertex]) ** 2).astype(np.float64)
+    sqMagnPos = positionSquares[..., 0] + positionSquares[..., 1] + positionSquares[..., 2]
+    sqMagnUV = uvSquares[..., 0] + uvSquares[..., 1]
+    squashed = (sqMagnPos == 0).any(axis=1) | (sqMagnUV == 0).any(axis=1)     #squashed vertexes or uv coords
+    with np.errstate(divide='ignore', invalid='ignore'):
+        edgeDensity = np.sqrt(sqMagnUV / sqMagnPos)
+    uvDensity = (edgeDensity[:, 0] + edgeDensity[:, 1] + edgeDensity[:, 2]) / 3.0
+    uvDensity[squashed] = 0.0
+    return uvDensity
+
+class UvDensityStatistics():
+    """
+    Statistics of the good triangle uv densities of every (subset, uv set) pair
+
+    Every pair has its own count, mean, variance and minimum, arrays are (S,U) with U the uv sets up to four.
+    """
+
+    def __init__(self, subsetCount, uvSetCount):
+        self.count = np.zeros((subsetCount, uvSetCount), dtype=np.int64)
+        self.mean = np.zeros((subsetCount, uvSetCount), dtype=np.float64)
+        self.variance = np.zeros((subsetCount, uvSetCount), dtype=np.float64)
+        self.minimum = np.full((subsetCount, uvSetCount), _flt_max, dtype=np.float64)
+
+    def getUvDensities(self):
+        """ Returns the (S,U) uv densities by determineUvDensity, 0 for pairs without good triangles """
+
+        determined = np.maximum(self.minimum, np.maximum(self.mean - np.sqrt(self.variance), 0.75 * self.mean))
+        return np.where(self.count > 0, determined, 0.0)
+
+    def getAttributes(self, subsetIndex):
+        """ Returns the uvDensityX entries of a subset like computeUvDensity """
+
+        uvDensities = self.getUvDensities()
+        return {"uvDensity{}".format(setNumber): float(uvDensities[subsetIndex, setNumber]) for setNumber in range(uvDensities.shape[1])}
+
+def computeUvDensityStatistics(shapeBuffers):
+    """
+    Computes the UvDensityStatistics of all subsets and uv sets in one pass over the index buffer
+
+    Positions and uvs are formatted once per vertex, the triangle densities of all uv sets are computed together
+    and reduced per (subset, uv set) pair. Triangles outside of the subset ranges are ignored.
+
+    :param shapeBuffers: ShapeBuffers with filled subsets
+    :returns: UvDensityStatistics
+    """
+
+    subsetCount = shapeBuffers.subsetCount
+    uvSetCount = min(len(shapeBuffers.uvs), _max_tex_coord_sets)
+    statistics = UvDensityStatistics(subsetCount, uvSetCount)
+    if uvSetCount == 0 or subsetCount == 0:
+        return statistics
+
+    triangleVertices = np.asarray(shapeBuffers.indices, dtype=np.int64).reshape(-1, 3)
+    triangleSubsets = np.full(len(triangleVertices), -1, dtype=np.int64)
+    for subsetIndex, (firstIndex, numIndices) in enumerate(shapeBuffers.subsets[:, 2:4].tolist()):
+        triangleSubsets[firstIndex // 3:(firstIndex + numIndices) // 3] = subsetIndex
+    inSubset = triangleSubsets >= 0
+    triangleVertices = triangleVertices[inSubset]
+    triangleSubsets = triangleSubsets[inSubset]
+    # values as written to the file, (U,T,3,.) for all uv sets
+    trianglePositions = i3d_weldUtil.getFormattedValues(shapeBuffers.positions)[triangleVertices]
+    triangleUvs = i3d_weldUtil.getFormattedValues(np.stack(shapeBuffers.uvs[:uvSetCount]))[:, triangleVertices]
+    densities = computeTriangleUvDensities(np.broadcast_to(trianglePositions, (uvSetCount,) + trianglePositions.shape), triangleUvs)
+    densities = np.minimum(1.0, densities).reshape(uvSetCount, -1)
+
+    # one bin per (subset, uv set) pair
+    pairs = (triangleSubsets.reshape(1, -1) * uvSetCount + np.arange(uvSetCount).reshape(-1, 1)).ravel()
+    densities = densities.ravel()
+    good = ~isTriangleUvDensityUseless(densities)
+    pairs = pairs[good]
+    densities = densities[good]
+    pairCount = subsetCount * uvSetCount
+    count = np.bincount(pairs, minlength=pairCount)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.where(count > 0, np.bincount(pairs, densities, minlength=pairCount) / count, 0.0)
+    # two passes instead of updateMeanVariance: the squares are taken around the final mean, at least as exact as Welford
+    m2 = np.bincount(pairs, (densities - mean[pairs]) ** 2, minlength=pairCount)
+    minimum = np.full(pairCount, _flt_max, dtype=np.float64)
+    np.minimum.at(minimum, pairs, densities)
+    statistics.count = count.reshape(subsetCount, uvSetCount)
+    statistics.mean = mean.reshape(subsetCount, uvSetCount)
+    statistics.variance = np.where(count > 1, m2 / np.maximum(count - 1, 1), 0.0).reshape(subsetCount, uvSetCount)
+    statistics.minimum = minimum.reshape(subsetCount, uvSetCount)
+    return statistics
+
+def computeSubsetUvDensities(shapeBuffers):
+    """
+    Computes the uv densities of all subsets
+
+    :param shapeBuffers: ShapeBuffers with filled subsets
+    :returns: (S,len(uvs)) float64 array, uv sets above four are 0
+    """
+
+    uvDensities = np.zeros((shapeBuffers.subsetCount, len(shapeBuffers.uvs)), dtype=np.float64)
+    computed = computeUvDensityStatistics(shapeBuffers).getUvDensities()
+    uvDensities[:, :computed.shape[1]] = computed
+    return uvDensities
+
+def computeUvDensity( shapeBuffers, firstIndex, numIndices):
     """
     Computes the uv Denstiy for the given Shapes.
-    
-    :param trianglesDict: IndexBuffer data as triangle seperated dictionary
-    :param verticesProperty: Vertex Buffer data as dictionary
+
+    Reference for computeUvDensityStatistics, every uv set has its own statistics.
+
+    :param shapeBuffers: ShapeBuffers of the shape
     :param firstIndex: Start index for uvDensity calculation
     :param numIndices: Number of entries evaluated for the uv density calculation
     :returns: Returns a dictionary with uvDensityX entries
     """
-    verticesDict = verticesProperty['data']
     uvDensity = {}
     densitySet = []
-    for i in range(_max_tex_coord_sets):
-        if "uv{}".format(i) in verticesProperty and verticesProperty["uv{}".format(i)] == "true":
-            densitySet.append(i)
-            uvDensity["uvDensity{}".format(i)] = 0.0
+    for i in range(min(len(shapeBuffers.uvs), _max_tex_coord_sets)):
+        densitySet.append(i)
+        uvDensity["uvDensity{}".format(i)] = 0.0
     if len(densitySet) == 0:
         return uvDensity
     
-    minUVDensity = _flt_max          
-    atLeastOneGoodTriangle = False
-    meanVarianceData = OnlineMeanVarianceData()
+    # values as written to the file
+    triangleVertices = np.asarray(shapeBuffers.indices[firstIndex:firstIndex+numIndices], dtype=np.int64).reshape(-1, 3)
+    trianglePositions = i3d_weldUtil.getFormattedValues(shapeBuffers.positions[triangleVertices])
    
     for setNumber in densitySet:
-        indexBuffer = 0
-        for triangle in trianglesDict:
-            # print("indexBuffer: {}, triangle: {}, valid buffer Range: [{},{}]".format(indexBuffer,triangle,firstIndex,firstIndex+numIndices))
-            if firstIndex <= indexBuffer and indexBuffer < firstIndex+numIndices:  #must be in requested range of the indexbuffer
-                triangleVertices = [int(i) for i in triangle["vi"].strip().split(" ")]
-                positions = [ mathutils.Vector([float(i) for i in verticesDict[triangleVertices[0]]["p"].strip().split(" ")]),
-                            mathutils.Vector([float(i) for i in verticesDict[triangleVertices[1]]["p"].strip().split(" ")]),
-                            mathutils.Vector([float(i) for i in verticesDict[triangleVertices[2]]["p"].strip().split(" ")]) ]  
-                uvs = [ mathutils.Vector([float(i) for i in verticesDict[triangleVertices[0]]["t{}".format(setNumber)].strip().split(" ")]),
-                        mathutils.Vector([float(i) for i in verticesDict[triangleVertices[1]]["t{}".format(setNumber)].strip().split(" ")]),
-                            mathutils.Vector([float(i) for i in verticesDict[triangleVertices[2]]["t{}".format(setNumber)].strip().split(" ")]) ]
-                triangleUvDensity = min(1.0, computeTriangleUvDensity(positions, uvs))
-                if isTriangleUvDensityUseless(triangleUvDensity):
-                    indexBuffer += 3
-                    continue
-                meanVarianceData = StatisticsUtil.updateMeanVariance(triangleUvDensity, meanVarianceData)
-                minUVDensity = min(minUVDensity, triangleUvDensity)
-                atLeastOneGoodTriangle = True
-            indexBuffer += 3
+        minUVDensity = _flt_max
+        atLeastOneGoodTriangle = False
+        meanVarianceData = OnlineMeanVarianceData()
+        triangleUvs = i3d_weldUtil.getFormattedValues(shapeBuffers.uvs[setNumber][triangleVertices])
+        for triangleUvDensity in np.minimum(1.0, computeTriangleUvDensities(trianglePositions, triangleUvs)).tolist():
+            if isTriangleUvDensityUseless(triangleUvDensity):
+                continue
+            meanVarianceData = StatisticsUtil.updateMeanVariance(triangleUvDensity, meanVarianceData)
+            minUVDensity = min(minUVDensity, triangleUvDensity)
+            atLeastOneGoodTriangle = True
             
         if not atLeastOneGoodTriangle:
-            return uvDensity
+            continue
         
         mean, variance = StatisticsUtil.calculateMeanVariance(meanVarianceData)
         stdDeviation = math.sqrt(variance)
@@ -260,10 +367,26 @@ if __name__ == "__main__":
                 {"vi":"8 4 9" },
                 {"vi":"2 1 4" },
                 {"vi":"11 2 8" }]
-    print("computeUvDensity: {}".format(computeUvDensity(trianglesDict,verticesDict, 0, 0)))
-    
-    
-    
-    
-    
-    
+    try:
+        from .i3d_shapeUtil import ShapeBuffers
+    except ImportError:     # run as script
+        from i3d_shapeUtil import ShapeBuffers
+    shapeBuffers = ShapeBuffers()
+    shapeBuffers.positions = np.array([[float(i) for i in vertex["p"].split(" ")] for vertex in verticesDict["data"]], dtype=np.float32)
+    shapeBuffers.uvs = [np.array([[float(i) for i in vertex["t{}".format(setNumber)].split(" ")] for vertex in verticesDict["data"]], dtype=np.float32) for setNumber in range(2)]
+    shapeBuffers.indices = np.array([int(i) for triangle in trianglesDict for i in triangle["vi"].split(" ")], dtype=np.uint32)
+    print("computeUvDensity: {}".format(computeUvDensity(shapeBuffers, 0, 0)))
+    print("computeUvDensity: {}".format(computeUvDensity(shapeBuffers, 0, len(shapeBuffers.indices))))
+    # a third uv set at twice the scale of t0, the constant t1 has no good triangles
+    shapeBuffers.uvs.append(shapeBuffers.uvs[0] * 2.0)
+    shapeBuffers.subsets = np.array([[0, 12, 0, 18], [0, 14, 18, 18]], dtype=np.int64)
+    statistics = computeUvDensityStatistics(shapeBuffers)
+    print("computeUvDensityStatistics: {}".format(statistics.getUvDensities().tolist()))
+    referenceAttributes = [computeUvDensity(shapeBuffers, firstIndex, numIndices) for firstVertex, numVertices, firstIndex, numIndices in shapeBuffers.subsets.tolist()]
+    print("computeUvDensity per subset: {}".format(referenceAttributes))
+    referenceUvDensities = [[0.125, 0.0, 0.25], [0.125, 0.0, 0.25]]
+    assert np.allclose(statistics.getUvDensities(), referenceUvDensities, rtol=1e-12, atol=0.0), "computeUvDensityStatistics differs from the reference values"
+    for subsetIndex, attributes in enumerate(referenceAttributes):
+        assert np.allclose(list(statistics.getAttributes(subsetIndex).values()), list(attributes.values()), rtol=1e-12, atol=0.0), \
+            "computeUvDensityStatistics differs from computeUvDensity in subset {}".format(subsetIndex)
+    print("computeUvDensityStatistics matches the reference values")
@@ -0,0 +1,72 @@
+"""i3d_scratchUtil.py allocates large intermediate arrays in memory up to a budget and in temporary memmap files above it"""
+
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+print(__file__)
+
+import os
+import shutil
+import tempfile
+import numpy as np
+
+class ScratchSpace( object ):
+    """
+    Allocates arrays in memory while their total size stays below budgetBytes, larger ones spill to np.memmap files
+
+    The files live in a temporary folder which close() removes, arrays taken from the scratch space must not be
+    used after that (copies made by fancy indexing or astype are independent).
+    """
+
+    def __init__(self, budgetBytes):
+        self.budgetBytes = budgetBytes
+        self.memoryBytes = 0
+        self.spilledBytes = 0
+        self._folder = None
+        self._arrays = []
+
+    def empty(self, shape, dtype):
+        """ Returns an uninitialized array, a memmap if it does not fit into the budget anymore """
+
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if self.memoryBytes + size <= self.budgetBytes or size == 0:
+            self.memoryBytes += size
+            return np.empty(shape, dtype=dtype)
+        if self._folder is None:
+            self._folder = tempfile.mkdtemp(prefix="i3d_scratch_")
+        path = os.path.join(self._folder, "{:d}.dat".format(len(self._arrays)))
+        array = np.memmap(path, dtype=dtype, mode="w+", shape=shape)
+        self._arrays.append(array)
+        self.spilledBytes += size
+        return array
+
+    def close(self):
+        """ Removes the memmap files """
+
+        for array in self._arrays:
+            mmap = getattr(array, "_mmap", None)
+            if mmap is not None:
+                try:
+                    mmap.close()
+                except BufferError:     # views still in use, the file goes with them
+                    pass
+        self._arrays = []
+        if self._folder is not None:
+            shutil.rmtree(self._folder, ignore_errors=True)
+            self._folder = None
@@ -0,0 +1,219 @@
+"""i3d_shapeCacheUtil.py caches processed shapes by the content of their extracted data, in memory and optionally on disk"""
+
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+print(__file__)
+
+import os
+import json
+import hashlib
+import collections
+import numpy as np
+try:
+    from . import i3d_shapeUtil
+except ImportError:     # run as script
+    import i3d_shapeUtil
+
+CACHE_VERSION = 5       # increase if the processing changes its results, old entries are never hit again
+_arraySlots = ("positions", "normals", "colors", "blendWeights", "blendIndices", "generic", "indices", "subsets", "uvDensities", "removedTriangles", "vertexCacheMisses", "savedTextBytes")
+
+def getShapeKey(raw):
+    """
+    Returns the content hash of the extracted shape data
+
+    The extracted arrays already hold every export setting applied before processing (axis orientation,
+    exported attributes, modifiers, merge transforms), the processing settings are part of raw as well.
+
+    :param raw: the "Raw" dictionary of the shape data
+    :returns: hex string
+    """
+
+    digest = hashlib.blake2b(digest_size = 20)
+    digest.update("version {:d}".format(CACHE_VERSION).encode())
+    updateDigest(digest, raw)
+    return digest.hexdigest()
+
+def updateDigest(digest, value):
+    """ Adds a value (arrays, lists, dictionaries, strings, numbers, None) to the digest, including its structure """
+
+    if isinstance(value, np.ndarray):
+        value = np.ascontiguousarray(value)
+        digest.update("array {} {}".format(value.dtype.str, value.shape).encode())
+        digest.update(value.data)
+    elif isinstance(value, dict):
+        digest.update("dict {:d}".format(len(value)).encode())
+        for key in sorted(value):
+            updateDigest(digest, key)
+            updateDigest(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update("list {:d}".format(len(value)).encode())
+        for item in value:
+            updateDigest(digest, item)
+    else:
+        digest.update("{} {!r}".format(type(value).__name__, value).encode())
+
+def getBuffersSize(shapeBuffers):
+    """ Returns the approximate memory size of the buffers in bytes """
+
+    size = sum(getattr(shapeBuffers, slot).nbytes for slot in _arraySlots if getattr(shapeBuffers, slot) is not None)
+    size += sum(uv.nbytes for uv in shapeBuffers.uvs)
+    size += sum(text.nbytes + lengths.nbytes for text, lengths in shapeBuffers.encodedRows.values())
+    return size
+
+class ShapeCache( object ):
+    """
+    Least recently used cache of processed ShapeBuffers
+
+    Entries are kept in memory up to maxBytes, with a folder set they are stored there as well (one .npz file each)
+    and loaded again in later sessions. pruneFolder keeps the folder below maxBytes as well.
+    Files which cannot be stored or loaded are reported with warn, broken files are deleted and count as misses.
+    """
+
+    def __init__(self, maxBytes = 512 * 1024 * 1024):
+        self._entries = collections.OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self.maxBytes = maxBytes
+        self.folder = None
+        self.hits = 0
+        self.misses = 0
+        self.warn = print       # the exporter reports with dcc.UIShowWarning
+
+    def get(self, key):
+        """ Returns the cached ShapeBuffers of the key or None """
+
+        shapeBuffers = self._entries.get(key)
+        if shapeBuffers is not None:
+            self._entries.move_to_end(key)
+        elif self.folder is not None:
+            shapeBuffers = self._loadEntry(key)
+            if shapeBuffers is not None:
+                self._addEntry(key, shapeBuffers)
+        if shapeBuffers is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return shapeBuffers
+
+    def put(self, key, shapeBuffers):
+        """ Adds processed ShapeBuffers """
+
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return
+        self._addEntry(key, shapeBuffers)
+        if self.folder is not None:
+            self._storeEntry(key, shapeBuffers)
+
+    def clear(self):
+        self._entries.clear()
+        self._sizes.clear()
+        self._bytes = 0
+
+    def pruneFolder(self):
+        """ Deletes the least recently used files of the folder until the rest fits into maxBytes, and left over temporary files """
+
+        if self.folder is None or not os.path.isdir(self.folder):
+            return
+        files = []
+        for entry in os.scandir(self.folder):
+            if entry.name.endswith(".tmp"):
+                self._deleteFile(entry.path)
+            elif entry.name.endswith(".npz") and entry.is_file():
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        folderBytes = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if folderBytes <= self.maxBytes:
+                break
+            self._deleteFile(path)
+            folderBytes -= size
+
+    def getStatistics(self):
+        """ Returns a text with the hit rate and the memory use """
+
+        return "shape cache: {:d} hits, {:d} misses, {:d} entries, {:.1f} MB".format(
+            self.hits, self.misses, len(self._entries), self._bytes / (1024.0 * 1024.0))
+
+    def _addEntry(self, key, shapeBuffers):
+        size = getBuffersSize(shapeBuffers)
+        self._entries[key] = shapeBuffers
+        self._sizes[key] = size
+        self._bytes += size
+        while self._bytes > self.maxBytes and len(self._entries) > 1:
+            oldKey, _ = self._entries.popitem(last = False)
+            self._bytes -= self._sizes.pop(oldKey)
+
+    def _getPath(self, key):
+        return os.path.join(self.folder, key + ".npz")
+
+    def _storeEntry(self, key, shapeBuffers):
+        arrays = {slot: getattr(shapeBuffers, slot) for slot in _arraySlots if getattr(shapeBuffers, slot) is not None}
+        for uvIndex, uv in enumerate(shapeBuffers.uvs):
+            arrays["uv{:d}".format(uvIndex)] = uv
+        for name, (text, lengths) in shapeBuffers.encodedRows.items():
+            arrays["rows_" + name] = text
+            arrays["rowLengths_" + name] = lengths
+        arrays["materialSlotNames"] = np.array(json.dumps(shapeBuffers.materialSlotNames))
+        try:
+            os.makedirs(self.folder, exist_ok = True)
+            temporaryPath = self._getPath(key) + ".tmp"
+            with open(temporaryPath, "wb") as file:
+                np.savez(file, **arrays)
+            os.replace(temporaryPath, self._getPath(key))
+        except OSError as exception:
+            self.warn("shape cache: cannot store {} ({})".format(key, exception))
+
+    def _loadEntry(self, key):
+        path = self._getPath(key)
+        if not os.path.isfile(path):
+            return None
+        try:
+            with np.load(path, allow_pickle = False) as arrays:
+                shapeBuffers = i3d_shapeUtil.ShapeBuffers()
+                for slot in _arraySlots:
+                    if slot in arrays.files:
+                        setattr(shapeBuffers, slot, arrays[slot])
+                uvCount = len([name for name in arrays.files if name.startswith("uv") and name[2:].isdigit()])
+                shapeBuffers.uvs = [arrays["uv{:d}".format(uvIndex)] for uvIndex in range(uvCount)]
+                for name in arrays.files:
+                    if name.startswith("rows_"):
+                        shapeBuffers.encodedRows[name[5:]] = (arrays[name], arrays["rowLengths_" + name[5:]])
+                shapeBuffers.materialSlotNames = json.loads(str(arrays["materialSlotNames"]))
+        except Exception as exception:     # truncated or otherwise broken files (zipfile.BadZipFile, EOFError, ..)
+            self.warn("shape cache: cannot load {}, deleting it ({})".format(key, exception))
+            self._deleteFile(path)
+            return None
+        self._touchFile(path)
+        return shapeBuffers
+
+    def _touchFile(self, path):
+        """ Marks the file as recently used for pruneFolder """
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _deleteFile(self, path):
+        try:
+            os.remove(path)
+        except OSError as exception:
+            self.warn("shape cache: cannot delete {} ({})".format(path, exception))
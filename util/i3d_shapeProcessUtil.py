@@ -0,0 +1,139 @@
+"""i3d_shapeProcessUtil.py completes the extracted shape data (welding, subsets, uv density, text) without bpy, in worker processes if wanted"""
+
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+print(__file__)
+
+import os
+import runpy
+import multiprocessing
+import concurrent.futures
+import numpy as np
+try:
+    from . import i3d_weldUtil, i3d_shapeUtil, i3d_densityUtil, i3d_vertexCacheUtil, i3d_scratchUtil, i3d_triangleCleanupUtil
+except ImportError:     # run as script or in a worker process
+    import i3d_weldUtil, i3d_shapeUtil, i3d_densityUtil, i3d_vertexCacheUtil, i3d_scratchUtil, i3d_triangleCleanupUtil
+
+def processShapeData(nodeData):
+    """
+    Completes the shape data extracted by the dcc
+
+    The "Raw" arrays are welded into ShapeBuffers, cleaned of degenerate and duplicate triangles and reordered for
+    the vertex cache if set, subsets and uv densities are computed and the text rows are encoded with the text precision.
+    Shape data without "Raw" arrays (curves, merged shapes) is returned unchanged.
+
+    :param nodeData: shape data dictionary, "Raw" is replaced by "Buffers"
+    :returns: nodeData
+    """
+
+    raw = nodeData.pop("Raw", None)
+    if raw is None:
+        return nodeData
+
+    tolerances = raw["weldTolerances"]
+    attributes = [(raw["positions"], True, tolerances["position"])]
+    if raw["normals"] is not None:
+        attributes.append((raw["normals"], False, tolerances["normal"]))
+    if raw["colors"] is not None:
+        attributes.append((raw["colors"], False, tolerances["color"]))
+    for uv in raw["uvs"]:
+        attributes.append((uv, False, tolerances["uv"]))
+    if raw["skinWeights"] is not None:
+        attributes.append((raw["skinWeights"], True, 0.0))
+        attributes.append((raw["skinIndices"], True, 0.0))
+    # large meshes are welded in blocks of triangles, the per corner arrays go to scratch files above the memory budget
+    scratch = i3d_scratchUtil.ScratchSpace(raw["memoryBudget"]) if raw["chunkTriangles"] > 0 else None
+    try:
+        cornerLoops, cornerVertices, firstCorners, indices, subsetTriangles = i3d_weldUtil.weldShapeCorners(
+            raw["materials"], raw["triangleOrder"], raw["subsetTriangles"], raw["triangleLoops"], raw["loopVertices"], attributes,
+            raw["chunkTriangles"], scratch)
+        vertexLoops = cornerLoops[firstCorners]
+        vertexVertices = cornerVertices[firstCorners]
+        indices = np.array(indices, dtype=np.int64)
+        del cornerLoops, cornerVertices, firstCorners
+    finally:
+        if scratch is not None:
+            scratch.close()
+
+    buffers = i3d_shapeUtil.ShapeBuffers()
+    buffers.positions = raw["positions"][vertexVertices].astype(np.float32)
+    if raw["normals"] is not None:
+        buffers.normals = raw["normals"][vertexLoops].astype(np.float32)
+    if raw["colors"] is not None:
+        buffers.colors = raw["colors"][vertexLoops]
+    buffers.uvs = [uv[vertexLoops] for uv in raw["uvs"]]
+    if raw["skinWeights"] is not None:
+        buffers.blendWeights = raw["skinWeights"][vertexVertices]
+        buffers.blendIndices = raw["skinIndices"][vertexVertices]
+    buffers.indices = indices.astype(np.uint32)
+    buffers.subsets = i3d_weldUtil.getSubsetRanges(indices, subsetTriangles)
+    if raw["cleanTriangles"]:
+        i3d_triangleCleanupUtil.cleanShapeBuffers(buffers)
+    if raw["vertexCacheSize"] > 0:
+        i3d_vertexCacheUtil.optimizeShapeBuffers(buffers, raw["vertexCacheSize"], nodeData.get("CountVertexCacheMisses", False))
+    buffers.materialSlotNames = list(raw["materialSlotNames"])
+    buffers.uvDensities = i3d_densityUtil.computeSubsetUvDensities(buffers)
+    i3d_shapeUtil.encodeShapeBuffers(buffers, raw["textPrecision"])
+    nodeData["Buffers"] = buffers
+    return nodeData
+
+def processShapes(nodeDataList, workerCount = 1):
+    """
+    Runs processShapeData for all shapes, the results keep the order of nodeDataList
+
+    Exceptions of the process pool are raised, the caller can fall back to serial processing (workerCount 1)
+    as the input data is left unchanged by the pool.
+
+    :param nodeDataList: list of shape data dictionaries
+    :param workerCount: number of worker processes, 1 processes serially in this process, 0 uses one per cpu core
+    :returns: list of completed shape data
+    """
+
+    pending = [index for index, nodeData in enumerate(nodeDataList) if "Raw" in nodeData]
+    if workerCount <= 0:
+        workerCount = os.cpu_count() or 1
+    workerCount = min(workerCount, len(pending))
+    if workerCount <= 1:
+        return [processShapeData(nodeData) for nodeData in nodeDataList]
+
+    initializer, initargs = getWorkerInitializer()
+    results = list(nodeDataList)
+    # spawned workers do not inherit the state of the blender process, the same on every platform
+    with concurrent.futures.ProcessPoolExecutor(max_workers = workerCount, mp_context = multiprocessing.get_context("spawn"),
+                                                initializer = initializer, initargs = initargs) as executor:
+        for index, nodeData in zip(pending, executor.map(processShapeData, [nodeDataList[index] for index in pending])):
+            results[index] = nodeData
+    return results
+
+def getWorkerInitializer():
+    """
+    Returns (initializer, initargs) of the worker processes
+
+    Workers import this module and the ShapeBuffers class through the add-on package like the blender process does,
+    i3d_workerInitUtil registers the package there without running its __init__ (bpy). sys.path stays unchanged.
+    Run outside of the package (as script) the workers need no initializer.
+    """
+
+    packageName = (__package__ or "").rpartition(".")[0]
+    if not packageName:
+        return None, ()
+    utilFolder = os.path.dirname(os.path.abspath(__file__))
+    initGlobals = {"packageName": packageName, "packageFolder": os.path.dirname(utilFolder)}
+    return runpy.run_path, (os.path.join(utilFolder, "i3d_workerInitUtil.py"), initGlobals)
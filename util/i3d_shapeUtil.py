@@ -0,0 +1,225 @@
+"""i3d_shapeUtil.py holds the array based buffers of an exported shape"""
+
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+print(__file__)
+
+import math
+import numpy as np
+try:
+    from . import i3d_textEncodeUtil
+except ImportError:     # run as script or in a worker process
+    import i3d_textEncodeUtil
+
+TEXT_SECTIONS = ("positions", "normals", "uvs", "colors", "blendWeights")     # attributes of savedTextBytes
+
+class ShapeBuffers( object ):
+    """
+    Vertex, index and subset buffers of a shape
+
+    Filled by the dcc from the welded mesh data and kept as arrays until the writer formats them to text.
+    Optional vertex attributes are None (uvs an empty list) if the shape does not export them.
+    """
+
+    __slots__ = ("positions", "normals", "colors", "uvs", "blendWeights", "blendIndices", "generic",
+                 "indices", "subsets", "materialSlotNames", "uvDensities", "encodedRows", "removedTriangles", "vertexCacheMisses", "savedTextBytes")
+
+    def __init__(self):
+        self.positions = np.zeros((0, 3), dtype=np.float32)     # (N,3) axis already baked
+        self.normals = None                                     # (N,3)
+        self.colors = None                                      # (N,4) sRGB
+        self.uvs = []                                           # list of (N,2), one per uv set
+        self.blendWeights = None                                # (N,K) skin weights, None for single blend weights
+        self.blendIndices = None                                # (N,K) skin or (N,1) merge group indices
+        self.generic = None                                     # (N) merge children value
+        self.indices = np.zeros(0, dtype=np.uint32)             # (3*T) vertex indices of the triangles
+        self.subsets = np.zeros((0, 4), dtype=np.int64)         # (S,4) firstVertex, numVertices, firstIndex, numIndices
+        self.materialSlotNames = []                             # S entries, None if not set
+        self.uvDensities = np.zeros((0, 0), dtype=np.float64)   # (S,len(uvs))
+        self.encodedRows = {}                                   # (text, lengths) formatted ahead of writing, see encodeShapeBuffers
+        self.removedTriangles = np.zeros(2, dtype=np.int64)     # degenerate and duplicate triangles removed after welding
+        self.vertexCacheMisses = np.full(2, -1, dtype=np.int64) # vertex transformations before and after the vertex cache order, -1 not counted
+        self.savedTextBytes = np.zeros(len(TEXT_SECTIONS), dtype=np.int64)  # by the text precision, see encodeShapeBuffers
+
+    @property
+    def vertexCount(self):
+        return len(self.positions)
+
+    @property
+    def triangleCount(self):
+        return len(self.indices) // 3
+
+    @property
+    def subsetCount(self):
+        return len(self.subsets)
+
+VERTEX_COMPRESSION_RANGES = (0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0, 128.0, 256.0)    # values of i3D_vertexCompressionRange
+
+def getVertexCompressionRange(positions):
+    """
+    Returns the smallest vertexCompressionRange which holds every position coordinate, None if no range is large enough
+
+    :param positions: (N,3) final shape positions
+    :returns: the range as formatted in the .i3d ("0.5", "1", .., "256") or None
+    """
+
+    extent = float(np.abs(positions).max()) if len(positions) else 0.0
+    for compressionRange in VERTEX_COMPRESSION_RANGES:
+        if extent <= compressionRange:
+            return "{:g}".format(compressionRange)
+    return None
+
+def formatRows(values, digits = 6):
+    """
+    Returns the text of every row of the array, floats formatted with "{:g}" and integers with "{:d}", separated by a space
+
+    :param values: (N) or (N,K) array
+    :param digits: significant digits of floats, 2 to 6 ("{:.<digits>g}")
+    :returns: "S" array of N ascii rows, see i3d_textEncodeUtil.encodeRows
+    """
+
+    return i3d_textEncodeUtil.encodeRows(values, digits)
+
+def getTextSize(rows):
+    """ Returns the number of characters of the text rows """
+
+    return int(np.char.str_len(rows).sum())
+
+def quantizePositions(positions, digits):
+    """
+    Returns the positions rounded to digits significant digits of their vertexCompressionRange
+
+    The range is the smallest one holding the positions, as written with "Auto", or the largest coordinate above 256.
+    Positions far below the range keep no more digits than the range itself.
+
+    :param positions: (N,3) final shape positions
+    :param digits: significant digits, 2 to 6
+    :returns: (N,3) float64 positions
+    """
+
+    positions = np.asarray(positions, dtype=np.float64)
+    compressionRange = getVertexCompressionRange(positions)
+    compressionRange = float(compressionRange) if compressionRange is not None else float(np.abs(positions).max())
+    step = 10.0 ** (math.ceil(math.log10(compressionRange)) - digits)
+    return np.round(positions / step) * step
+
+def snapBlendWeights(weights):
+    """
+    Returns the skin weights rounded to multiples of 1/255, the sum of every vertex stays on the 1/255 grid as well
+
+    The weights rounded down take the missing steps in the order of their remainders.
+
+    :param weights: (N,K) skin weights
+    :returns: (N,K) float64 weights
+    """
+
+    scaled = np.asarray(weights, dtype=np.float64) * 255.0
+    snapped = np.floor(scaled)
+    remainders = scaled - snapped
+    missing = (np.rint(scaled.sum(axis=1)) - snapped.sum(axis=1)).astype(np.int64)
+    order = np.argsort(-remainders, axis=1, kind="stable")
+    rank = np.empty_like(order)
+    np.put_along_axis(rank, order, np.arange(scaled.shape[1]).reshape(1, -1), axis=1)
+    snapped += rank < missing.reshape(-1, 1)
+    return snapped / 255.0
+
+def getBufferValues(shapeBuffers, name):
+    """ Returns the array of an encoded row name: a slot name, "uv0".."uv3" or "triangles" (indices as (T,3)) """
+
+    if name == "triangles":
+        return shapeBuffers.indices.reshape(-1, 3)
+    if name.startswith("uv"):
+        return shapeBuffers.uvs[int(name[2:])]
+    return getattr(shapeBuffers, name)
+
+def getRowNames(shapeBuffers):
+    """ Returns the row names (see getBufferValues) of all attributes the buffers have """
+
+    names = ["positions", "normals", "colors", "blendWeights", "blendIndices", "generic", "triangles"]
+    names += ["uv{:d}".format(uvIndex) for uvIndex in range(len(shapeBuffers.uvs))]
+    return [name for name in names if getBufferValues(shapeBuffers, name) is not None]
+
+def getTextSection(name):
+    """ Returns the TEXT_SECTIONS entry of an encoded row name, None for the attributes written at full precision """
+
+    if name.startswith("uv"):
+        return "uvs"
+    return name if name in TEXT_SECTIONS else None
+
+def getPrecisionValues(shapeBuffers, name, precision):
+    """
+    Returns the values of an encoded row name as they are written with the text precision and their significant digits
+
+    :param precision: dictionary of the dcc (see dccBlender.getTextPrecision) or None for full precision
+    :returns: (values, digits)
+    """
+
+    values = getBufferValues(shapeBuffers, name)
+    section = getTextSection(name)
+    if precision is None or section is None:
+        return values, 6
+    if "positions" == section:
+        if precision["relativePositions"]:
+            return quantizePositions(values, precision["position"]), 6
+        return values, precision["position"]
+    if "blendWeights" == section:
+        if precision["snapWeights"]:
+            return snapBlendWeights(values), 3      # 3 digits tell every multiple of 1/255 apart
+        return values, 6
+    return values, precision[{"normals": "normal", "uvs": "uv", "colors": "color"}[section]]
+
+def encodeShapeBuffers(shapeBuffers, precision = None):
+    """
+    Formats all vertex attributes and the triangles to text ahead of writing, the writer takes them with getEncodedRows
+
+    The rows are kept without padding (i3d_textEncodeUtil.compactRows) until the writer expands the rows of one shape.
+    With a text precision attributes are written with less digits (see getPrecisionValues),
+    the bytes saved compared to full precision are counted in shapeBuffers.savedTextBytes.
+    """
+
+    savedTextBytes = np.zeros(len(TEXT_SECTIONS), dtype=np.int64)
+    for name in getRowNames(shapeBuffers):
+        values, digits = getPrecisionValues(shapeBuffers, name, precision)
+        rows = formatRows(values, digits)
+        if getTextSection(name) is not None and (values is not getBufferValues(shapeBuffers, name) or digits != 6):
+            fullRows = formatRows(getBufferValues(shapeBuffers, name))
+            savedTextBytes[TEXT_SECTIONS.index(getTextSection(name))] += getTextSize(fullRows) - getTextSize(rows)
+        shapeBuffers.encodedRows[name] = i3d_textEncodeUtil.compactRows(rows)
+    shapeBuffers.savedTextBytes = savedTextBytes
+
+def getEncodedRows(shapeBuffers, name):
+    """ Returns the "S" text rows of an attribute (see getBufferValues), formatted now at full precision if encodeShapeBuffers was not run """
+
+    if name in shapeBuffers.encodedRows:
+        return i3d_textEncodeUtil.expandRows(*shapeBuffers.encodedRows[name])
+    return formatRows(getBufferValues(shapeBuffers, name))
+
+def getEncodedSize(shapeBuffers):
+    """ Returns the approximate size of the text rows in bytes, attributes which are not encoded yet are formatted """
+
+    size = 0
+    for name in getRowNames(shapeBuffers):
+        if name in shapeBuffers.encodedRows:
+            text, lengths = shapeBuffers.encodedRows[name]
+            size += len(text) + len(lengths)
+        else:
+            rows = getEncodedRows(shapeBuffers, name)
+            size += getTextSize(rows) + len(rows)
+    return size
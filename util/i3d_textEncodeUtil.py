@@ -0,0 +1,242 @@
+"""i3d_textEncodeUtil.py formats whole float and integer arrays to "{:g}" and "{:d}" text with numpy"""
+
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+print(__file__)
+
+import numpy as np
+try:
+    from . import i3d_weldUtil
+except ImportError:     # run as script or in a worker process
+    import i3d_weldUtil
+
+# Every text is built from a template of character codes, codes below 10 take a character of the value:
+# 0-5 the six mantissa digits, 6 the hundreds and 8-9 the tens and ones of the exponent. The others are fixed characters.
+_valueCodes = 10
+_literals = "\0-.0e+naif"
+_literalCodes = {char: _valueCodes + index for index, char in enumerate(_literals)}
+_literalChars = np.frombuffer(_literals.encode("ascii"), dtype=np.uint8)
+_floatWidth = 13        # "-1.23456e-308"
+_expKinds = 14          # 10 fixed point exponents -4..5, 4 scientific: sign of the exponent x 2 or 3 digits
+_specialTexts = ("0", "-0", "nan", "inf", "-inf")      # mantissa codes 0, -1, 1, 2, 3 of getFormatDigits
+_blockValues = 1 << 16
+_digitPairs = np.array([(48 + pair // 10) | ((48 + pair % 10) << 8) for pair in range(100)], dtype="<u2")   # "00".."99"
+
+def _getFloatTemplate(negative, expKind, numDigits):
+    """ Returns the codes of the "{:g}" text of a value with numDigits significant digits """
+
+    digits = list(range(numDigits))
+    if expKind < 10:
+        exponent = expKind - 4
+        if exponent >= 0 and numDigits <= exponent + 1:
+            codes = digits + ["0"] * (exponent + 1 - numDigits)
+        elif exponent >= 0:
+            codes = digits[:exponent + 1] + ["."] + digits[exponent + 1:]
+        else:
+            codes = ["0", "."] + ["0"] * (-exponent - 1) + digits
+    else:
+        codes = digits[:1] + (["."] + digits[1:] if numDigits > 1 else [])
+        codes += ["e", "-" if expKind % 2 else "+"] + ([8, 9] if expKind < 12 else [6, 8, 9])
+    if negative:
+        codes = ["-"] + codes
+    codes = [_literalCodes[code] if isinstance(code, str) else code for code in codes]
+    return codes + [_literalCodes["\0"]] * (_floatWidth - len(codes))
+
+def _getFloatTemplates():
+    """ Returns the template table, row (negative * _expKinds + expKind) * 6 + numDigits - 1, the special texts follow """
+
+    templates = [_getFloatTemplate(negative, expKind, numDigits)
+                 for negative in (False, True) for expKind in range(_expKinds) for numDigits in range(1, 7)]
+    for text in _specialTexts:
+        templates.append([_literalCodes[char] for char in text] + [_literalCodes["\0"]] * (_floatWidth - len(text)))
+    return np.array(templates, dtype=np.int32)
+
+_floatTemplates = _getFloatTemplates()
+_specialRows = len(_floatTemplates) - len(_specialTexts)
+_powersOfTen = 10 ** np.arange(19, dtype=np.int64)
+
+def encodeFloats(values, digits = 6):
+    """
+    Returns the "{:g}" text of every value as characters, the "{:.<digits>g}" text with less digits
+
+    The digits come from getFormatDigits, the text around them from a table of templates (sign, exponent and
+    number of significant digits) which is made once.
+
+    :param values: array of floats, any shape
+    :param digits: significant digits, 2 to 6
+    :returns: (N,13) uint8 array, one row per value, the text padded with zero bytes
+    """
+
+    mantissa, exponent = i3d_weldUtil.getFormatDigits(np.asarray(values, dtype=np.float64).ravel(), digits)
+    numValues = len(mantissa)
+    number = np.abs(mantissa).astype(np.int32)
+    regular = number >= 10 ** (digits - 1)
+    number *= 10 ** (6 - digits)        # the same six digits with trailing zeros
+    trailingZeros = sum((number % power == 0).astype(np.int32) for power in (10, 100, 1000, 10000, 100000))
+    expKind = np.where((exponent >= -4) & (exponent < digits), exponent + 4,
+                       10 + (exponent < 0) + 2 * (np.abs(exponent) >= 100)).astype(np.int32)
+    rows = ((mantissa < 0) * _expKinds + expKind) * 6 + 5 - trailingZeros
+    special = _specialRows + np.select([mantissa == 0, mantissa == -1, mantissa == 1, mantissa == 2], [0, 1, 2, 3], 4)
+    codes = np.take(_floatTemplates, np.where(regular, rows, special), axis=0)
+    # one row of characters per value to pick from: digits, exponent digits and the fixed characters
+    chars = np.empty((numValues, (_valueCodes + len(_literals)) // 2 + 1), dtype="<u2")
+    number[~regular] = 0
+    chars[:, 0] = _digitPairs[number // 10000]
+    chars[:, 1] = _digitPairs[number // 100 % 100]
+    chars[:, 2] = _digitPairs[number % 100]
+    exponent = np.minimum(np.abs(exponent), 999).astype(np.int32)
+    chars[:, 3] = 48 + exponent // 100
+    chars[:, 4] = _digitPairs[exponent % 100]
+    chars = chars.view(np.uint8)
+    chars[:, _valueCodes:_valueCodes + len(_literals)] = _literalChars
+    codes += (np.arange(numValues, dtype=np.int32) * chars.shape[1]).reshape(-1, 1)
+    return np.take(chars.ravel(), codes)
+
+def encodeIntegers(values):
+    """
+    Returns the "{:d}" text of every value as characters
+
+    :param values: array of integers, any shape
+    :returns: (N,W) uint8 array, one row per value, the text padded with zero bytes
+    """
+
+    values = np.asarray(values).astype(np.int64).ravel()
+    number = np.abs(values)
+    numDigits = np.maximum(np.searchsorted(_powersOfTen, number, side="right"), 1)
+    width = int(numDigits.max()) if len(values) else 1
+    chars = np.empty((len(values), width + 1), dtype=np.uint8)
+    chars[:, 0] = np.where(values < 0, ord("-"), 0)
+    for power in range(width):
+        chars[:, width - power] = np.where(numDigits > power, number // _powersOfTen[power] % 10 + 48, 0)
+    return chars
+
+def _packRows(chars):
+    """ Returns the rows of a character matrix as "S" array with the zero bytes inside the rows removed """
+
+    return expandRows(chars[chars != 0], np.count_nonzero(chars, axis=1))
+
+def compactRows(rows):
+    """
+    Returns the text rows without their padding, kept like this until they are written
+
+    :param rows: "S" array as from encodeRows
+    :returns: (text, lengths) the uint8 characters of all rows one after another and the length of every row
+    """
+
+    chars = np.ascontiguousarray(rows).view(np.uint8).reshape(len(rows), rows.itemsize)
+    filled = chars != 0
+    return chars[filled], np.count_nonzero(filled, axis=1).astype(np.min_scalar_type(chars.shape[1]))
+
+def expandRows(text, lengths):
+    """ Returns the "S" array of the rows of compactRows """
+
+    lengths = np.asarray(lengths, dtype=np.int64)
+    width = max(int(lengths.max()), 1) if len(lengths) else 1
+    # the characters of row r move from their place in text to r * width onwards
+    offsets = np.arange(len(lengths)) * width - (np.cumsum(lengths) - lengths)
+    padded = np.zeros(len(lengths) * width, dtype=np.uint8)
+    padded[np.arange(len(text)) + np.repeat(offsets, lengths)] = text
+    return padded.view("S{:d}".format(width))
+
+def encodeRows(values, digits = 6):
+    """
+    Returns the text of every row of the array, floats formatted with "{:g}" and integers with "{:d}", separated by a space
+
+    :param values: (N) or (N,K) array
+    :param digits: significant digits of floats, 2 to 6 ("{:.<digits>g}")
+    :returns: "S" array of N ascii rows
+    """
+
+    values = np.asarray(values)
+    if values.ndim == 1:
+        values = values.reshape(-1, 1)
+    numRows, numColumns = values.shape
+    blockRows = max(_blockValues // max(numColumns, 1), 1)
+    blocks = []
+    for first in range(0, numRows, blockRows):
+        block = values[first:first + blockRows]
+        chars = (encodeFloats(block, digits) if values.dtype.kind == 'f' else encodeIntegers(block)).reshape(len(block), numColumns, -1)
+        separators = np.full((len(block), numColumns, 1), ord(" "), dtype=np.uint8)
+        separators[:, -1] = 0
+        blocks.append(_packRows(np.concatenate((chars, separators), axis=2).reshape(len(block), -1)))
+    if not blocks:
+        return np.zeros(0, dtype="S1")
+    width = max(block.itemsize for block in blocks)
+    return np.concatenate([block.astype("S{:d}".format(width)) for block in blocks])
+
+def joinLines(pieces, first = 0, last = None):
+    """
+    Returns the lines first..last as one ascii text, every line is the concatenation of the pieces
+
+    :param pieces: list of str (the same in every line) and "S" arrays (one text per line, as from encodeRows)
+    :returns: bytes
+    """
+
+    if last is None:
+        last = min(len(piece) for piece in pieces if not isinstance(piece, str))
+    count = last - first
+    columns = []
+    for piece in pieces:
+        if isinstance(piece, str):
+            columns.append(np.broadcast_to(np.frombuffer(piece.encode("ascii"), dtype=np.uint8), (count, len(piece))))
+        else:
+            piece = np.ascontiguousarray(piece[first:last])
+            columns.append(piece.view(np.uint8).reshape(count, piece.itemsize))
+    chars = np.concatenate(columns, axis=1).ravel()
+    return chars[chars != 0].tobytes()
+
+def formatFloats(values):
+    """ Returns the "{:g}" text of every value as list of str """
+
+    return encodeRows(np.asarray(values, dtype=np.float64).ravel()).astype(str).tolist()
+
+if __name__ == "__main__":
+    """ Test function with dummy data, the text has to be the same as python formats it """
+
+    print(__file__)
+    rng = np.random.default_rng(1)
+    testValues = np.array([0.0, -0.0, 1.0, -1.0, 0.1, 1e-4, 9.999995e-5, 1e-5, 123456.5, 999999.5, 1e5, 1e6, 1e16, 1e22,
+                           1e100, -1e-100, 1e300, 1.7976931348623157e308, 5e-324, 0.333333333, 1.0000005, 2.5e-7,
+                           -12.34565, np.nan, -np.nan, np.inf, -np.inf])
+    testValues = np.concatenate((testValues,
+                                 rng.normal(0.0, 100.0, 100000).astype(np.float32),
+                                 rng.uniform(-1.0, 1.0, 100000),
+                                 np.round(rng.uniform(-1.0, 1.0, 100000), 3),
+                                 rng.standard_normal(100000) * 10.0 ** rng.integers(-320, 308, 100000)))
+    texts = [text.decode("ascii") for text in encodeRows(testValues).tolist()]
+    mismatches = sum(1 for value, text in zip(testValues.tolist(), texts) if "{:g}".format(value) != text)
+    assert mismatches == 0, "encodeRows floats: {:d} of {:d} values differ from str.format".format(mismatches, len(texts))
+    for testDigits in range(2, 6):
+        texts = [text.decode("ascii") for text in encodeRows(testValues, testDigits).tolist()]
+        mismatches = sum(1 for value, text in zip(testValues.tolist(), texts) if "{:.{}g}".format(value, testDigits) != text)
+        assert mismatches == 0, "encodeRows floats with {:d} digits: {:d} values differ from str.format".format(testDigits, mismatches)
+    testIntegers = np.concatenate(([0, -1, 9, 10, -10, 2 ** 63 - 1, -2 ** 63 + 1], rng.integers(-10 ** 6, 10 ** 6, 10000)))
+    texts = [text.decode("ascii") for text in encodeRows(testIntegers).tolist()]
+    mismatches = sum(1 for value, text in zip(testIntegers.tolist(), texts) if "{:d}".format(value) != text)
+    assert mismatches == 0, "encodeRows integers: {:d} of {:d} values differ from str.format".format(mismatches, len(texts))
+    testRows = rng.normal(0.0, 1.0, (1000, 3)).astype(np.float32)
+    testTriangles = rng.integers(0, 1000, (1000, 3))
+    lines = joinLines(["\n<v p=\"", encodeRows(testRows), "\" vi=\"", encodeRows(testTriangles), "\" />"]).decode("ascii")
+    expected = "".join("\n<v p=\"{:g} {:g} {:g}\" vi=\"{:d} {:d} {:d}\" />".format(*row, *triangle)
+                       for row, triangle in zip(testRows.tolist(), testTriangles.tolist()))
+    assert lines == expected, "joinLines differs from str.format"
+    testTexts = encodeRows(testRows)
+    assert np.array_equal(expandRows(*compactRows(testTexts)), testTexts), "expandRows differs from the rows of compactRows"
+    print("encodeRows and joinLines match str.format, compactRows and expandRows round trip")
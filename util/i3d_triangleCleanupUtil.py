@@ -0,0 +1,119 @@
+"""i3d_triangleCleanupUtil.py removes degenerate and duplicate triangles from the welded shape buffers"""
+
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+print(__file__)
+
+import numpy as np
+try:
+    from . import i3d_weldUtil
+except ImportError:     # run as script or in a worker process
+    import i3d_weldUtil
+
+_vertexSlots = ("positions", "normals", "colors", "blendWeights", "blendIndices", "generic")
+
+def getDegenerateTriangles(triangles, positions):
+    """
+    Returns a bool mask of the triangles without area
+
+    A triangle is degenerate if two corners are the same vertex or its corners are collinear with the positions
+    as written to the file, vertices split by other attributes at the same position count as the same point.
+
+    :param triangles: (T,3) vertex indices
+    :param positions: (N,3) vertex positions
+    :returns: (T) bool array
+    """
+
+    triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    degenerate = ((triangles[:, 0] == triangles[:, 1]) | (triangles[:, 1] == triangles[:, 2]) |
+                  (triangles[:, 0] == triangles[:, 2]))
+    points = i3d_weldUtil.getFormattedValues(np.asarray(positions))[triangles]
+    normals = np.cross(points[:, 1] - points[:, 0], points[:, 2] - points[:, 0])
+    degenerate |= ~np.any(normals != 0.0, axis=1)
+    return degenerate
+
+def getDuplicateTriangles(triangles, triangleSubsets):
+    """
+    Returns a bool mask of the triangles which repeat an earlier triangle of the same subset
+
+    Triangles are the same if they have the same vertices in the same winding, the first one is kept.
+    Triangles with the opposite winding are the back face and no duplicate.
+
+    :param triangles: (T,3) vertex indices
+    :param triangleSubsets: (T) subset index of every triangle
+    :returns: (T) bool array
+    """
+
+    triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    if len(triangles) == 0:
+        return np.zeros(0, dtype=bool)
+    # rotate the smallest vertex to the front, the winding stays
+    rotation = np.argmin(triangles, axis=1).reshape(-1, 1)
+    rotated = np.take_along_axis(triangles, (rotation + np.arange(3)) % 3, axis=1)
+    rows = np.hstack((np.asarray(triangleSubsets, dtype=np.int64).reshape(-1, 1), rotated))
+    firstRows, groups = i3d_weldUtil.weldRows(rows)
+    return firstRows[groups] != np.arange(len(rows))
+
+def cleanShapeBuffers(shapeBuffers):
+    """
+    Removes degenerate and duplicate triangles of every subset and the vertices not used anymore
+
+    A subset whose triangles would all be removed keeps them, materials and subsets are never dropped.
+    The remaining vertices keep their order, the subset ranges are computed again.
+
+    :param shapeBuffers: i3d_shapeUtil.ShapeBuffers, changed in place, not encoded yet
+    :returns: (degenerate, duplicates) number of removed triangles, stored in shapeBuffers.removedTriangles as well
+    """
+
+    triangles = shapeBuffers.indices.astype(np.int64).reshape(-1, 3)
+    subsetTriangles = shapeBuffers.subsets[:, 3] // 3
+    triangleSubsets = np.repeat(np.arange(len(subsetTriangles)), subsetTriangles)
+    degenerate = getDegenerateTriangles(triangles, shapeBuffers.positions)
+    duplicates = getDuplicateTriangles(triangles, triangleSubsets) & ~degenerate
+    remove = degenerate | duplicates
+    emptied = np.bincount(triangleSubsets[~remove], minlength=len(subsetTriangles)) == 0
+    remove &= ~emptied[triangleSubsets]
+    counts = (int(np.count_nonzero(degenerate & remove)), int(np.count_nonzero(duplicates & remove)))
+    shapeBuffers.removedTriangles = np.array(counts, dtype=np.int64)
+    if not remove.any():
+        return counts
+
+    triangles = triangles[~remove]
+    used = np.zeros(shapeBuffers.vertexCount, dtype=bool)
+    used[triangles.ravel()] = True
+    newIndices = np.cumsum(used) - 1
+    for slot in _vertexSlots:
+        values = getattr(shapeBuffers, slot)
+        if values is not None:
+            setattr(shapeBuffers, slot, values[used])
+    shapeBuffers.uvs = [uv[used] for uv in shapeBuffers.uvs]
+    indices = newIndices[triangles.ravel()]
+    shapeBuffers.indices = indices.astype(np.uint32)
+    shapeBuffers.subsets = i3d_weldUtil.getSubsetRanges(indices, np.bincount(triangleSubsets[~remove], minlength=len(subsetTriangles)))
+    return counts
+
+if __name__ == "__main__":
+    """ Test function with dummy data """
+
+    print(__file__)
+    testPositions = np.array([(0, 0, 0), (1, 0, 0), (0, 1, 0), (2, 0, 0), (1, 1, 0), (0, 0, 0)], dtype=np.float32)
+    testTriangles = np.array([(0, 1, 2), (1, 2, 0), (2, 1, 0), (0, 1, 3), (0, 0, 2), (1, 4, 2), (5, 1, 2)])
+    print("degenerate: {}".format(getDegenerateTriangles(testTriangles, testPositions).tolist()))
+    print("duplicates: {}".format(getDuplicateTriangles(testTriangles, [0, 0, 0, 0, 0, 1, 1]).tolist()))
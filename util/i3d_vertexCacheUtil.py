@@ -0,0 +1,187 @@
+"""i3d_vertexCacheUtil.py reorders triangles and vertices of the shape buffers for the post-transform vertex cache of the gpu"""
+
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+print(__file__)
+
+import numpy as np
+try:
+    from . import i3d_weldUtil
+except ImportError:     # run as script or in a worker process
+    import i3d_weldUtil
+
+_vertexSlots = ("positions", "normals", "colors", "blendWeights", "blendIndices", "generic")
+
+def countCacheMisses(indices, cacheSize):
+    """
+    Returns the number of vertex transformations of the index buffer with a FIFO cache of cacheSize entries
+
+    ACMR (average cache miss ratio) is misses per triangle, ATVR (average transform to vertex ratio) misses per vertex.
+    """
+
+    insertions = {}
+    misses = 0
+    for vertex in np.asarray(indices).tolist():
+        inserted = insertions.get(vertex)
+        if inserted is None or misses - inserted >= cacheSize:
+            insertions[vertex] = misses
+            misses += 1
+    return misses
+
+def getTriangleOrder(triangles, cacheSize):
+    """
+    Returns the order of the triangles for a vertex cache of cacheSize entries (Tipsify)
+
+    Triangles are emitted as fans around a vertex, the next fan vertex is the one of the last fan which stays
+    longest in the cache, dead ends continue with the most recently used vertex with remaining triangles.
+
+    :param triangles: (T,3) vertex indices
+    :param cacheSize: number of vertices in the cache
+    :returns: (T) int64 array of triangle indices
+    """
+
+    triangles = np.asarray(triangles).reshape(-1, 3)
+    if len(triangles) == 0:
+        return np.zeros(0, dtype=np.int64)
+    vertices, localCorners = np.unique(triangles, return_inverse=True)
+    localCorners = localCorners.reshape(-1)
+    vertexCount = len(vertices)
+    # vertex -> adjacent triangles, one entry per corner
+    cornerOrder = np.argsort(localCorners, kind="stable")
+    adjacency = (cornerOrder // 3).tolist()
+    live = np.bincount(localCorners, minlength=vertexCount)
+    adjacencyStarts = np.concatenate(([0], np.cumsum(live))).tolist()
+    live = live.tolist()
+    triangleCorners = localCorners.reshape(-1, 3).tolist()
+
+    timestamps = [-cacheSize - 1] * vertexCount
+    emitted = [False] * len(triangleCorners)
+    deadEnds = []
+    order = []
+    time = 0
+    cursor = 0
+    fanVertex = 0
+    while fanVertex >= 0:
+        candidates = []
+        for triangle in adjacency[adjacencyStarts[fanVertex]:adjacencyStarts[fanVertex + 1]]:
+            if emitted[triangle]:
+                continue
+            emitted[triangle] = True
+            order.append(triangle)
+            for vertex in triangleCorners[triangle]:
+                deadEnds.append(vertex)
+                candidates.append(vertex)
+                live[vertex] -= 1
+                if time - timestamps[vertex] > cacheSize:
+                    timestamps[vertex] = time
+                    time += 1
+
+        # next fan: the candidate with remaining triangles which is in the cache the longest, but stays there for its fan
+        fanVertex = -1
+        bestPriority = -1
+        for vertex in candidates:
+            if live[vertex] > 0:
+                priority = 0
+                if time - timestamps[vertex] + 2 * live[vertex] <= cacheSize:
+                    priority = time - timestamps[vertex]
+                if priority > bestPriority:
+                    bestPriority = priority
+                    fanVertex = vertex
+        if fanVertex < 0:
+            while deadEnds:
+                vertex = deadEnds.pop()
+                if live[vertex] > 0:
+                    fanVertex = vertex
+                    break
+        if fanVertex < 0:
+            while cursor < vertexCount:
+                if live[cursor] > 0:
+                    fanVertex = cursor
+                    break
+                cursor += 1
+    return np.array(order, dtype=np.int64)
+
+def optimizeShapeBuffers(shapeBuffers, cacheSize, countMisses = False):
+    """
+    Reorders the triangles of every subset for the vertex cache and the vertices by first use
+
+    Subsets keep their triangles, so the subset ranges are only updated, the vertex order follows the index buffer
+    which keeps the vertices of every subset together.
+
+    :param shapeBuffers: i3d_shapeUtil.ShapeBuffers, changed in place, not encoded yet
+    :param cacheSize: number of vertices in the cache
+    :param countMisses: count the vertex transformations for the report, two more python passes over the index buffer
+    :returns: (missesBefore, missesAfter) vertex transformations of the index buffer, None without countMisses,
+              stored in shapeBuffers.vertexCacheMisses as well
+    """
+
+    indices = shapeBuffers.indices.astype(np.int64)
+    missesBefore = countCacheMisses(indices, cacheSize) if countMisses else None
+    triangles = indices.reshape(-1, 3)
+    subsetTriangles = shapeBuffers.subsets[:, 3] // 3
+    orderedTriangles = []
+    firstTriangle = 0
+    for numTriangles in subsetTriangles.tolist():
+        subset = triangles[firstTriangle:firstTriangle + numTriangles]
+        orderedTriangles.append(subset[getTriangleOrder(subset, cacheSize)])
+        firstTriangle += numTriangles
+    if orderedTriangles:
+        indices = np.concatenate(orderedTriangles).reshape(-1)
+
+    # vertices by first use, vertices without triangles keep their order at the end
+    usedVertices, firstUses = np.unique(indices, return_index=True)
+    vertexOrder = usedVertices[np.argsort(firstUses, kind="stable")]
+    unused = np.setdiff1d(np.arange(shapeBuffers.vertexCount), vertexOrder)
+    vertexOrder = np.concatenate((vertexOrder, unused)).astype(np.int64)
+    newIndices = np.empty(shapeBuffers.vertexCount, dtype=np.int64)
+    newIndices[vertexOrder] = np.arange(len(vertexOrder))
+
+    for slot in _vertexSlots:
+        values = getattr(shapeBuffers, slot)
+        if values is not None:
+            setattr(shapeBuffers, slot, values[vertexOrder])
+    shapeBuffers.uvs = [uv[vertexOrder] for uv in shapeBuffers.uvs]
+    indices = newIndices[indices]
+    shapeBuffers.indices = indices.astype(np.uint32)
+    shapeBuffers.subsets = i3d_weldUtil.getSubsetRanges(indices, subsetTriangles)
+    if not countMisses:
+        return None
+    misses = (missesBefore, countCacheMisses(indices, cacheSize))
+    shapeBuffers.vertexCacheMisses = np.array(misses, dtype=np.int64)
+    return misses
+
+if __name__ == "__main__":
+    """ Test function with dummy data """
+
+    print(__file__)
+    # grid of 60x60 quads, rows of triangles like a modelling tool writes them
+    gridSize = 60
+    testTriangles = []
+    for row in range(gridSize):
+        for column in range(gridSize):
+            corner = row * (gridSize + 1) + column
+            testTriangles.append((corner, corner + 1, corner + gridSize + 1))
+            testTriangles.append((corner + 1, corner + gridSize + 2, corner + gridSize + 1))
+    testTriangles = np.array(testTriangles)
+    testOrder = getTriangleOrder(testTriangles, 16)
+    print("triangles kept: {}".format(np.array_equal(np.sort(testOrder), np.arange(len(testTriangles)))))
+    for testName, testIndices in (("original", testTriangles), ("tipsify", testTriangles[testOrder])):
+        testMisses = countCacheMisses(testIndices.reshape(-1), 16)
+        print("{}: ACMR {:.3f} ATVR {:.3f}".format(testName, testMisses / len(testTriangles), testMisses / (gridSize + 1) ** 2))
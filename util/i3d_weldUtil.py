@@ -0,0 +1,389 @@
+"""i3d_weldUtil.py is used to weld the triangle corners of a mesh into a vertex and an index buffer"""
+
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+print(__file__)
+
+import math
+import numpy as np
+
+_powersOfTen = np.array([float(10 ** i) for i in range(309)])   # correctly rounded, exact up to 1e22
+_maxShift = 300
+_halfwayEpsilon = 1e-7      # far above the error of one scaling step (< 1e-9 for values below 1e6)
+
+def getFormatKeys(values):
+    """
+    Returns int64 keys which are equal exactly if the "{:g}" text of the values is equal
+
+    :param values: array of floats, any shape
+    :returns: int64 array of the same shape
+    """
+
+    mantissa, exponent = getFormatDigits(values)
+    return (exponent + 400) * 4000000 + (mantissa + 2000000)
+
+def getFormattedValues(values):
+    """
+    Returns the values as they are read back from their "{:g}" text, the same as float("{:g}".format(value))
+
+    :param values: array of floats, any shape
+    :returns: float64 array of the same shape
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    result = values.copy()
+    regular = np.isfinite(values) & (values != 0.0)
+    if regular.any():
+        mantissa, exponent = getFormatDigits(values[regular])
+        shift = exponent - 5
+        power = _powersOfTen[np.clip(np.abs(shift), 0, 22)]
+        mantissa = mantissa.astype(np.float64)
+        rebuilt = np.where(shift >= 0, mantissa * power, mantissa / power)    # exact operands, one correctly rounded step
+        for i in np.flatnonzero(np.abs(shift) > 22).tolist():
+            rebuilt[i] = float("{:d}e{:d}".format(int(mantissa[i]), int(shift[i])))
+        result[regular] = rebuilt
+    return result
+
+def getFormatDigits(values, digits = 6):
+    """
+    Returns the mantissa and exponent "{:g}" prints for every value, "{:.<digits>g}" with less digits
+
+    "{:g}" rounds to 6 significant digits, the mantissa is the signed integer of these digits (100000 <= |m| <= 999999).
+    -0.0 ("-0"), nan and inf get special mantissas (-1, 1, 2, 3) with exponent 0, +0.0 is mantissa 0.
+    The few values too close to a rounding tie (or out of the range of the scaling table)
+    are formatted by python to get the exact same rounding.
+
+    :param values: array of floats, any shape
+    :param digits: significant digits, 2 to 6 (with 1 the special mantissas are taken by regular values)
+    :returns: (mantissa, exponent) int64 arrays of the same shape
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    shape = values.shape
+    values = values.ravel()
+    mantissa = np.zeros(values.shape, dtype=np.int64)
+    exponent = np.zeros(values.shape, dtype=np.int64)
+    mantissa[(values == 0.0) & np.signbit(values)] = -1
+    mantissa[np.isnan(values)] = 1
+    mantissa[values == np.inf] = 2
+    mantissa[values == -np.inf] = 3
+    regular = np.flatnonzero(np.isfinite(values) & (values != 0.0))
+    if len(regular):
+        absValues = np.abs(values[regular])
+        exp = np.floor(np.log10(absValues)).astype(np.int64)
+        scaled = scaleToSixDigits(absValues, exp, digits)
+        for _ in range(2):   # log10 can be off by one next to powers of ten
+            tooLarge = scaled >= _powersOfTen[digits]
+            tooSmall = scaled < _powersOfTen[digits - 1]
+            if not (tooLarge.any() or tooSmall.any()):
+                break
+            exp[tooLarge] += 1
+            exp[tooSmall] -= 1
+            scaled = scaleToSixDigits(absValues, exp, digits)
+        rounded = np.rint(scaled)
+        carry = rounded >= _powersOfTen[digits]
+        rounded[carry] = _powersOfTen[digits - 1]
+        exp[carry] += 1
+        fraction = scaled - np.floor(scaled)
+        ambiguous = (np.abs(fraction - 0.5) < _halfwayEpsilon) | (np.abs(digits - 1 - exp) > _maxShift) | ~np.isfinite(scaled)
+        for i in np.flatnonzero(ambiguous).tolist():
+            digitText, expText = "{:.{}e}".format(absValues[i], digits - 1).split("e")
+            rounded[i] = int(digitText.replace(".", ""))
+            exp[i] = int(expText)
+        mantissa[regular] = np.where(values[regular] < 0, -rounded, rounded).astype(np.int64)
+        exponent[regular] = exp
+    return mantissa.reshape(shape), exponent.reshape(shape)
+
+def scaleToSixDigits(absValues, exp, digits = 6):
+    """ Returns absValues * 10^(digits-1-exp), positive shifts are multiplied and negative divided to stay exact as long as possible """
+
+    shift = digits - 1 - exp
+    power = _powersOfTen[np.clip(np.abs(shift), 0, len(_powersOfTen) - 1)]
+    with np.errstate(over='ignore', invalid='ignore'):
+        return np.where(shift >= 0, absValues * power, absValues / power)
+
+def getGridKeys(values, cellSize):
+    """
+    Returns int64 keys of the values snapped to a grid, values in the same grid cell get the same key
+
+    This is grid snapping, not a distance test: values in one cell are less than cellSize apart, but values
+    closer than that can fall into neighbouring cells and keep different keys (0.0049 and 0.0051 with 0.01).
+
+    :param values: array of floats, any shape
+    :param cellSize: size of the grid cells, centered on the multiples of cellSize
+    :returns: int64 array of the same shape
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    return np.floor(values / cellSize + 0.5).astype(np.int64)
+
+def getAngleTolerance(degrees):
+    """ Returns the grid cell size for unit vectors (normals) of an angle in degrees, the chord length of the angle """
+
+    return 2.0 * math.sin(math.radians(degrees) * 0.5)
+
+def weldRows(rows):
+    """
+    Welds equal rows
+
+    :param rows: 2D integer array, one row of keys per triangle corner
+    :returns: (firstRows, indices) firstRows is the index of the first row of every unique vertex in order of
+              first appearance, indices is the vertex index of every row
+    """
+
+    rows = np.asarray(rows)
+    count = len(rows)
+    if count == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    order = np.lexsort(rows.T[::-1])    # stable, the first row of every group is the lowest index
+    sortedRows = rows[order]
+    newGroup = np.empty(count, dtype=bool)
+    newGroup[0] = True
+    np.any(sortedRows[1:] != sortedRows[:-1], axis=1, out=newGroup[1:])
+    groupId = np.cumsum(newGroup) - 1
+    firstRows = order[newGroup]
+    inverse = np.empty(count, dtype=np.int64)
+    inverse[order] = groupId
+    appearance = np.argsort(firstRows, kind='stable')
+    rank = np.empty(len(firstRows), dtype=np.int64)
+    rank[appearance] = np.arange(len(firstRows))
+    return firstRows[appearance], rank[inverse]
+
+def getAttributeKeys(values, tolerance = 0.0):
+    """ Returns the int64 weld keys of an attribute array as (N,K), floats by their "{:g}" text or their tolerance grid cell """
+
+    values = np.asarray(values)
+    if values.dtype.kind == 'f':
+        if tolerance > 0.0:
+            keys = getGridKeys(values, tolerance)
+        else:
+            keys = getFormatKeys(values)
+    else:
+        keys = values.astype(np.int64)
+    return keys.reshape(len(values), -1)
+
+def weldShapeCorners(materials, triangleOrder, subsetTriangles, triangleLoops, loopVertices, attributes,
+                     chunkTriangles = 0, scratch = None):
+    """
+    Welds the triangle corners of all subsets into a vertex and an index buffer
+
+    Corners are ordered by subset, triangle and corner like the exported index buffer. Two corners become the same vertex
+    if they have the same material and equal attributes. Float values are equal if their "{:g}" text is equal or,
+    with a tolerance > 0 for their attribute, if they snap to the same grid cell. Vertices are numbered in order of
+    first appearance, a welded vertex takes the values of its first corner.
+
+    :param materials: ordered material names, one subset each
+    :param triangleOrder: triangle indices of all subsets, subset after subset
+    :param subsetTriangles: number of triangles of every subset
+    :param triangleLoops: (T,3) loop indices of the triangles
+    :param loopVertices: (L) vertex index of the loops
+    :param attributes: list of (array, perVertex, tolerance), arrays have one row per vertex or per loop,
+                       tolerance 0 compares the exported text
+    :param chunkTriangles: > 0 welds blocks of this many triangles after each other (see weldShapeCornersChunked)
+    :param scratch: i3d_scratchUtil.ScratchSpace for the per corner arrays of the chunked weld
+    :returns: (cornerLoops, cornerVertices, firstCorners, indices, subsetTriangles)
+              firstCorners is the corner every vertex is taken from, indices the vertex index of every corner
+    """
+
+    if chunkTriangles > 0 and len(triangleOrder) > chunkTriangles:
+        result = weldShapeCornersChunked(materials, triangleOrder, subsetTriangles, triangleLoops, loopVertices, attributes,
+                                         chunkTriangles, scratch)
+        if result is not None:
+            return result
+
+    cornerLoops = np.asarray(triangleLoops, dtype=np.int64).reshape(-1, 3)[np.asarray(triangleOrder, dtype=np.int64)].ravel()
+    cornerVertices = np.asarray(loopVertices, dtype=np.int64)[cornerLoops]
+    # same material name -> same key, like the name based key used before
+    materialKeys = [materials.index(material) for material in materials]
+    rows = [np.repeat(np.array(materialKeys, dtype=np.int64), np.array(subsetTriangles, dtype=np.int64) * 3).reshape(-1, 1)]
+    for values, perVertex, tolerance in attributes:
+        keys = getAttributeKeys(values, tolerance)
+        rows.append(keys[cornerVertices if perVertex else cornerLoops])
+    firstCorners, indices = weldRows(np.hstack(rows))
+    return cornerLoops, cornerVertices, firstCorners, indices, subsetTriangles
+
+def weldShapeCornersChunked(materials, triangleOrder, subsetTriangles, triangleLoops, loopVertices, attributes,
+                            chunkTriangles, scratch = None):
+    """
+    Welds like weldShapeCorners, but only the key rows of one block of triangles exist at a time
+
+    Every block is welded on its own, its vertices are then looked up by a 64 bit fingerprint of their key row in a
+    FingerprintTable of the vertices of the earlier blocks. Matches are checked against the key row of the vertex,
+    the result is the same as of weldShapeCorners. Returns None on a fingerprint collision, the caller welds at once then.
+    """
+
+    triangleOrder = np.asarray(triangleOrder, dtype=np.int64)
+    triangleLoops = np.asarray(triangleLoops, dtype=np.int64).reshape(-1, 3)
+    loopVertices = np.asarray(loopVertices, dtype=np.int64)
+    cornerCount = 3 * len(triangleOrder)
+    if scratch is None:
+        cornerLoops, cornerVertices, indices, firstCorners = (np.empty(cornerCount, dtype=np.int64) for _ in range(4))
+    else:
+        cornerLoops, cornerVertices, indices, firstCorners = (scratch.empty(cornerCount, np.int64) for _ in range(4))
+    materialKeys = [materials.index(material) for material in materials]
+    triangleMaterials = np.repeat(np.array(materialKeys, dtype=np.int64), np.array(subsetTriangles, dtype=np.int64))
+
+    def getRows(corners):
+        """ Returns the key rows of the corners, cornerLoops and cornerVertices have to be set for them """
+
+        loops = cornerLoops[corners]
+        vertices = cornerVertices[corners]
+        rows = [triangleMaterials[corners // 3].reshape(-1, 1)]
+        for values, perVertex, tolerance in attributes:
+            rows.append(getAttributeKeys(np.asarray(values)[vertices if perVertex else loops], tolerance))
+        return np.hstack(rows)
+
+    table = FingerprintTable()
+    vertexCount = 0
+    for firstTriangle in range(0, len(triangleOrder), chunkTriangles):
+        loops = triangleLoops[triangleOrder[firstTriangle:firstTriangle + chunkTriangles]].ravel()
+        corners = np.arange(3 * firstTriangle, 3 * firstTriangle + len(loops))
+        cornerLoops[corners[0]:corners[-1] + 1] = loops
+        cornerVertices[corners[0]:corners[-1] + 1] = loopVertices[loops]
+        rows = getRows(corners)
+        chunkFirstRows, chunkIndices = weldRows(rows)
+        uniqueRows = rows[chunkFirstRows]
+        fingerprints = getRowFingerprints(uniqueRows)
+        vertexIds = table.lookup(fingerprints)
+        known = vertexIds >= 0
+        if known.any() and not np.array_equal(getRows(firstCorners[vertexIds[known]]), uniqueRows[known]):
+            return None
+        newFingerprints = fingerprints[~known]
+        if len(np.unique(newFingerprints)) != len(newFingerprints):
+            return None
+        newIds = np.arange(vertexCount, vertexCount + len(newFingerprints), dtype=np.int64)
+        table.insert(newFingerprints, newIds)
+        firstCorners[vertexCount:vertexCount + len(newIds)] = corners[chunkFirstRows[~known]]
+        vertexIds[~known] = newIds
+        vertexCount += len(newIds)
+        indices[corners[0]:corners[-1] + 1] = vertexIds[chunkIndices]
+    return cornerLoops, cornerVertices, firstCorners[:vertexCount], indices, subsetTriangles
+
+def getRowFingerprints(rows):
+    """ Returns a uint64 hash of every row of an int64 array """
+
+    rows = np.asarray(rows, dtype=np.int64).view(np.uint64)
+    fingerprints = np.full(len(rows), 0x9E3779B97F4A7C15, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for column in range(rows.shape[1]):
+            fingerprints = (fingerprints ^ rows[:, column]) * np.uint64(0xBF58476D1CE4E5B9)
+            fingerprints ^= fingerprints >> np.uint64(31)
+    return fingerprints
+
+class FingerprintTable( object ):
+    """
+    Open addressing hash table of uint64 fingerprints to int64 ids (16 bytes per slot, at most half of the slots used)
+
+    lookup and insert work on whole arrays, every round probes the next slot of all keys which are not done.
+    """
+
+    def __init__(self, capacity = 1024):
+        self._fingerprints = np.zeros(capacity, dtype=np.uint64)
+        self._ids = np.full(capacity, -1, dtype=np.int64)
+        self._count = 0
+
+    def lookup(self, fingerprints):
+        """ Returns the id of every fingerprint, -1 if it is not in the table """
+
+        mask = np.uint64(len(self._ids) - 1)
+        slots = (fingerprints & mask).astype(np.int64)
+        result = np.full(len(fingerprints), -1, dtype=np.int64)
+        pending = np.arange(len(fingerprints))
+        while len(pending):
+            ids = self._ids[slots[pending]]
+            empty = ids < 0
+            match = ~empty & (self._fingerprints[slots[pending]] == fingerprints[pending])
+            result[pending[match]] = ids[match]
+            pending = pending[~empty & ~match]
+            slots[pending] = (slots[pending] + 1) & (len(self._ids) - 1)
+        return result
+
+    def insert(self, fingerprints, ids):
+        """ Adds fingerprints which are not in the table yet and differ from each other """
+
+        if 2 * (self._count + len(fingerprints)) > len(self._ids):
+            capacity = len(self._ids)
+            while 2 * (self._count + len(fingerprints)) > capacity:
+                capacity *= 2
+            used = self._ids >= 0
+            oldFingerprints, oldIds = self._fingerprints[used], self._ids[used]
+            self._fingerprints = np.zeros(capacity, dtype=np.uint64)
+            self._ids = np.full(capacity, -1, dtype=np.int64)
+            self._count = 0
+            self._place(oldFingerprints, oldIds)
+        self._place(fingerprints, ids)
+
+    def _place(self, fingerprints, ids):
+        mask = len(self._ids) - 1
+        slots = (fingerprints & np.uint64(mask)).astype(np.int64)
+        pending = np.arange(len(fingerprints))
+        while len(pending):
+            free = self._ids[slots[pending]] < 0
+            candidates = pending[free]
+            _, firstCandidates = np.unique(slots[candidates], return_index=True)
+            winners = candidates[firstCandidates]
+            self._fingerprints[slots[winners]] = fingerprints[winners]
+            self._ids[slots[winners]] = ids[winners]
+            placed = np.zeros(len(fingerprints), dtype=bool)
+            placed[winners] = True
+            pending = pending[~placed[pending]]
+            slots[pending] = (slots[pending] + 1) & mask
+        self._count += len(fingerprints)
+
+def getSubsetRanges(indices, subsetTriangles):
+    """
+    Returns a (S,4) int64 array with firstVertex, numVertices, firstIndex, numIndices of every subset of the index buffer
+
+    A zero entry in subsetTriangles gets the empty range (0, 0, firstIndex, 0).
+    """
+
+    ranges = []
+    firstIndex = 0
+    for numTriangles in subsetTriangles:
+        numIndices = numTriangles * 3
+        subsetIndices = indices[firstIndex:firstIndex + numIndices]
+        if len(subsetIndices):
+            ranges.append((int(subsetIndices.min()), len(np.unique(subsetIndices)), firstIndex, numIndices))
+        else:
+            ranges.append((0, 0, firstIndex, 0))
+        firstIndex += numIndices
+    return np.array(ranges, dtype=np.int64).reshape(-1, 4)
+
+if __name__ == "__main__":
+    """ Test function with dummy data """
+
+    print(__file__)
+    testValues = np.array([0.0, -0.0, 1.0, -1.0, 0.1, 123456.5, 123457.5, 999999.5, 1e-5, 1e22, 5e-324,
+                           0.333333333, 0.3333334, 1.0000005, 2.5e-7, -12.34565, np.nan, np.inf, -np.inf])
+    testValues = np.concatenate((testValues, np.random.default_rng(1).normal(0.0, 100.0, 10000).astype(np.float32)))
+    keys = getFormatKeys(testValues).tolist()
+    texts = ["{:g}".format(v) for v in testValues.tolist()]
+    mismatches = 0
+    keyToText = {}
+    for key, text in zip(keys, texts):
+        if keyToText.setdefault(key, text) != text:
+            mismatches += 1
+    print("getFormatKeys: {} values, {} keys, {} texts, {} mismatches".format(len(keys), len(set(keys)), len(set(texts)), mismatches))
+    formatted = getFormattedValues(testValues).tolist()
+    mismatches = sum(1 for value, text in zip(formatted, texts) if "{:g}".format(value) != text or (value == value and value != float(text)))
+    print("getFormattedValues: {} mismatches".format(mismatches))
+    print("weldRows: {}".format(weldRows([[1, 2], [3, 4], [1, 2], [0, 0], [3, 4]])))
+    subsetRanges = getSubsetRanges(np.array([0, 1, 2, 2, 1, 3], dtype=np.uint32), [1, 0, 1])
+    assert subsetRanges.tolist() == [[0, 3, 0, 3], [0, 0, 3, 0], [1, 3, 3, 3]], "getSubsetRanges: {}".format(subsetRanges.tolist())
@@ -0,0 +1,44 @@
+"""i3d_workerInitUtil.py is run by the shape worker processes before they import the add-on modules, see i3d_shapeProcessUtil"""
+
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+print(__file__)
+
+import sys
+import types
+
+def registerPackage(packageName, packageFolder):
+    """
+    Registers the add-on package in sys.modules without running its __init__, which needs bpy
+
+    Its subpackages (util) are imported from packageFolder as usual, parent packages of extensions
+    ("bl_ext.<repository>") are registered empty.
+    """
+
+    names = packageName.split(".")
+    for index in range(1, len(names) + 1):
+        name = ".".join(names[:index])
+        if name not in sys.modules:
+            package = types.ModuleType(name)
+            package.__path__ = [packageFolder] if index == len(names) else []
+            sys.modules[name] = package
+
+if "packageName" in globals():     # run with runpy.run_path(path, {"packageName": .., "packageFolder": ..})
+    registerPackage(packageName, packageFolder)
@@ -0,0 +1,258 @@
+"""i3d_xmlWriterUtil.py writes the pretty printed .i3d xml element by element instead of building the whole document first"""
+
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+print(__file__)
+
+import os
+try:
+    from . import i3d_textEncodeUtil
+except ImportError:     # run as script or in a worker process
+    import i3d_textEncodeUtil
+
+_rowsPerWrite = 4096
+
+def indentElement(elem, level = 0):
+    """ Pretty prints the element tree with two spaces per level, source http://effbot.org/zone/element-lib.htm#prettyprint """
+
+    i = "\n" + level*"  "
+    if len( elem ):
+        if not elem.text or not elem.text.strip():
+            elem.text = i + "  "
+        if not elem.tail or not elem.tail.strip():
+            elem.tail = i
+        for elem in elem:
+            indentElement( elem, level + 1 )
+        if not elem.tail or not elem.tail.strip():
+            elem.tail = i
+    else:
+        if level and (not elem.tail or not elem.tail.strip()):
+            elem.tail = i
+
+def escapeAttribute(text):
+    """ Escapes an attribute value like xml.etree.ElementTree """
+
+    if not isinstance(text, str):
+        raise TypeError("cannot serialize {!r} (type {})".format(text, type(text).__name__))
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    if "\"" in text:
+        text = text.replace("\"", "&quot;")
+    if "\r" in text:
+        text = text.replace("\r", "&#13;")
+    if "\n" in text:
+        text = text.replace("\n", "&#10;")
+    if "\t" in text:
+        text = text.replace("\t", "&#09;")
+    return text
+
+def escapeText(text):
+    """ Escapes element text like xml.etree.ElementTree """
+
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+class XmlStreamWriter( object ):
+    """
+    Writes the xml of I3DIOexport like xml.etree.ElementTree.write after indentElement, without the tree
+
+    Elements are opened and closed in document order, finished parts are passed as small element trees or as
+    rows of attributes. The file is a text file opened with the export encoding and errors="xmlcharrefreplace".
+    Row values are numeric text and written without escaping.
+    With a filepath the file is a temporary file, finish moves it onto filepath and discard deletes it.
+    """
+
+    _emptyElementEnd = " />"
+
+    def __init__(self, file, filepath = None):
+        self._file = file
+        self._filepath = filepath
+        self._write = file.write
+        self._openTags = []
+
+    def writeDeclaration(self, encoding):
+        self._write("<?xml version='1.0' encoding='{0}'?>\n".format(encoding))
+
+    def startElement(self, elem, nsmap = None):
+        """ Opens elem, which gets at least one child, its attributes are taken from the element """
+
+        self._writeIndent()
+        self._write("<" + elem.tag + self._getAttributes(elem.items()) + ">")
+        self._openTags.append(elem.tag)
+
+    def endElement(self):
+        tag = self._openTags.pop()
+        self._write("\n" + "  " * len(self._openTags) + "</" + tag + ">")
+        if not self._openTags:
+            self._write("\n")
+
+    def writeTree(self, elem):
+        """ Writes the finished element with its children """
+
+        indentElement(elem, len(self._openTags))
+        elem.tail = None
+        self._writeIndent()
+        self._writeTree(elem)
+
+    def writeRows(self, elem, rowTag, columns, count):
+        """
+        Writes elem with count child elements rowTag
+
+        :param elem: the parent element with its attributes, without children
+        :param rowTag: tag of the rows
+        :param columns: list of (attribute name, "S" array of count ascii text values, see i3d_textEncodeUtil)
+        :param count: number of rows, elem is written as empty element without rows
+        """
+
+        if count == 0:
+            self.writeTree(elem)
+            return
+        self.startElement(elem)
+        pieces = ["\n" + "  " * len(self._openTags) + "<" + rowTag]
+        for name, values in columns:
+            pieces += [" {0}=\"".format(name), values, "\""]
+        pieces[-1] += self._emptyElementEnd
+        for first in range(0, count, _rowsPerWrite):
+            self._writeText(i3d_textEncodeUtil.joinLines(pieces, first, min(first + _rowsPerWrite, count)))
+        self.endElement()
+
+    def _writeText(self, text):
+        """ Writes ascii bytes as they are """
+
+        self._write(text.decode("ascii"))
+
+    def close(self):
+        self._file.close()
+
+    def finish(self):
+        """ Closes the finished document and replaces filepath with it """
+
+        self._file.close()
+        if self._filepath is not None:
+            os.replace(self._file.name, self._filepath)
+
+    def discard(self):
+        """ Closes the unfinished document and deletes the temporary file, filepath stays as it was """
+
+        try:
+            self._file.close()
+        except OSError:     # flushing the rest failed, the file is closed anyway
+            pass
+        if self._filepath is not None and os.path.exists(self._file.name):
+            os.remove(self._file.name)
+
+    def _writeIndent(self):
+        if self._openTags:
+            self._write("\n" + "  " * len(self._openTags))
+
+    @staticmethod
+    def _getAttributes(items):
+        return "".join(" {0}=\"{1}\"".format(key, escapeAttribute(value)) for key, value in items)
+
+    def _writeTree(self, elem):
+        self._write("<" + elem.tag + self._getAttributes(elem.items()))
+        if elem.text or len(elem):
+            self._write(">")
+            if elem.text:
+                self._write(escapeText(elem.text))
+            for child in elem:
+                self._writeTree(child)
+            self._write("</" + elem.tag + ">")
+        else:
+            self._write(" />")
+        if elem.tail:
+            self._write(escapeText(elem.tail))
+
+class LxmlStreamWriter( XmlStreamWriter ):
+    """
+    XmlStreamWriter with the incremental xmlfile API of lxml, like lxml.etree.ElementTree.write after indentElement
+
+    The file is a binary file, lxml escapes and encodes. Rows go to the file directly after flushing lxml.
+    """
+
+    _emptyElementEnd = "/>"
+
+    def __init__(self, file, etree, encoding, filepath = None):
+        super().__init__(file, filepath)
+        self._etree = etree
+        self._encoding = encoding
+        self._xmlFile = None
+        self._xmlWriter = None
+        self._contexts = []
+
+    def writeDeclaration(self, encoding):
+        # lxml writes the encoding of the declaration in upper case
+        self._file.write("<?xml version='1.0' encoding='{0}'?>\n".format(encoding.upper()).encode("ascii"))
+
+    def startElement(self, elem, nsmap = None):
+        if self._xmlWriter is None:
+            self._xmlFile = self._etree.xmlfile(self._file, encoding = self._encoding)
+            self._xmlWriter = self._xmlFile.__enter__()
+        self._writeIndent()
+        context = self._xmlWriter.element(elem.tag, dict(elem.attrib), nsmap = nsmap)
+        context.__enter__()
+        self._contexts.append(context)
+        self._openTags.append(elem.tag)
+
+    def endElement(self):
+        self._openTags.pop()
+        self._xmlWriter.write("\n" + "  " * len(self._openTags))
+        self._contexts.pop().__exit__(None, None, None)
+        if not self._openTags:
+            self._xmlFile.__exit__(None, None, None)
+            self._xmlFile = None
+            self._xmlWriter = None
+            self._file.write(b"\n")
+
+    def writeTree(self, elem):
+        indentElement(elem, len(self._openTags))
+        elem.tail = None
+        self._writeIndent()
+        self._xmlWriter.write(elem)
+
+    def _writeText(self, text):
+        self._xmlWriter.flush()
+        self._file.write(text)
+
+    def _writeIndent(self):
+        if self._openTags:
+            self._xmlWriter.write("\n" + "  " * len(self._openTags))
+
+def openStreamWriter(filepath, encoding, etree = None):
+    """
+    Returns the stream writer for the file, an LxmlStreamWriter if the lxml etree module is given
+
+    The file is opened like ElementTree.write of the used xml module opens it, the output is the same.
+    The document is written to a temporary file next to filepath, an existing file is only replaced by finish.
+    """
+
+    temporaryPath = filepath + ".tmp"
+    if etree is not None:
+        return LxmlStreamWriter(open(temporaryPath, "wb", buffering = 1024 * 1024), etree, encoding, filepath)
+    return XmlStreamWriter(open(temporaryPath, "w", encoding = encoding, errors = "xmlcharrefreplace", buffering = 1024 * 1024), filepath)